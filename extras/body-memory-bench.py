@@ -0,0 +1,86 @@
+"""
+Benchmark of the memory used to build large response bodies
+
+usage:
+
+    python extras/body-memory-bench.py [-s SIZE_MB] [--chunk-size BYTES]
+
+Reports the peak memory allocated, as seen by tracemalloc, and the time taken
+to accumulate a body received in chunks, as the HTTP/1.1 download handler does,
+and to decompress a body, as HttpCompressionMiddleware does. The ideal peak is
+the size of the body for accumulation, and the compressed plus decompressed
+sizes for decompression.
+"""
+
+import argparse
+import gzip
+import time
+import tracemalloc
+import zlib
+from io import BytesIO
+
+from scrapy.utils._compression import _inflate
+from scrapy.utils.gz import gunzip
+
+
+def _measure(func, *args):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func(*args)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return len(result), peak, elapsed
+
+
+def _bytesio(chunks):
+    buf = BytesIO()
+    for chunk in chunks():
+        buf.write(chunk)
+    return buf.getvalue()
+
+
+def _join(chunks):
+    return b"".join(list(chunks()))
+
+
+def _bytearray(chunks):
+    buf = bytearray()
+    for chunk in chunks():
+        buf += chunk
+    return bytes(buf)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-s", "--size", type=int, default=100)
+    parser.add_argument("--chunk-size", type=int, default=65536)
+    args = parser.parse_args()
+    size = args.size * 2**20
+    block = bytes(range(256)) * (args.chunk_size // 256)
+
+    def chunks():
+        # chunks received from the network are new objects
+        for _ in range(size // len(block)):
+            yield bytes(memoryview(block))
+
+    print(f"{'':<28}{'body MB':>10}{'peak MB':>10}{'ms':>8}")
+    rows = [
+        ("accumulate: BytesIO", _bytesio, chunks),
+        ("accumulate: list + join", _join, chunks),
+        ("accumulate: bytearray", _bytearray, chunks),
+    ]
+    body = _bytesio(chunks)
+    rows.append(("decompress: gzip", gunzip, gzip.compress(body, 1)))
+    rows.append(("decompress: deflate", _inflate, zlib.compress(body, 1)))
+    del body
+    for name, func, arg in rows:
+        length, peak, elapsed = _measure(func, arg)
+        print(
+            f"{name:<28}{length / 2**20:10.1f}{peak / 2**20:10.1f}"
+            f"{elapsed * 1000:8.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
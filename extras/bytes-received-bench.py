@@ -0,0 +1,65 @@
+"""
+Benchmark of the body chunk path of the HTTP/1.1 download handler
+
+usage:
+
+    python extras/bytes-received-bench.py [-n NUMBER] [-s SIZE] [-r RECEIVERS]
+
+Chunks are fed to the response reader of the HTTP/1.1 download handler, as the
+transport would, with RECEIVERS no-op handlers connected to the bytes_received
+signal, reporting the time per chunk and the resulting throughput.
+"""
+
+import argparse
+import time
+
+from twisted.internet.defer import Deferred
+
+from scrapy import Request, Spider, signals
+from scrapy.core.downloader.handlers.http11 import _ResponseReader
+from scrapy.utils.test import get_crawler
+
+CHUNKS_PER_RESPONSE = 1000
+
+
+def _read(crawler, request, chunk, n):
+    reader = _ResponseReader(
+        finished=Deferred(),
+        txresponse=None,
+        request=request,
+        maxsize=0,
+        warnsize=0,
+        fail_on_dataloss=True,
+        crawler=crawler,
+    )
+    reader.transport = object()
+    for _ in range(n):
+        reader.dataReceived(chunk)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", "--number", type=int, default=200000)
+    parser.add_argument("-s", "--size", type=int, default=4096)
+    parser.add_argument("-r", "--receivers", type=int, default=0)
+    args = parser.parse_args()
+    crawler = get_crawler(Spider)
+    crawler.spider = crawler._create_spider("bench")
+    receivers = [lambda *a, **kw: None for _ in range(args.receivers)]
+    for receiver in receivers:
+        crawler.signals.connect(receiver, signal=signals.bytes_received)
+    request = Request("https://example.com")
+    chunk = b"x" * args.size
+    start = time.perf_counter()
+    for i in range(0, args.number, CHUNKS_PER_RESPONSE):
+        _read(crawler, request, chunk, min(CHUNKS_PER_RESPONSE, args.number - i))
+    elapsed = time.perf_counter() - start
+    print(
+        f"{args.number} chunks of {args.size} bytes, {args.receivers} receivers: "
+        f"{elapsed / args.number * 1e6:.2f} us/chunk, "
+        f"{args.number * args.size / elapsed / 2**20:.0f} MiB/s"
+    )
+
+
+if __name__ == "__main__":
+    main()
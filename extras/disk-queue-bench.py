@@ -0,0 +1,102 @@
+"""
+Benchmark of the scheduler disk queues
+
+usage:
+
+    python extras/disk-queue-bench.py [-n NUMBER] [--compression {zlib,zstd}]
+
+Each queue class is filled with the same requests, closed, reopened and
+drained, reporting the push and pop times per request and the size of the
+queue directory once closed.
+"""
+
+import argparse
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+from scrapy import Request, Spider
+from scrapy.squeues import (
+    CompactFifoDiskQueue,
+    CompactLifoDiskQueue,
+    MarshalFifoDiskQueue,
+    MarshalLifoDiskQueue,
+    PickleFifoDiskQueue,
+    PickleLifoDiskQueue,
+)
+from scrapy.utils.test import get_crawler
+
+
+class BenchSpider(Spider):
+    name = "bench"
+
+    def parse_item(self, response):
+        pass
+
+
+def _requests(spider, n):
+    for i in range(n):
+        yield Request(
+            f"https://example.com/category/{i % 97}/item?id={i}&sort=asc",
+            callback=spider.parse_item,
+            headers={"Referer": f"https://example.com/category/{i % 97}"},
+            priority=-(i % 5),
+            meta={"depth": i % 7},
+        )
+
+
+def _bench(queue_class, crawler, requests):
+    tmpdir = tempfile.mkdtemp()
+    try:
+        key = str(Path(tmpdir, "queue"))
+        start = time.perf_counter()
+        q = queue_class.from_crawler(crawler, key)
+        for request in requests:
+            q.push(request)
+        q.close()
+        push = time.perf_counter() - start
+        size = sum(f.stat().st_size for f in Path(tmpdir).rglob("*") if f.is_file())
+        start = time.perf_counter()
+        q = queue_class.from_crawler(crawler, key)
+        while q.pop() is not None:
+            pass
+        q.close()
+        pop = time.perf_counter() - start
+    finally:
+        shutil.rmtree(tmpdir)
+    return push, pop, size
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", "--number", type=int, default=50000)
+    parser.add_argument("--compression", choices=["zlib", "zstd"])
+    args = parser.parse_args()
+    crawler = get_crawler(
+        BenchSpider, {"SCHEDULER_DISK_QUEUE_COMPRESSION": args.compression}
+    )
+    crawler.spider = crawler._create_spider()
+    requests = list(_requests(crawler.spider, args.number))
+    queues = [
+        ("PickleFifoDiskQueue", PickleFifoDiskQueue),
+        ("MarshalFifoDiskQueue", MarshalFifoDiskQueue),
+        ("CompactFifoDiskQueue", CompactFifoDiskQueue),
+        ("PickleLifoDiskQueue", PickleLifoDiskQueue),
+        ("MarshalLifoDiskQueue", MarshalLifoDiskQueue),
+        ("CompactLifoDiskQueue", CompactLifoDiskQueue),
+    ]
+    print(f"{'':<24}{'push':>12}{'pop':>12}{'bytes/request':>16}")
+    for name, queue_class in queues:
+        push, pop, size = _bench(queue_class, crawler, requests)
+        n = args.number
+        print(
+            f"{name:<24}"
+            f"{push / n * 1e6:9.2f} us"
+            f"{pop / n * 1e6:9.2f} us"
+            f"{size / n:16.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Benchmark of DownloaderAwarePriorityQueue with many download slots
+
+usage:
+
+    python extras/downloader-aware-bench.py [-n NUMBER] [-d DOMAINS]
+
+Requests spread over many domains are pushed, then popped while a simulated
+downloader keeps up to CONCURRENT_REQUESTS of them active, sending the same
+signals as the real downloader.
+"""
+
+import argparse
+import random
+import time
+from collections import deque
+
+from scrapy import Request, Spider, signals
+from scrapy.core.downloader import Downloader, Slot
+from scrapy.pqueues import DownloaderAwarePriorityQueue
+from scrapy.squeues import FifoMemoryQueue
+from scrapy.utils.test import get_crawler
+
+
+class FakeEngine:
+    def __init__(self, downloader):
+        self.downloader = downloader
+
+
+class FakeDownloader:
+    def __init__(self, crawler):
+        self.signals = crawler.signals
+        self.spider = crawler.spider
+        self.slots = {}
+
+    def get_slot_key(self, request):
+        if Downloader.DOWNLOAD_SLOT in request.meta:
+            return request.meta[Downloader.DOWNLOAD_SLOT]
+        return request.url.split("/")[2]
+
+    def reach(self, request):
+        key = self.get_slot_key(request)
+        request.meta[Downloader.DOWNLOAD_SLOT] = key
+        if key not in self.slots:
+            self.slots[key] = Slot(8, 0, False)
+        self.slots[key].active.add(request)
+        self.signals.send_catch_log(
+            signals.request_reached_downloader, request=request, spider=self.spider
+        )
+
+    def leave(self, request):
+        key = self.get_slot_key(request)
+        self.signals.send_catch_log(
+            signals.request_left_downloader, request=request, spider=self.spider
+        )
+        self.slots[key].active.remove(request)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", "--number", type=int, default=100000)
+    parser.add_argument("-d", "--domains", type=int, default=50000)
+    parser.add_argument("-c", "--concurrency", type=int, default=1000)
+    args = parser.parse_args()
+    crawler = get_crawler(Spider)
+    crawler.spider = crawler._create_spider("bench")
+    downloader = FakeDownloader(crawler)
+    crawler.engine = FakeEngine(downloader)
+    queue = DownloaderAwarePriorityQueue.from_crawler(crawler, FifoMemoryQueue, "")
+    rng = random.Random(0)
+    requests = [
+        Request(f"https://d{rng.randrange(args.domains)}.example/{i}")
+        for i in range(args.number)
+    ]
+    start = time.perf_counter()
+    for request in requests:
+        queue.push(request)
+    push = time.perf_counter() - start
+    active = deque()
+    start = time.perf_counter()
+    while True:
+        request = queue.pop()
+        if request is None:
+            break
+        downloader.reach(request)
+        active.append(request)
+        if len(active) >= args.concurrency:
+            downloader.leave(active.popleft())
+    pop = time.perf_counter() - start
+    while active:
+        downloader.leave(active.popleft())
+    queue.close()
+    print(
+        f"{args.number} requests, {args.domains} domains: "
+        f"push {push / args.number * 1e6:.2f} us/request, "
+        f"pop {pop / args.number * 1e6:.2f} us/request"
+    )
+
+
+if __name__ == "__main__":
+    main()
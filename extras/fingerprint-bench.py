@@ -0,0 +1,69 @@
+"""
+Micro-benchmark of the request fingerprinters
+
+usage:
+
+    python extras/fingerprint-bench.py [-n NUMBER]
+
+URL canonicalization usually dominates fingerprinting time, so each
+fingerprinter is measured twice: with the URL canonicalization cache disabled,
+and with a pre-warmed cache, which isolates the cost of serializing and
+hashing.
+"""
+
+import argparse
+import time
+
+from scrapy import Request
+from scrapy.utils.request import FastRequestFingerprinter, RequestFingerprinter
+from scrapy.utils.url import canonicalize_url_cache
+
+
+def _requests(n):
+    for i in range(n):
+        yield Request(f"https://example.com/category/{i % 97}/item?id={i}&sort=asc")
+        yield Request(
+            f"https://example.com/api/search?page={i}",
+            method="POST",
+            body=b'{"query": "%d"}' % i,
+        )
+
+
+def _bench(fingerprinter, requests):
+    start = time.perf_counter()
+    for request in requests:
+        fingerprinter.fingerprint(request)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", "--number", type=int, default=50000)
+    args = parser.parse_args()
+    fingerprinters = [
+        ("RequestFingerprinter", RequestFingerprinter),
+        ("FastRequestFingerprinter", FastRequestFingerprinter),
+        ("FastRequestFingerprinter(md5)", lambda: FastRequestFingerprinter("md5")),
+    ]
+    print(f"{'':<36}{'end to end':>18}{'hashing only':>18}")
+    baseline = None
+    for name, factory in fingerprinters:
+        # fresh requests and fingerprinters, so that no fingerprint is cached
+        canonicalize_url_cache.limit = 0
+        total = _bench(factory(), list(_requests(args.number)))
+        canonicalize_url_cache.limit = args.number * 2
+        _bench(factory(), list(_requests(args.number)))
+        hashing = _bench(factory(), list(_requests(args.number)))
+        canonicalize_url_cache.clear()
+        if baseline is None:
+            baseline = (total, hashing)
+        n = args.number * 2
+        print(
+            f"{name:<36}"
+            f"{total / n * 1e6:9.2f} us ({baseline[0] / total:4.2f}x)"
+            f"{hashing / n * 1e6:9.2f} us ({baseline[1] / hashing:4.2f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Benchmark of the scheduler priority queues with many distinct priorities
+
+usage:
+
+    python extras/priority-queue-bench.py [-n NUMBER] [-p PRIORITIES]
+        [--disk] [--queue QUEUE ...]
+
+Requests with random priorities are pushed and popped in interleaved rounds,
+as the scheduler does during a crawl, using memory downstream queues, or disk
+ones with --disk.
+"""
+
+import argparse
+import random
+import shutil
+import tempfile
+import time
+
+from scrapy import Request, Spider
+from scrapy.utils.misc import build_from_crawler, load_object
+from scrapy.utils.test import get_crawler
+
+
+def _bench(pqclass, crawler, downstream_queue_cls, key, requests):
+    q = build_from_crawler(
+        pqclass, crawler, downstream_queue_cls=downstream_queue_cls, key=key
+    )
+    start = time.perf_counter()
+    for i in range(0, len(requests), 100):
+        for request in requests[i : i + 100]:
+            q.push(request)
+        for _ in range(50):
+            q.pop()
+        len(q)
+    while q.pop() is not None:
+        pass
+    elapsed = time.perf_counter() - start
+    q.close()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", "--number", type=int, default=100000)
+    parser.add_argument("-p", "--priorities", type=int, default=10000)
+    parser.add_argument("--disk", action="store_true")
+    parser.add_argument(
+        "--queue",
+        nargs="+",
+        default=["scrapy.pqueues.ScrapyPriorityQueue"],
+    )
+    args = parser.parse_args()
+    crawler = get_crawler(Spider)
+    crawler.spider = crawler._create_spider("bench")
+    downstream_queue_cls = load_object(
+        "scrapy.squeues.PickleFifoDiskQueue"
+        if args.disk
+        else "scrapy.squeues.FifoMemoryQueue"
+    )
+    rng = random.Random(0)
+    requests = [
+        Request(f"https://example.com/{i}", priority=rng.randrange(args.priorities))
+        for i in range(args.number)
+    ]
+    for path in args.queue:
+        tmpdir = tempfile.mkdtemp()
+        try:
+            key = tmpdir if args.disk else ""
+            elapsed = _bench(
+                load_object(path), crawler, downstream_queue_cls, key, requests
+            )
+        finally:
+            shutil.rmtree(tmpdir)
+        print(f"{path:<45}{elapsed / args.number * 1e6:9.2f} us/request")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Benchmark of scheduling download delays with reactor.callLater and TimerWheel
+
+usage:
+
+    python extras/timer-wheel-bench.py [-n NUMBER] [-r RESOLUTION]
+
+NUMBER calls with random delays of up to 10 seconds are scheduled and about a
+third of them cancelled, as the downloader does for many delayed slots, then
+the reactor runs until all remaining calls are done, reporting the CPU time
+used.
+"""
+
+import argparse
+import random
+import time
+
+from twisted.internet import reactor
+
+from scrapy.utils.reactor import TimerWheel
+
+
+def _bench(call_later, delays):
+    done = []
+    start = time.perf_counter()
+    calls = [call_later(delay, done.append, None) for delay in delays]
+    for call in calls[::3]:
+        call.cancel()
+    schedule = time.perf_counter() - start
+    return calls, done, schedule
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", "--number", type=int, default=100000)
+    parser.add_argument("-r", "--resolution", type=float, default=0.01)
+    args = parser.parse_args()
+    rng = random.Random(0)
+    delays = [rng.uniform(0, 2) for _ in range(args.number)]
+    wheel = TimerWheel(args.resolution)
+    results = {}
+
+    def run(name, call_later):
+        start = time.process_time()
+        calls, done, schedule = _bench(call_later, delays)
+        expected = len(calls) - len(calls[::3])
+
+        def check():
+            if len(done) < expected:
+                reactor.callLater(0.1, check)
+                return
+            results[name] = (schedule, time.process_time() - start)
+            if len(results) == 1:
+                run("TimerWheel", wheel.call_later)
+            else:
+                reactor.stop()
+
+        check()
+
+    reactor.callWhenRunning(run, "reactor.callLater", reactor.callLater)
+    reactor.run()
+    for name, (schedule, total) in results.items():
+        print(
+            f"{name:<20}schedule+cancel {schedule / args.number * 1e6:6.2f} us/call"
+            f", CPU {total:.2f} s"
+        )
+
+
+if __name__ == "__main__":
+    main()
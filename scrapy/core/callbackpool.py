@@ -0,0 +1,258 @@
+"""
+Run spider callbacks in a pool of worker processes
+
+See documentation in docs/topics/settings.rst (CALLBACK_PROCESS_POOL_ENABLED)
+"""
+
+from __future__ import annotations
+
+import inspect
+import logging
+import multiprocessing
+import os
+import pickle
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import _RemoteTraceback
+from typing import TYPE_CHECKING, Any, TypeVar
+
+from twisted.internet.defer import Deferred
+from twisted.python.failure import Failure
+
+from scrapy.http import Request
+from scrapy.http.response import SpooledBody
+from scrapy.utils.misc import arg_to_iter
+from scrapy.utils.request import request_from_dict
+
+if TYPE_CHECKING:
+    from concurrent.futures import Future
+
+    # typing.Self requires Python 3.11
+    from typing_extensions import Self
+
+    from scrapy import Spider
+    from scrapy.crawler import Crawler
+    from scrapy.http import Response
+    from scrapy.statscollectors import StatsCollector
+
+
+logger = logging.getLogger(__name__)
+
+_T = TypeVar("_T")
+
+# The copy of the spider used by the callbacks of a worker process.
+_spider: Spider | None = None
+
+
+# Spider attributes that are not sent to workers.
+_LOCAL_ATTRIBUTES = frozenset(("crawler",))
+
+
+def _spider_state(spider: Spider) -> tuple[dict[str, Any], list[str]]:
+    """Return the attributes of *spider* that can be sent to a worker, and
+    the names of the attributes that cannot be pickled.
+
+    The crawler is never sent, and not reported as missing."""
+    state = {}
+    unpicklable = []
+    for key, value in vars(spider).items():
+        if key in _LOCAL_ATTRIBUTES:
+            continue
+        try:
+            pickle.dumps(value)
+        except Exception:
+            unpicklable.append(key)
+            continue
+        state[key] = value
+    return state, unpicklable
+
+
+def _is_spider_method(func: Any, spider: Spider) -> bool:
+    return inspect.ismethod(func) and func.__self__ is spider
+
+
+def _init_worker(spidercls: type[Spider], state: dict[str, Any]) -> None:
+    global _spider  # noqa: PLW0603
+    _spider = spidercls.__new__(spidercls)
+    _spider.__dict__.update(state)
+
+
+def _run_callback(
+    response_cls: type[Response],
+    response_kwargs: dict[str, Any],
+    request_dict: dict[str, Any],
+) -> list[tuple[bool, Any]]:
+    """Run the callback of a response in a worker process, and return its
+    output as ``(is_request, value)`` tuples, with requests as dicts."""
+    assert _spider is not None
+    request = request_from_dict(request_dict, spider=_spider)
+    spooled_data = response_kwargs.pop("spooled_body", None)
+    if spooled_data is not None:
+        spool = tempfile.TemporaryFile()
+        spool.write(spooled_data)
+        response_kwargs["spooled_body"] = SpooledBody(spool)
+    response = response_cls(request=request, **response_kwargs)
+    try:
+        callback = request.callback or _spider._parse
+        output = callback(response, **request.cb_kwargs)
+        if inspect.iscoroutine(output) or inspect.isasyncgen(output):
+            if inspect.iscoroutine(output):
+                output.close()
+            raise TypeError(
+                f"{callback.__qualname__} is asynchronous, it cannot run in a "
+                f"worker process"
+            )
+        return [
+            (True, o.to_dict(spider=_spider)) if isinstance(o, Request) else (False, o)
+            for o in arg_to_iter(output)
+        ]
+    finally:
+        if response.spooled_body is not None:
+            response.spooled_body.close()
+
+
+def _deferred_from_future(future: Future[_T]) -> Deferred[_T]:
+    from twisted.internet import reactor
+
+    d: Deferred[_T] = Deferred()
+
+    def done(future: Future[_T]) -> None:
+        exc = future.exception()
+        if exc is None:
+            reactor.callFromThread(d.callback, future.result())
+        else:
+            reactor.callFromThread(d.errback, _failure_from_worker(exc))
+
+    future.add_done_callback(done)
+    return d
+
+
+def _failure_from_worker(exc: BaseException) -> Failure:
+    """Return a failure for an exception raised by a worker process.
+
+    The traceback from the worker is the ``__cause__`` of *exc*, so it is
+    logged with it. :meth:`Failure.getTraceback` does not show it, so it is
+    also kept as the ``remote_traceback`` attribute of the failure, ``None``
+    for exceptions raised by the pool itself.
+    """
+    failure = Failure(exc)
+    cause = exc.__cause__
+    failure.remote_traceback = (  # type: ignore[attr-defined]
+        cause.tb if isinstance(cause, _RemoteTraceback) else None
+    )
+    return failure
+
+
+class CallbackProcessPool:
+    """Run spider callbacks in worker processes, to use more than one CPU core
+    for parsing.
+
+    Each worker process gets a copy of the spider, made when the first
+    callback is sent to the pool. Responses are sent to the workers, and the
+    requests and items returned by callbacks are sent back.
+
+    Workers are started with the ``spawn`` method, as forking a process with
+    a running reactor and thread pools can copy them in a broken state.
+    """
+
+    def __init__(self, crawler: Crawler):
+        settings = crawler.settings
+        self.enabled: bool = settings.getbool("CALLBACK_PROCESS_POOL_ENABLED")
+        self.size: int = settings.getint("CALLBACK_PROCESS_POOL_SIZE") or (
+            os.cpu_count() or 1
+        )
+        self.stats: StatsCollector | None = crawler.stats
+        self._executor: ProcessPoolExecutor | None = None
+        # the spider state sent to the workers, None if it cannot be sent
+        self._spider_states: dict[Spider, dict[str, Any] | None] = {}
+
+    @classmethod
+    def from_crawler(cls, crawler: Crawler) -> Self:
+        return cls(crawler)
+
+    def handles(self, request: Request, spider: Spider) -> bool:
+        """Return whether the callback of *request* should run in the pool.
+
+        Asynchronous callbacks, callbacks and errbacks that are not methods of
+        *spider*, and callbacks of spiders with attributes that cannot be sent
+        to the workers run in the main process.
+        """
+        callback = request.callback or spider.parse
+        if not (self.enabled or getattr(callback, "run_in_process", False)):
+            return False
+        if inspect.iscoroutinefunction(callback) or inspect.isasyncgenfunction(
+            callback
+        ):
+            return False
+        if not _is_spider_method(callback, spider):
+            return False
+        if request.errback is not None and not _is_spider_method(
+            request.errback, spider
+        ):
+            return False
+        return self._get_spider_state(spider) is not None
+
+    def _get_spider_state(self, spider: Spider) -> dict[str, Any] | None:
+        if spider not in self._spider_states:
+            state, unpicklable = _spider_state(spider)
+            if unpicklable:
+                logger.warning(
+                    "Running the callbacks of %(spider)s in the main process, "
+                    "as these spider attributes cannot be sent to worker "
+                    "processes: %(attributes)s",
+                    {"spider": spider, "attributes": ", ".join(unpicklable)},
+                    extra={"spider": spider},
+                )
+                self._spider_states[spider] = None
+            else:
+                self._spider_states[spider] = state
+        return self._spider_states[spider]
+
+    def _get_executor(self, spider: Spider) -> ProcessPoolExecutor:
+        if self._executor is None:
+            state = self._get_spider_state(spider)
+            assert state is not None  # checked by handles()
+            self._executor = ProcessPoolExecutor(
+                self.size,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(type(spider), state),
+            )
+        return self._executor
+
+    def call_spider(self, response: Response, spider: Spider) -> Deferred[list[Any]]:
+        """Run the callback of *response* in a worker process, and return a
+        deferred with its output.
+
+        Only call this for requests that :meth:`handles`.
+        """
+        assert response.request is not None
+        request_dict = response.request.to_dict(spider=spider)
+        response_kwargs = {
+            attr: getattr(response, attr)
+            for attr in response.attributes
+            if attr not in ("request", "certificate")
+        }
+        if response.spooled_body is not None:
+            # open files cannot be pickled, the worker spools the body again
+            response_kwargs["spooled_body"] = response.spooled_body.getvalue()
+        future = self._get_executor(spider).submit(
+            _run_callback, type(response), response_kwargs, request_dict
+        )
+        if self.stats is not None:
+            self.stats.inc_value("scraper/process_pool/callbacks", spider=spider)
+        d = _deferred_from_future(future)
+        d.addCallback(self._load_output, spider)
+        return d
+
+    @staticmethod
+    def _load_output(output: list[tuple[bool, Any]], spider: Spider) -> list[Any]:
+        return [
+            request_from_dict(value, spider=spider) if is_request else value
+            for is_request, value in output
+        ]
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
@@ -4,7 +4,9 @@ import random
 import warnings
 from collections import deque
 from datetime import datetime
-from time import time
+from heapq import heapify, heappop, heappush
+from itertools import count
+from time import perf_counter, time
 from typing import TYPE_CHECKING, Any, TypeVar, cast
 
 from twisted.internet import task
@@ -18,16 +20,52 @@ from scrapy.resolver import dnscache
 from scrapy.signalmanager import SignalManager
 from scrapy.utils.defer import mustbe_deferred
 from scrapy.utils.httpobj import urlparse_cached
+from scrapy.utils.misc import build_from_crawler, load_object
+from scrapy.utils.reactor import TimerWheel
 
 if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+    from twisted.internet.base import DelayedCall
+
+    from scrapy.core.downloader.ratelimit import RateLimiter
     from scrapy.crawler import Crawler
     from scrapy.http import Response
     from scrapy.settings import BaseSettings
+    from scrapy.statscollectors import StatsCollector
+    from scrapy.utils.reactor import TimerWheelCall
 
 
 _T = TypeVar("_T")
 
 
+class _PrioritySlotQueue:
+    """Queue of (request, deferred) pairs with the deque methods used on
+    :attr:`Slot.queue`, where requests with a higher priority go first and
+    requests with the same priority keep their order."""
+
+    def __init__(self) -> None:
+        self._heap: list[tuple[int, int, tuple[Request, Deferred[Response]]]] = []
+        self._count = count()
+
+    def append(self, item: tuple[Request, Deferred[Response]]) -> None:
+        heappush(self._heap, (-item[0].priority, next(self._count), item))
+
+    def popleft(self) -> tuple[Request, Deferred[Response]]:
+        return heappop(self._heap)[2]
+
+    def __getitem__(self, index: int) -> tuple[Request, Deferred[Response]]:
+        if index != 0:
+            raise IndexError("only the first item of the queue can be read")
+        return self._heap[0][2]
+
+    def __iter__(self) -> Iterator[tuple[Request, Deferred[Response]]]:
+        return (entry[2] for entry in sorted(self._heap))
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+
 class Slot:
     """Downloader slot"""
 
@@ -38,17 +76,21 @@ class Slot:
         randomize_delay: bool,
         *,
         throttle: bool | None = None,
+        priority_queue: bool = False,
     ):
         self.concurrency: int = concurrency
         self.delay: float = delay
         self.randomize_delay: bool = randomize_delay
         self.throttle = throttle
+        self.priority_queue: bool = priority_queue
 
         self.active: set[Request] = set()
-        self.queue: deque[tuple[Request, Deferred[Response]]] = deque()
+        self.queue: deque[tuple[Request, Deferred[Response]]] | _PrioritySlotQueue = (
+            _PrioritySlotQueue() if priority_queue else deque()
+        )
         self.transferring: set[Request] = set()
         self.lastseen: float = 0
-        self.latercall = None
+        self.latercall: DelayedCall | TimerWheelCall | None = None
 
     def free_transfer_slots(self) -> int:
         return self.concurrency - len(self.transferring)
@@ -102,7 +144,15 @@ class Downloader:
         # 在初始化过程中，主要是初始化了下载处理器、下载器中间件管理器以及从配置文件中拿到抓取请求控制的相关参数。
         self.settings: BaseSettings = crawler.settings  # 同样的 拿到settings对象
         self.signals: SignalManager = crawler.signals
+        assert crawler.stats
+        self.stats: StatsCollector = crawler.stats
         self.slots: dict[str, Slot] = {}
+        # keys of the slots without active requests, with the time from which
+        # they count as idle
+        self._idle_slots: dict[str, float] = {}
+        # (since, key) entries of _idle_slots, soonest first; entries that no
+        # longer match _idle_slots are skipped when popped
+        self._idle_heap: list[tuple[float, str]] = []
         self.active: set[Request] = set()
         self.handlers: DownloadHandlers = DownloadHandlers(crawler)  # 初始化DownloadHandlers下载处理器
         self.total_concurrency: int = self.settings.getint("CONCURRENT_REQUESTS")  # 从配置中获取设置的并发数
@@ -111,6 +161,9 @@ class Downloader:
         )  # 同一域名并发数
         self.ip_concurrency: int = self.settings.getint("CONCURRENT_REQUESTS_PER_IP")  # 同一IP并发数
         self.randomize_delay: bool = self.settings.getbool("RANDOMIZE_DOWNLOAD_DELAY")  # 随机延迟下载时间
+        self.slot_priority_queue: bool = self.settings.getbool(
+            "DOWNLOAD_SLOT_PRIORITY_QUEUE"
+        )
         self.middleware: DownloaderMiddlewareManager = (
             DownloaderMiddlewareManager.from_crawler(crawler)
         )  # 初始化下载器中间件
@@ -119,6 +172,24 @@ class Downloader:
         self.per_slot_settings: dict[str, dict[str, Any]] = self.settings.getdict(
             "DOWNLOAD_SLOTS", {}
         )
+        resolution = self.settings.getfloat("DOWNLOAD_DELAY_TIMER_RESOLUTION")
+        self._timer_wheel: TimerWheel | None = (
+            TimerWheel(resolution) if resolution > 0 else None
+        )
+        # bytes expected or received by the downloads in progress
+        self.max_active_size: int = self.settings.getint("DOWNLOADER_MAX_ACTIVE_SIZE")
+        self.active_size: int = 0
+        self._active_size_max: int = 0
+        self._active_sizes: dict[Request, tuple[int, int]] = {}
+        if self.max_active_size:
+            self.signals.connect(self._headers_received, signals.headers_received)
+            self.signals.connect(self._bytes_received, signals.bytes_received)
+        rate_limiter: RateLimiter = build_from_crawler(
+            load_object(self.settings["DOWNLOAD_RATE_LIMITER"]), crawler
+        )
+        self._rate_limiter: RateLimiter | None = (
+            rate_limiter if rate_limiter.enabled else None
+        )
 
     def fetch(self, request: Request, spider: Spider) -> Deferred[Response | Request]:
         def _deactivate(response: _T) -> _T:
@@ -136,7 +207,34 @@ class Downloader:
         return dfd.addBoth(_deactivate)
 
     def needs_backout(self) -> bool:
-        return len(self.active) >= self.total_concurrency
+        return len(self.active) >= self.total_concurrency or bool(
+            self.max_active_size and self.active_size > self.max_active_size
+        )
+
+    def _headers_received(
+        self, headers: Any, body_length: Any, request: Request, spider: Spider
+    ) -> None:
+        # body_length is twisted's UNKNOWN_LENGTH without a Content-Length
+        expected = body_length if isinstance(body_length, int) else 0
+        received = self._active_sizes.get(request, (0, 0))[1]
+        self._set_active_size(request, max(expected, 0), received)
+
+    def _bytes_received(self, data: bytes, request: Request, spider: Spider) -> None:
+        expected, received = self._active_sizes.get(request, (0, 0))
+        self._set_active_size(request, expected, received + len(data))
+
+    def _set_active_size(self, request: Request, expected: int, received: int) -> None:
+        old = max(self._active_sizes.get(request, (0, 0)))
+        self._active_sizes[request] = (expected, received)
+        self.active_size += max(expected, received) - old
+        if self.active_size > self._active_size_max:
+            self._active_size_max = self.active_size
+            self.stats.max_value("downloader/active_size_max", self.active_size)
+
+    def _release_active_size(self, request: Request) -> None:
+        sizes = self._active_sizes.pop(request, None)
+        if sizes is not None:
+            self.active_size -= max(sizes)
 
     def _get_slot(self, request: Request, spider: Spider) -> tuple[str, Slot]:
         key = self.get_slot_key(request)
@@ -152,8 +250,19 @@ class Downloader:
             )
             randomize_delay = slot_settings.get("randomize_delay", self.randomize_delay)
             throttle = slot_settings.get("throttle", None)
-            new_slot = Slot(conc, delay, randomize_delay, throttle=throttle)
+            priority_queue = slot_settings.get(
+                "priority_queue", self.slot_priority_queue
+            )
+            new_slot = Slot(
+                conc,
+                delay,
+                randomize_delay,
+                throttle=throttle,
+                priority_queue=priority_queue,
+            )
             self.slots[key] = new_slot
+            self._mark_idle(key, time())
+            self.stats.max_value("downloader/slots_max", len(self.slots))
 
         return key, self.slots[key]
 
@@ -182,9 +291,12 @@ class Downloader:
 
         def _deactivate(response: Response) -> Response:
             slot.active.remove(request)
+            if not slot.active and self.slots.get(key) is slot:
+                self._mark_idle(key, max(time(), slot.lastseen + slot.delay))
             return response
 
         slot.active.add(request)
+        self._idle_slots.pop(key, None)
         self.signals.send_catch_log(
             signal=signals.request_reached_downloader, request=request, spider=spider
         )
@@ -194,8 +306,6 @@ class Downloader:
         return deferred
 
     def _process_queue(self, spider: Spider, slot: Slot) -> None:
-        from twisted.internet import reactor
-
         if slot.latercall and slot.latercall.active():
             return
 
@@ -205,13 +315,18 @@ class Downloader:
         if delay:
             penalty = delay - now + slot.lastseen
             if penalty > 0:
-                slot.latercall = reactor.callLater(
-                    penalty, self._process_queue, spider, slot
-                )
+                self._process_queue_later(penalty, spider, slot)
                 return
 
         # Process enqueued requests if there are free slots to transfer for this slot
         while slot.queue and slot.free_transfer_slots() > 0:
+            if self._rate_limiter is not None:
+                request = slot.queue[0][0]
+                key = request.meta[self.DOWNLOAD_SLOT]
+                wait = self._rate_limiter.acquire(request, key, slot)
+                if wait > 0:
+                    self._process_queue_later(wait, spider, slot)
+                    return
             slot.lastseen = now
             request, deferred = slot.queue.popleft()
             dfd = self._download(slot, request, spider)
@@ -221,6 +336,16 @@ class Downloader:
                 self._process_queue(spider, slot)
                 break
 
+    def _process_queue_later(self, delay: float, spider: Spider, slot: Slot) -> None:
+        from twisted.internet import reactor
+
+        if self._timer_wheel is not None:
+            slot.latercall = self._timer_wheel.call_later(
+                delay, self._process_queue, spider, slot
+            )
+        else:
+            slot.latercall = reactor.callLater(delay, self._process_queue, spider, slot)
+
     def _download(
         self, slot: Slot, request: Request, spider: Spider
     ) -> Deferred[Response]:
@@ -252,6 +377,7 @@ class Downloader:
 
         def finish_transferring(_: _T) -> _T:
             slot.transferring.remove(request)
+            self._release_active_size(request)
             self._process_queue(spider, slot)
             self.signals.send_catch_log(
                 signal=signals.request_left_downloader, request=request, spider=spider
@@ -264,9 +390,37 @@ class Downloader:
         self._slot_gc_loop.stop()
         for slot in self.slots.values():
             slot.close()
+        if self._timer_wheel is not None:
+            self._timer_wheel.stop()
+
+    def _mark_idle(self, key: str, since: float) -> None:
+        self._idle_slots[key] = since
+        heappush(self._idle_heap, (since, key))
+        if len(self._idle_heap) > 2 * len(self._idle_slots) + 1024:
+            # drop the entries of slots that became active again
+            self._idle_heap = [(since, key) for key, since in self._idle_slots.items()]
+            heapify(self._idle_heap)
 
     def _slot_gc(self, age: float = 60) -> None:
+        start = perf_counter()
         mintime = time() - age
-        for key, slot in list(self.slots.items()):
-            if not slot.active and slot.lastseen + slot.delay < mintime:
+        evicted = 0
+        # only the slots idle for long enough are visited
+        while self._idle_heap and self._idle_heap[0][0] < mintime:
+            since, key = heappop(self._idle_heap)
+            if self._idle_slots.get(key) != since:
+                continue
+            del self._idle_slots[key]
+            slot = self.slots.get(key)
+            if slot is None or slot.active:
+                continue
+            if slot.lastseen + slot.delay < mintime:
                 self.slots.pop(key).close()
+                evicted += 1
+            else:
+                # its delay was raised while idle
+                self._mark_idle(key, slot.lastseen + slot.delay)
+        if evicted:
+            self.stats.inc_value("downloader/slot_gc/evicted", evicted)
+        self.stats.set_value("downloader/slots", len(self.slots))
+        self.stats.max_value("downloader/slot_gc/pause_max", perf_counter() - start)
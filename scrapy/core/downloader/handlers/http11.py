@@ -5,16 +5,19 @@ from __future__ import annotations
 import ipaddress
 import logging
 import re
+import tempfile
 from contextlib import suppress
 from io import BytesIO
 from time import time
-from typing import TYPE_CHECKING, Any, TypedDict, TypeVar
+from typing import IO, TYPE_CHECKING, Any, TypedDict, TypeVar
 from urllib.parse import urldefrag, urlunparse
+from weakref import WeakKeyDictionary
 
 from twisted.internet import ssl
 from twisted.internet.defer import CancelledError, Deferred, succeed
 from twisted.internet.endpoints import TCP4ClientEndpoint
 from twisted.internet.error import TimeoutError
+from twisted.internet.interfaces import ISSLTransport
 from twisted.internet.protocol import Factory, Protocol, connectionDone
 from twisted.python.failure import Failure
 from twisted.web.client import URI, Agent, HTTPConnectionPool
@@ -30,18 +33,21 @@ from scrapy.core.downloader.contextfactory import load_context_factory_from_sett
 from scrapy.core.downloader.webclient import _parse
 from scrapy.exceptions import StopDownload
 from scrapy.http import Headers, Response
+from scrapy.http.response import SpooledBody
 from scrapy.responsetypes import responsetypes
 from scrapy.utils.python import to_bytes, to_unicode
 
 if TYPE_CHECKING:
     from twisted.internet.base import ReactorBase
     from twisted.internet.interfaces import IConsumer
+    from twisted.web._newclient import HTTP11ClientProtocol
 
     # typing.NotRequired and typing.Self require Python 3.11
     from typing_extensions import NotRequired, Self
 
     from scrapy.crawler import Crawler
     from scrapy.settings import BaseSettings
+    from scrapy.statscollectors import StatsCollector
 
 
 logger = logging.getLogger(__name__)
@@ -52,12 +58,77 @@ _T = TypeVar("_T")
 class _ResultT(TypedDict):
     txresponse: TxResponse
     body: bytes
+    spooled_body: NotRequired[SpooledBody | None]
     flags: list[str] | None
     certificate: ssl.Certificate | None
     ip_address: ipaddress.IPv4Address | ipaddress.IPv6Address | None
     failure: NotRequired[Failure | None]
 
 
+class ScrapyHTTPConnectionPool(HTTPConnectionPool):
+    """A connection pool that records connection reuse in the stats, and
+    that can limit the number of idle connections it keeps in total, on top
+    of the per-host limit of :class:`~twisted.web.client.HTTPConnectionPool`.
+    """
+
+    def __init__(
+        self,
+        reactor: ReactorBase,
+        persistent: bool = True,
+        stats: StatsCollector | None = None,
+        maxsize: int = 0,
+    ):
+        super().__init__(reactor, persistent)
+        self.stats: StatsCollector | None = stats
+        self.maxsize: int = maxsize
+        self._opening: int = 0
+        self._keys: WeakKeyDictionary[HTTP11ClientProtocol, Any] = WeakKeyDictionary()
+
+    def _inc_stat(self, key: str) -> None:
+        if self.stats is not None:
+            self.stats.inc_value(f"downloader/pool/{key}")
+
+    def getConnection(self, key: Any, endpoint: Any) -> Deferred[Any]:
+        opening = self._opening
+        d = super().getConnection(key, endpoint)
+        if self._opening == opening:
+            self._inc_stat("connections_reused")
+        return d
+
+    def _newConnection(self, key: Any, endpoint: Any) -> Deferred[Any]:
+        self._opening += 1
+        d = super()._newConnection(key, endpoint)
+        d.addCallback(self._connection_opened)
+        return d
+
+    def _connection_opened(self, protocol: HTTP11ClientProtocol) -> Any:
+        self._inc_stat("connections_opened")
+        if ISSLTransport.providedBy(protocol.transport):
+            self._inc_stat("tls_handshakes")
+        return protocol
+
+    def _removeConnection(self, key: Any, connection: HTTP11ClientProtocol) -> None:
+        # only called when a connection times out while idle
+        self._inc_stat("evicted/idle_timeout")
+        super()._removeConnection(key, connection)
+
+    def _putConnection(self, key: Any, connection: HTTP11ClientProtocol) -> None:
+        if (
+            connection.state == "QUIESCENT"
+            and len(self._connections.get(key, ())) == self.maxPersistentPerHost
+        ):
+            self._inc_stat("evicted/host_maxsize")
+        super()._putConnection(key, connection)
+        self._keys[connection] = key
+        # _timeouts has an entry per idle connection, oldest first
+        while self.maxsize and len(self._timeouts) > self.maxsize:
+            dropped = next(iter(self._timeouts))
+            self._connections[self._keys.pop(dropped)].remove(dropped)
+            dropped.transport.loseConnection()
+            self._timeouts.pop(dropped).cancel()
+            self._inc_stat("evicted/maxsize")
+
+
 class HTTP11DownloadHandler:
     lazy = False
 
@@ -66,10 +137,19 @@ class HTTP11DownloadHandler:
 
         from twisted.internet import reactor
 
-        self._pool: HTTPConnectionPool = HTTPConnectionPool(reactor, persistent=True)
+        self._pool: HTTPConnectionPool = ScrapyHTTPConnectionPool(
+            reactor,
+            persistent=True,
+            stats=crawler.stats,
+            maxsize=settings.getint("DOWNLOAD_POOL_MAXSIZE"),
+        )
         self._pool.maxPersistentPerHost = settings.getint(
             "CONCURRENT_REQUESTS_PER_DOMAIN"
         )
+        # Twisted annotates it as int, but it is only passed to callLater()
+        self._pool.cachedConnectionTimeout = settings.getfloat(  # type: ignore[assignment]
+            "DOWNLOAD_POOL_IDLE_TIMEOUT"
+        )
         self._pool._factory.noisy = False
 
         self._contextFactory: IPolicyForHTTPS = load_context_factory_from_settings(
@@ -499,6 +579,7 @@ class ScrapyAgent:
 
         maxsize = request.meta.get("download_maxsize", self._maxsize)
         warnsize = request.meta.get("download_warnsize", self._warnsize)
+        spool_size = request.meta.get("download_spool_size", 0)
         expected_size = txresponse.length if txresponse.length != UNKNOWN_LENGTH else -1
         fail_on_dataloss = request.meta.get(
             "download_fail_on_dataloss", self._fail_on_dataloss
@@ -541,6 +622,8 @@ class ScrapyAgent:
                 warnsize=warnsize,
                 fail_on_dataloss=fail_on_dataloss,
                 crawler=self._crawler,
+                spool_size=spool_size,
+                spool_now=bool(spool_size) and expected_size > spool_size,
             )
         )
 
@@ -553,7 +636,14 @@ class ScrapyAgent:
         self, result: _ResultT, request: Request, url: str
     ) -> Response | Failure:
         headers = self._headers_from_twisted_response(result["txresponse"])
-        respcls = responsetypes.from_args(headers=headers, url=url, body=result["body"])
+        spooled_body = result.get("spooled_body")
+        if spooled_body is not None:
+            # text responses would need the whole body in memory
+            respcls: type[Response] = Response
+        else:
+            respcls = responsetypes.from_args(
+                headers=headers, url=url, body=result["body"]
+            )
         try:
             version = result["txresponse"].version
             protocol = f"{to_unicode(version[0])}/{version[1]}.{version[2]}"
@@ -568,6 +658,7 @@ class ScrapyAgent:
             certificate=result["certificate"],
             ip_address=result["ip_address"],
             protocol=protocol,
+            spooled_body=spooled_body,
         )
         if result.get("failure"):
             assert result["failure"]
@@ -603,10 +694,15 @@ class _ResponseReader(Protocol):
         warnsize: int,
         fail_on_dataloss: bool,
         crawler: Crawler,
+        spool_size: int = 0,
+        spool_now: bool = False,
     ):
         self._finished: Deferred[_ResultT] = finished
         self._txresponse: TxResponse = txresponse
         self._request: Request = request
+        # BytesIO.getvalue() returns its buffer without copying it, unlike
+        # joining a list of chunks, so the body is only held once in memory
+        # (see extras/body-memory-bench.py)
         self._bodybuf: BytesIO = BytesIO()
         self._maxsize: int = maxsize
         self._warnsize: int = warnsize
@@ -617,14 +713,51 @@ class _ResponseReader(Protocol):
         self._certificate: ssl.Certificate | None = None
         self._ip_address: ipaddress.IPv4Address | ipaddress.IPv6Address | None = None
         self._crawler: Crawler = crawler
+        # bodies larger than spool_size are written to a temporary file
+        self._spool_size: int = spool_size
+        self._spool: IO[bytes] | None = tempfile.TemporaryFile() if spool_now else None
+
+    def _write(self, data: bytes) -> None:
+        if (
+            self._spool is None
+            and self._spool_size
+            and self._bytes_received > self._spool_size
+        ):
+            self._spool = tempfile.TemporaryFile()
+            self._spool.write(self._bodybuf.getvalue())
+            self._bodybuf = BytesIO()
+        if self._spool is not None:
+            self._spool.write(data)
+        else:
+            self._bodybuf.write(data)
+
+    def _close_spool(self) -> None:
+        if self._spool is not None:
+            self._spool.close()
+            self._spool = None
+
+    def _get_spooled_body(self) -> SpooledBody | None:
+        if self._spool is None:
+            return None
+        if not self._spool.tell():
+            self._close_spool()
+            return None
+        # the spooled body owns the file from now on
+        body = SpooledBody(self._spool)
+        self._spool = None
+        return body
 
     def _finish_response(
         self, flags: list[str] | None = None, failure: Failure | None = None
     ) -> None:
+        spooled_body = self._get_spooled_body()
+        if spooled_body is not None:
+            flags = [*(flags or []), "spooled"]
         self._finished.callback(
             {
                 "txresponse": self._txresponse,
-                "body": self._bodybuf.getvalue(),
+                "body": b"" if spooled_body is not None else self._bodybuf.getvalue(),
+                "spooled_body": spooled_body,
                 "flags": flags,
                 "certificate": self._certificate,
                 "ip_address": self._ip_address,
@@ -651,8 +784,8 @@ class _ResponseReader(Protocol):
             return
 
         assert self.transport
-        self._bodybuf.write(bodyBytes)
         self._bytes_received += len(bodyBytes)
+        self._write(bodyBytes)
 
         bytes_received_result = self._crawler.signals.send_catch_log(
             signal=signals.bytes_received,
@@ -683,6 +816,7 @@ class _ResponseReader(Protocol):
             )
             # Clear buffer earlier to avoid keeping data in memory for a long time.
             self._bodybuf.truncate(0)
+            self._close_spool()
             self._finished.cancel()
 
         if (
@@ -725,4 +859,5 @@ class _ResponseReader(Protocol):
                 )
                 self._fail_on_dataloss_warned = True
 
+        self._close_spool()
         self._finished.errback(reason)
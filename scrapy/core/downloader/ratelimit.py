@@ -0,0 +1,175 @@
+"""
+Token-bucket rate limiting of downloads
+
+See documentation in docs/topics/settings.rst (DOWNLOAD_RATE_LIMIT)
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+from typing import TYPE_CHECKING, Any
+from weakref import WeakKeyDictionary, WeakValueDictionary
+
+if TYPE_CHECKING:
+    # typing.Self requires Python 3.11
+    from typing_extensions import Self
+
+    from scrapy import Request
+    from scrapy.core.downloader import Slot
+    from scrapy.crawler import Crawler
+    from scrapy.statscollectors import StatsCollector
+
+
+logger = logging.getLogger(__name__)
+
+# Group buckets are shared by all the crawlers of a process.
+_group_buckets: WeakValueDictionary[str, TokenBucket] = WeakValueDictionary()
+
+
+class TokenBucket:
+    """Allow *rate* events per second on average, and bursts of up to
+    *burst* events."""
+
+    def __init__(self, rate: float, burst: int = 1):
+        if rate <= 0:
+            raise ValueError(f"Invalid rate: {rate!r}")
+        if burst < 1:
+            raise ValueError(f"Invalid burst size: {burst!r}")
+        self.rate: float = rate
+        self.burst: int = burst
+        self.tokens: float = burst
+        self.updated: float | None = None
+
+    def _refill(self, now: float) -> None:
+        if self.updated is not None:
+            elapsed = max(now - self.updated, 0.0)
+            self.tokens = min(self.tokens + elapsed * self.rate, self.burst)
+        self.updated = now
+
+    def wait_time(self, now: float) -> float:
+        """Return how many seconds from *now* a token will be available."""
+        self._refill(now)
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def consume(self, now: float) -> None:
+        self._refill(now)
+        self.tokens -= 1
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(rate={self.rate!r}, burst={self.burst!r})"
+
+
+class RateLimiter:
+    """Limit the rate at which the downloader starts downloads.
+
+    A download waits until every bucket that applies to it has a token: the
+    global bucket of the crawler (:setting:`DOWNLOAD_RATE_LIMIT`), the bucket
+    of its download slot (``rate`` in :setting:`DOWNLOAD_SLOTS`) and the bucket
+    of its rate group (:setting:`DOWNLOAD_RATE_LIMIT_GROUPS`).
+    """
+
+    def __init__(self, crawler: Crawler):
+        settings = crawler.settings
+        self.stats: StatsCollector | None = crawler.stats
+        self.global_bucket: TokenBucket | None = None
+        rate = settings.getfloat("DOWNLOAD_RATE_LIMIT")
+        if rate > 0:
+            self.global_bucket = TokenBucket(
+                rate, settings.getint("DOWNLOAD_RATE_LIMIT_BURST")
+            )
+        self.per_slot_settings: dict[str, dict[str, Any]] = settings.getdict(
+            "DOWNLOAD_SLOTS", {}
+        )
+        # validated here, so that invalid values fail on startup rather than
+        # on the first request of their slot
+        self._slot_bucket_params: dict[str, tuple[float, int]] = {
+            key: self._bucket_params(params)
+            for key, params in self.per_slot_settings.items()
+            if "rate" in params
+        }
+        self.default_group: str | None = settings.get("DOWNLOAD_RATE_LIMIT_GROUP")
+        # strong references keep the shared buckets alive while in use
+        self.group_buckets: dict[str, TokenBucket] = {
+            name: self._get_group_bucket(name, params)
+            for name, params in settings.getdict("DOWNLOAD_RATE_LIMIT_GROUPS").items()
+        }
+        self._slot_buckets: WeakKeyDictionary[Slot, TokenBucket | None] = (
+            WeakKeyDictionary()
+        )
+
+    @classmethod
+    def from_crawler(cls, crawler: Crawler) -> Self:
+        return cls(crawler)
+
+    @property
+    def enabled(self) -> bool:
+        return bool(
+            self.global_bucket or self.group_buckets or self._slot_bucket_params
+        )
+
+    @staticmethod
+    def _bucket_params(params: dict[str, Any]) -> tuple[float, int]:
+        """Return the rate and burst size of *params*, after checking that
+        they are valid :class:`TokenBucket` arguments."""
+        bucket = TokenBucket(float(params["rate"]), int(params.get("burst", 1)))
+        return bucket.rate, bucket.burst
+
+    @classmethod
+    def _get_group_bucket(cls, name: str, params: dict[str, Any]) -> TokenBucket:
+        rate, burst = cls._bucket_params(params)
+        bucket = _group_buckets.get(name)
+        if bucket is None:
+            bucket = _group_buckets[name] = TokenBucket(rate, burst)
+        elif (bucket.rate, bucket.burst) != (rate, burst):
+            logger.warning(
+                "Rate limit group %(name)s is already in use with rate=%(rate)r "
+                "and burst=%(burst)r, ignoring its new parameters",
+                {"name": name, "rate": bucket.rate, "burst": bucket.burst},
+            )
+        return bucket
+
+    def _get_slot_bucket(self, key: str, slot: Slot) -> TokenBucket | None:
+        if slot not in self._slot_buckets:
+            params = self._slot_bucket_params.get(key)
+            self._slot_buckets[slot] = TokenBucket(*params) if params else None
+        return self._slot_buckets[slot]
+
+    def get_group(self, request: Request) -> str | None:
+        """Return the rate group of *request*.
+
+        Override this method to group requests in other ways, e.g. by IP
+        address.
+        """
+        return request.meta.get("download_rate_group", self.default_group)
+
+    def get_buckets(self, request: Request, key: str, slot: Slot) -> list[TokenBucket]:
+        buckets = []
+        if self.global_bucket is not None:
+            buckets.append(self.global_bucket)
+        group = self.get_group(request)
+        if group is not None and group in self.group_buckets:
+            buckets.append(self.group_buckets[group])
+        slot_bucket = self._get_slot_bucket(key, slot)
+        if slot_bucket is not None:
+            buckets.append(slot_bucket)
+        return buckets
+
+    def acquire(
+        self, request: Request, key: str, slot: Slot, now: float | None = None
+    ) -> float:
+        """Take a token from every bucket of *request* and return 0, or return
+        how many seconds to wait before trying again, taking no token."""
+        if now is None:
+            now = time.monotonic()
+        buckets = self.get_buckets(request, key, slot)
+        wait = max((bucket.wait_time(now) for bucket in buckets), default=0.0)
+        if wait > 0:
+            if self.stats is not None:
+                self.stats.inc_value("downloader/rate_limit/delayed")
+            return wait
+        for bucket in buckets:
+            bucket.consume(now)
+        return 0.0
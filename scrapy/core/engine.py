@@ -105,6 +105,9 @@ class ExecutionEngine:
             spider_closed_callback
         )
         self.start_time: float | None = None
+        self._dispatch_batch_size: int = self.settings.getint(
+            "SCHEDULER_DISPATCH_BATCH_SIZE"
+        )
 
     def _get_scheduler_class(self, settings: BaseSettings) -> type[BaseScheduler]:
         from scrapy.core.scheduler import BaseScheduler
@@ -178,11 +181,16 @@ class ExecutionEngine:
         # 从scheduler中获取request
         # 注意：第一次获取时，是没有的，也就是会break出来
         # 从而执行下面的逻辑
-        while (
-            not self._needs_backout()
-            and self._next_request_from_scheduler() is not None
+        if self._dispatch_batch_size > 1 and hasattr(
+            self.slot.scheduler, "next_requests"
         ):
-            pass
+            self._next_requests_from_scheduler()
+        else:
+            while (
+                not self._needs_backout()
+                and self._next_request_from_scheduler() is not None
+            ):
+                pass
         # 如果start_requests有数据且不需要等待
         if self.slot.start_requests is not None and not self._needs_backout():
             try:
@@ -228,13 +236,32 @@ class ExecutionEngine:
             or self.scraper.slot.needs_backout()
         )
 
+    def _next_requests_from_scheduler(self) -> None:
+        """Dispatch requests from the scheduler in batches, as many at a time as
+        the downloader has room for, checking for backout once per batch."""
+        assert self.slot is not None  # typing
+        while not self._needs_backout():
+            n = min(
+                self._dispatch_batch_size,
+                self.downloader.total_concurrency - len(self.downloader.active),
+            )
+            requests = self.slot.scheduler.next_requests(max(n, 1))
+            for request in requests:
+                self._dispatch(request)
+            if len(requests) < n:
+                break
+
     def _next_request_from_scheduler(self) -> Deferred[None] | None:
         assert self.slot is not None  # typing
-        assert self.spider is not None  # typing
         # 从scheduler拿出下个request
         request = self.slot.scheduler.next_request()
         if request is None:
             return None
+        return self._dispatch(request)
+
+    def _dispatch(self, request: Request) -> Deferred[None]:
+        assert self.slot is not None  # typing
+        assert self.spider is not None  # typing
         # 下载
         d: Deferred[Response | Request] = self._download(request)
         # 注册成功、失败、出口回调方法
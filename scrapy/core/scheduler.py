@@ -2,6 +2,8 @@ from __future__ import annotations
 
 import json
 import logging
+import shutil
+import tempfile
 from abc import abstractmethod
 from pathlib import Path
 from typing import TYPE_CHECKING, Any, cast
@@ -30,6 +32,14 @@ if TYPE_CHECKING:
 logger = logging.getLogger(__name__)
 
 
+def _request_size(request: Request) -> int:
+    """Return a rough estimate of the memory used by a request, in bytes"""
+    size = 1024 + len(request.url) + len(request.body)
+    for name, values in request.headers.items():
+        size += len(name) + sum(len(value) for value in values)
+    return size
+
+
 class BaseSchedulerMeta(type):
     """
     Metaclass to check scheduler classes against the necessary interface
@@ -126,6 +136,25 @@ class BaseScheduler(metaclass=BaseSchedulerMeta):
         """
         raise NotImplementedError()
 
+    def next_requests(self, n: int) -> list[Request]:
+        """
+        Return a list of up to ``n`` :class:`~scrapy.http.Request` objects to be
+        processed, in order. Returning fewer than ``n`` requests has the same meaning
+        as :meth:`next_request` returning ``None``.
+
+        The engine only calls this method if :setting:`SCHEDULER_DISPATCH_BATCH_SIZE`
+        is greater than 1. The default implementation calls :meth:`next_request`
+        up to ``n`` times. Schedulers that can dequeue several requests at once
+        more efficiently may override it.
+        """
+        requests: list[Request] = []
+        while len(requests) < n:
+            request = self.next_request()
+            if request is None:
+                break
+            requests.append(request)
+        return requests
+
 
 class Scheduler(BaseScheduler):
     """
@@ -143,6 +172,17 @@ class Scheduler(BaseScheduler):
     queue if a serialization error occurs. If the disk queue is not present, the memory one
     is used directly.
 
+    If a memory budget is set (see :setting:`SCHEDULER_SPILL_COUNT` and
+    :setting:`SCHEDULER_SPILL_BYTES`), requests are instead pushed into the memory
+    queue while it is within that budget. Beyond it, a request of a higher
+    priority than the lowest one in memory still goes to the memory queue, and a
+    request of that lowest priority is spilled to the disk queue instead; other
+    requests are spilled to the disk queue directly.
+    The disk queue is then created in a temporary directory if :setting:`JOBDIR`
+    is not set. Whenever the memory queue runs out of requests, it is refilled
+    with a batch of up to :setting:`SCHEDULER_SPILL_REFILL_SIZE` requests from the
+    disk queue.
+
     :param dupefilter: An object responsible for checking and filtering duplicate requests.
                        The value for the :setting:`DUPEFILTER_CLASS` setting is used by default.
     :type dupefilter: :class:`scrapy.dupefilters.BaseDupeFilter` instance or similar:
@@ -176,6 +216,21 @@ class Scheduler(BaseScheduler):
 
     :param crawler: The crawler object corresponding to the current crawl.
     :type crawler: :class:`scrapy.crawler.Crawler`
+
+    :param spill_count: Maximum number of requests in the memory queue before
+                        spilling to the disk queue, ``0`` for no limit.
+                        The value for the :setting:`SCHEDULER_SPILL_COUNT` setting is used by default.
+    :type spill_count: int
+
+    :param spill_bytes: Maximum approximate size in bytes of the requests in the memory
+                        queue before spilling to the disk queue, ``0`` for no limit.
+                        The value for the :setting:`SCHEDULER_SPILL_BYTES` setting is used by default.
+    :type spill_bytes: int
+
+    :param spill_refill_size: Maximum number of requests moved from the disk queue to
+                              the memory queue when the latter is empty.
+                              The value for the :setting:`SCHEDULER_SPILL_REFILL_SIZE` setting is used by default.
+    :type spill_refill_size: int
     """
 
     def __init__(
@@ -188,6 +243,9 @@ class Scheduler(BaseScheduler):
         stats: StatsCollector | None = None,
         pqclass: type[ScrapyPriorityQueue] | None = None,
         crawler: Crawler | None = None,
+        spill_count: int = 0,
+        spill_bytes: int = 0,
+        spill_refill_size: int = 1000,
     ):
         self.df: BaseDupeFilter = dupefilter  # 指纹过滤器(主要用来过滤重复请求)
         self.dqdir: str | None = self._dqdir(jobdir)  # 队列任务文件夹
@@ -197,6 +255,14 @@ class Scheduler(BaseScheduler):
         self.logunser: bool = logunser  # 日志是否序列化
         self.stats: StatsCollector | None = stats
         self.crawler: Crawler | None = crawler
+        self.spill_count: int = spill_count
+        self.spill_bytes: int = spill_bytes
+        self.spill_refill_size: int = max(spill_refill_size, 1)
+        self._spilldir: str | None = None
+        self._mqbytes: int = 0  # approximate size of the memory queue
+        # requests moved from the disk queue to the memory queue, which are
+        # counted as disk dequeues when they leave the memory queue
+        self._refilled: set[Request] = set()
 
     @classmethod
     def from_crawler(cls, crawler: Crawler) -> Self:
@@ -215,6 +281,9 @@ class Scheduler(BaseScheduler):
             stats=crawler.stats,
             pqclass=load_object(crawler.settings["SCHEDULER_PRIORITY_QUEUE"]),
             crawler=crawler,
+            spill_count=crawler.settings.getint("SCHEDULER_SPILL_COUNT"),
+            spill_bytes=crawler.settings.getint("SCHEDULER_SPILL_BYTES"),
+            spill_refill_size=crawler.settings.getint("SCHEDULER_SPILL_REFILL_SIZE"),
         )
 
     def has_pending_requests(self) -> bool:
@@ -223,9 +292,12 @@ class Scheduler(BaseScheduler):
     def open(self, spider: Spider) -> Deferred[None] | None:
         """
         (1) initialize the memory queue
-        (2) initialize the disk queue if the ``jobdir`` attribute is a valid directory
+        (2) initialize the disk queue if the ``jobdir`` attribute is a valid directory,
+            or in a temporary directory if a memory budget is set
         (3) return the result of the dupefilter's ``open`` method
         """
+        if self._spilling and not self.dqdir:
+            self.dqdir = self._spilldir = tempfile.mkdtemp(prefix="scrapy-spill-")
         # 设置爬虫
         self.spider: Spider = spider
         # 实例化优先级队列
@@ -240,7 +312,16 @@ class Scheduler(BaseScheduler):
         (1) dump pending requests to disk if there is a disk queue
         (2) return the result of the dupefilter's ``close`` method
         """
-        if self.dqs is not None:
+        if self._spilldir is not None:
+            assert self.dqs is not None
+            self.dqs.close()
+            shutil.rmtree(self._spilldir, ignore_errors=True)
+            self.dqdir = self._spilldir = None
+        elif self.dqs is not None:
+            if self._spilling:
+                # keep the requests of the memory queue for the next run
+                while (request := self.mqs.pop()) is not None:
+                    self._dqpush(request)
             state = self.dqs.close()
             assert isinstance(self.dqdir, str)
             self._write_dqs_state(self.dqdir, state)
@@ -261,7 +342,11 @@ class Scheduler(BaseScheduler):
             self.df.log(request, self.spider)
             return False
         # 磁盘队列是否入队成功
-        dqok = self._dqpush(request)
+        dqok = (
+            not self._mq_within_budget()
+            and not self._spill_lowest(request)
+            and self._dqpush(request)
+        )
         assert self.stats is not None
         if dqok:
             self.stats.inc_value("scheduler/enqueued/disk", spider=self.spider)
@@ -281,18 +366,49 @@ class Scheduler(BaseScheduler):
         Increment the appropriate stats, such as: ``scheduler/dequeued``,
         ``scheduler/dequeued/disk``, ``scheduler/dequeued/memory``.
         """
-        request: Request | None = self.mqs.pop()
+        request, queue = self._pop()
         assert self.stats is not None
         if request is not None:
-            self.stats.inc_value("scheduler/dequeued/memory", spider=self.spider)
-        else:
-            request = self._dqpop()
-            if request is not None:
-                self.stats.inc_value("scheduler/dequeued/disk", spider=self.spider)
-        if request is not None:
+            self.stats.inc_value(f"scheduler/dequeued/{queue}", spider=self.spider)
             self.stats.inc_value("scheduler/dequeued", spider=self.spider)
         return request
 
+    def next_requests(self, n: int) -> list[Request]:
+        """
+        Return a list of up to ``n`` requests, as returned by consecutive calls to
+        :meth:`next_request`, incrementing the same stats once per call.
+        """
+        requests: list[Request] = []
+        counts = {"memory": 0, "disk": 0}
+        while len(requests) < n:
+            request, queue = self._pop()
+            if request is None:
+                break
+            requests.append(request)
+            counts[queue] += 1
+        assert self.stats is not None
+        for queue, count in counts.items():
+            if count:
+                self.stats.inc_value(
+                    f"scheduler/dequeued/{queue}", count, spider=self.spider
+                )
+        if requests:
+            self.stats.inc_value(
+                "scheduler/dequeued", len(requests), spider=self.spider
+            )
+        return requests
+
+    def _pop(self) -> tuple[Request | None, str]:
+        if self._spilling and not self.mqs:
+            self._refill()
+        request = self._mqpop()
+        if request is not None:
+            if request in self._refilled:
+                self._refilled.remove(request)
+                return request, "disk"
+            return request, "memory"
+        return self._dqpop(), "disk"
+
     def __len__(self) -> int:
         """
         Return the total amount of enqueued requests
@@ -324,8 +440,63 @@ class Scheduler(BaseScheduler):
         else:
             return True
 
+    @property
+    def _spilling(self) -> bool:
+        return bool(self.spill_count or self.spill_bytes)
+
+    def _mq_within_budget(self) -> bool:
+        if not self._spilling:
+            return False
+        if self.spill_count and len(self.mqs) >= self.spill_count:
+            return False
+        return not self.spill_bytes or self._mqbytes < self.spill_bytes
+
+    def _spill_lowest(self, request: Request) -> bool:
+        """If *request* has a higher priority than the lowest one in the
+        memory queue, move a request of that lowest priority to the disk queue
+        to make room for *request*, and return ``True``."""
+        if not self._spilling or not hasattr(self.mqs, "poplast"):
+            return False
+        lastprio = self.mqs.lastprio
+        if lastprio is None or -request.priority >= lastprio:
+            return False
+        spilled = self.mqs.poplast()
+        assert spilled is not None
+        if self.spill_bytes:
+            self._mqbytes -= _request_size(spilled)
+        if not self._dqpush(spilled):
+            self._mqpush(spilled)
+            return False
+        self._refilled.discard(spilled)
+        assert self.stats is not None
+        self.stats.inc_value("scheduler/spilled", spider=self.spider)
+        return True
+
+    def _refill(self) -> None:
+        """Move a batch of requests from the disk queue to the memory queue"""
+        if not self.dqs:
+            return
+        assert self.stats is not None
+        for _ in range(self.spill_refill_size):
+            request = self._dqpop()
+            if request is None:
+                break
+            self._mqpush(request)
+            self._refilled.add(request)
+            self.stats.inc_value("scheduler/refilled", spider=self.spider)
+            if not self._mq_within_budget():
+                break
+
     def _mqpush(self, request: Request) -> None:
         self.mqs.push(request)
+        if self.spill_bytes:
+            self._mqbytes += _request_size(request)
+
+    def _mqpop(self) -> Request | None:
+        request = self.mqs.pop()
+        if request is not None and self.spill_bytes:
+            self._mqbytes -= _request_size(request)
+        return request
 
     def _dqpop(self) -> Request | None:
         if self.dqs is not None:
@@ -4,18 +4,22 @@ extracts information from them"""
 from __future__ import annotations
 
 import logging
+import sys
 from collections import deque
 from collections.abc import AsyncIterable, Iterator
 from typing import TYPE_CHECKING, Any, TypeVar, Union, cast
 
-from itemadapter import is_item
+from itemadapter import ItemAdapter, is_item
 from twisted.internet.defer import Deferred, inlineCallbacks
+from twisted.internet.threads import deferToThreadPool
 from twisted.python.failure import Failure
+from twisted.python.threadpool import ThreadPool
 
 from scrapy import Spider, signals
+from scrapy.core.callbackpool import CallbackProcessPool
 from scrapy.core.spidermw import SpiderMiddlewareManager
 from scrapy.exceptions import CloseSpider, DropItem, IgnoreRequest
-from scrapy.http import Request, Response
+from scrapy.http import HtmlResponse, Request, Response, TextResponse, XmlResponse
 from scrapy.logformatter import LogFormatter
 from scrapy.pipelines import ItemPipelineManager
 from scrapy.signalmanager import SignalManager
@@ -28,12 +32,19 @@ from scrapy.utils.defer import (
     parallel_async,
 )
 from scrapy.utils.log import failure_to_exc_info, logformatter_adapter
-from scrapy.utils.misc import load_object, warn_on_generator_with_return_value
+from scrapy.utils.misc import (
+    build_from_crawler,
+    load_object,
+    warn_on_generator_with_return_value,
+)
 from scrapy.utils.spider import iterate_spider_output
 
 if TYPE_CHECKING:
     from collections.abc import Generator, Iterable
 
+    # typing.Self requires Python 3.11
+    from typing_extensions import Self
+
     from scrapy.crawler import Crawler
 
 
@@ -46,28 +57,88 @@ _HandleOutputDeferred = Deferred[Union[_ParallelResult, None]]
 QueueTuple = tuple[Union[Response, Failure], Request, _HandleOutputDeferred]
 
 
+class BodySizeEstimator:
+    """Estimate the memory used by the responses being scraped from the size
+    of their body. Items are not counted.
+
+    See :setting:`SCRAPER_SLOT_SIZE_ESTIMATOR`.
+    """
+
+    MIN_RESPONSE_SIZE = 1024
+
+    @classmethod
+    def from_crawler(cls, crawler: Crawler) -> Self:
+        return cls()
+
+    def response_size(self, result: Response | Failure) -> int:
+        if isinstance(result, Response):
+            return max(len(result.body), self.MIN_RESPONSE_SIZE)
+        return self.MIN_RESPONSE_SIZE
+
+    def item_size(self, item: Any) -> int:
+        return 0
+
+
+class MemorySizeEstimator(BodySizeEstimator):
+    """Like :class:`BodySizeEstimator`, but also count the decoded text and
+    the lxml tree of text responses once they have been built, and the items
+    being processed by the item pipelines.
+    """
+
+    #: Size of an lxml tree relative to the size of the document, from about
+    #: 1.5 for text-heavy pages to about 13 for markup-heavy ones.
+    TREE_SIZE_RATIO = 10
+
+    def response_size(self, result: Response | Failure) -> int:
+        size = super().response_size(result)
+        if isinstance(result, TextResponse):
+            if result._cached_ubody is not None:
+                size += sys.getsizeof(result._cached_ubody)
+            if result._cached_selector is not None:
+                size += self.TREE_SIZE_RATIO * len(result.body)
+        return size
+
+    def item_size(self, item: Any) -> int:
+        size = sys.getsizeof(item)
+        if is_item(item):
+            size += sum(sys.getsizeof(value) for value in ItemAdapter(item).values())
+        return size
+
+
 class Slot:
     """Scraper slot (one per running spider)"""
 
-    MIN_RESPONSE_SIZE = 1024
+    MIN_RESPONSE_SIZE = BodySizeEstimator.MIN_RESPONSE_SIZE
 
-    def __init__(self, max_active_size: int = 5000000):
+    def __init__(
+        self,
+        max_active_size: int = 5000000,
+        size_estimator: BodySizeEstimator | None = None,
+        max_itemproc_queue: int = 0,
+    ):
         self.max_active_size: int = max_active_size
+        # 0 means that queued items never make the scraper back out
+        self.max_itemproc_queue: int = max_itemproc_queue
+        self.size_estimator: BodySizeEstimator = size_estimator or BodySizeEstimator()
         self.queue: deque[QueueTuple] = deque()
         self.active: set[Request] = set()
         self.active_size: int = 0
         self.itemproc_size: int = 0
+        self.itemproc_queue: deque[tuple[Any, Response | None, int, Deferred[Any]]] = (
+            deque()
+        )
+        self.items_size: int = 0
         self.closing: Deferred[Spider] | None = None
+        self._sizes: dict[Request, int] = {}
 
     def add_response_request(
         self, result: Response | Failure, request: Request
     ) -> _HandleOutputDeferred:
         deferred: _HandleOutputDeferred = Deferred()
         self.queue.append((result, request, deferred))
-        if isinstance(result, Response):
-            self.active_size += max(len(result.body), self.MIN_RESPONSE_SIZE)
-        else:
-            self.active_size += self.MIN_RESPONSE_SIZE
+        # the size is kept, as the estimate may change during scraping
+        size = self._sizes[request] = self.size_estimator.response_size(result)
+        self.active_size += size
         return deferred
 
     def next_response_request_deferred(self) -> QueueTuple:
@@ -75,18 +146,28 @@ class Slot:
         self.active.add(request)
         return response, request, deferred
 
+    def update_response_size(
+        self, result: Response | Failure, request: Request
+    ) -> None:
+        """Estimate the size of *result* again, e.g. after its callback built
+        its selector."""
+        if request in self._sizes:
+            size = self.size_estimator.response_size(result)
+            self.active_size += size - self._sizes[request]
+            self._sizes[request] = size
+
     def finish_response(self, result: Response | Failure, request: Request) -> None:
         self.active.remove(request)
-        if isinstance(result, Response):
-            self.active_size -= max(len(result.body), self.MIN_RESPONSE_SIZE)
-        else:
-            self.active_size -= self.MIN_RESPONSE_SIZE
+        self.active_size -= self._sizes.pop(request)
 
     def is_idle(self) -> bool:
-        return not (self.queue or self.active)
+        return not (self.queue or self.active or self.itemproc_queue)
 
     def needs_backout(self) -> bool:
-        return self.active_size > self.max_active_size
+        return (
+            self.active_size + self.items_size > self.max_active_size
+            or 0 < self.max_itemproc_queue < len(self.itemproc_queue)
+        )
 
 
 class Scraper:
@@ -98,8 +179,21 @@ class Scraper:
         itemproc_cls: type[ItemPipelineManager] = load_object(
             crawler.settings["ITEM_PROCESSOR"]
         )  # 从配置文件中加载Pipeline处理器类
-        self.itemproc: ItemPipelineManager = itemproc_cls.from_crawler(crawler)  # 实例化Pipeline处理器
-        self.concurrent_items: int = crawler.settings.getint("CONCURRENT_ITEMS") # 从配置文件中获取同时处理输出的任务个数
+        self.itemproc: ItemPipelineManager = itemproc_cls.from_crawler(
+            crawler
+        )  # 实例化Pipeline处理器
+        self.concurrent_items: int = crawler.settings.getint(
+            "CONCURRENT_ITEMS"
+        )  # 从配置文件中获取同时处理输出的任务个数
+        self.itemproc_concurrency: int = crawler.settings.getint(
+            "ITEM_PIPELINE_CONCURRENCY"
+        )
+        self.callback_pool: CallbackProcessPool = CallbackProcessPool.from_crawler(
+            crawler
+        )
+        self.preparse_threads: int = crawler.settings.getint("SCRAPER_PREPARSE_THREADS")
+        self._preparse_pool: ThreadPool | None = None
+        self._preparse_shutdown_trigger: Any = None
         self.crawler: Crawler = crawler
         self.signals: SignalManager = crawler.signals
         assert crawler.logformatter
@@ -108,7 +202,16 @@ class Scraper:
     @inlineCallbacks
     def open_spider(self, spider: Spider) -> Generator[Deferred[Any], Any, None]:
         """Open the given spider for scraping and allocate resources for it"""
-        self.slot = Slot(self.crawler.settings.getint("SCRAPER_SLOT_MAX_ACTIVE_SIZE"))
+        self.slot = Slot(
+            self.crawler.settings.getint("SCRAPER_SLOT_MAX_ACTIVE_SIZE"),
+            build_from_crawler(
+                load_object(self.crawler.settings["SCRAPER_SLOT_SIZE_ESTIMATOR"]),
+                self.crawler,
+            ),
+            max_itemproc_queue=self.itemproc_concurrency,
+        )
+        if self.preparse_threads:
+            self._start_preparse_pool()
         # 调用所有pipeline的open_spider方法
         yield self.itemproc.open_spider(spider)
 
@@ -118,9 +221,37 @@ class Scraper:
             raise RuntimeError("Scraper slot not assigned")
         self.slot.closing = Deferred()
         self.slot.closing.addCallback(self.itemproc.close_spider)
+        self.slot.closing.addBoth(self._close_pools)
         self._check_if_closing(spider)
         return self.slot.closing
 
+    def _start_preparse_pool(self) -> None:
+        from twisted.internet import reactor
+
+        self._preparse_pool = ThreadPool(
+            0, self.preparse_threads, name="scrapy-preparse"
+        )
+        self._preparse_pool.start()
+        # in case the reactor stops before the spider is closed
+        self._preparse_shutdown_trigger = reactor.addSystemEventTrigger(
+            "during", "shutdown", self._stop_preparse_pool
+        )
+
+    def _stop_preparse_pool(self) -> None:
+        self._preparse_shutdown_trigger = None
+        if self._preparse_pool is not None:
+            self._preparse_pool.stop()
+            self._preparse_pool = None
+
+    def _close_pools(self, result: _T) -> _T:
+        from twisted.internet import reactor
+
+        self.callback_pool.close()
+        if self._preparse_shutdown_trigger is not None:
+            reactor.removeSystemEventTrigger(self._preparse_shutdown_trigger)
+        self._stop_preparse_pool()
+        return result
+
     def is_idle(self) -> bool:
         """Return True if there isn't any more spiders to process"""
         return not self.slot
@@ -160,7 +291,51 @@ class Scraper:
         assert self.slot is not None  # typing
         while self.slot.queue:
             response, request, deferred = self.slot.next_response_request_deferred()
-            self._scrape(response, request, spider).chainDeferred(deferred)
+            if isinstance(
+                response, (HtmlResponse, XmlResponse)
+            ) and self._should_preparse(response, request, spider):
+                dfd = self._preparse_and_scrape(response, request, spider)
+            else:
+                dfd = self._scrape(response, request, spider)
+            dfd.chainDeferred(deferred)
+
+    def _should_preparse(
+        self, response: HtmlResponse | XmlResponse, request: Request, spider: Spider
+    ) -> bool:
+        return (
+            self._preparse_pool is not None
+            and response._cached_selector is None
+            # callbacks running in worker processes parse there
+            and not self.callback_pool.handles(request, spider)
+        )
+
+    def _preparse_and_scrape(
+        self, response: HtmlResponse | XmlResponse, request: Request, spider: Spider
+    ) -> _HandleOutputDeferred:
+        """Build the selector of the response in a thread, as lxml releases
+        the GIL while parsing, and then scrape the response"""
+        from twisted.internet import reactor
+
+        assert self._preparse_pool is not None
+        assert self.crawler.stats
+        self.crawler.stats.inc_value("scraper/preparsed", spider=spider)
+        dfd: Deferred[Any] = deferToThreadPool(
+            reactor, self._preparse_pool, getattr, response, "selector"
+        )
+        # parsing errors are raised again if the callback uses the selector
+        dfd.addErrback(lambda _: None)
+        dfd.addCallback(self._update_response_size, response, request)
+        dfd2: _HandleOutputDeferred = dfd.addCallback(
+            lambda _: self._scrape(response, request, spider)
+        )
+        return dfd2
+
+    def _update_response_size(
+        self, result: _T, response: Response | Failure, request: Request
+    ) -> _T:
+        assert self.slot is not None  # typing
+        self.slot.update_response_size(response, request)
+        return result
 
     def _scrape(
         self, result: Response | Failure, request: Request, spider: Spider
@@ -175,6 +350,8 @@ class Scraper:
         dfd: Deferred[Iterable[Any] | AsyncIterable[Any]] = self._scrape2(
             result, request, spider
         )  # returns spider's processed output
+        # the callback may have decoded the response or built its selector
+        dfd.addBoth(self._update_response_size, result, request)
         dfd.addErrback(self.handle_spider_error, request, result, spider)
         dfd2: _HandleOutputDeferred = dfd.addCallback(
             self.handle_spider_output, request, cast(Response, result), spider
@@ -207,10 +384,13 @@ class Scraper:
             assert result.request
             callback = result.request.callback or spider._parse
             warn_on_generator_with_return_value(spider, callback)
-            dfd = defer_succeed(result)
-            dfd.addCallbacks(
-                callback=callback, callbackKeywords=result.request.cb_kwargs
-            )
+            if self.callback_pool.handles(result.request, spider):
+                dfd = self.callback_pool.call_spider(result, spider)
+            else:
+                dfd = defer_succeed(result)
+                dfd.addCallbacks(
+                    callback=callback, callbackKeywords=result.request.cb_kwargs
+                )
         else:  # result is a Failure
             # TODO: properly type adding this attribute to a Failure
             result.request = request  # type: ignore[attr-defined]
@@ -296,6 +476,8 @@ class Scraper:
         """Process each Request/Item (given in the output parameter) returned
         from the given spider
         """
+        # generator callbacks build selectors while producing their output
+        self._update_response_size(None, response, request)
         if isinstance(output, Request):
             assert self.crawler.engine is not None  # typing
             self.crawler.engine.crawl(request=output)
@@ -317,14 +499,55 @@ class Scraper:
 
         *response* is the source of the item data. If the item does not come
         from response data, e.g. it was hard-coded, set it to ``None``.
+
+        If :setting:`ITEM_PIPELINE_CONCURRENCY` items are already being
+        processed, *item* waits in a queue until one of them is done.
         """
+        assert self.slot is not None  # typing
+        assert self.crawler.spider is not None  # typing
+        item_size = self.slot.size_estimator.item_size(item)
+        self.slot.items_size += item_size
+        if 0 < self.itemproc_concurrency <= self.slot.itemproc_size:
+            dfd: Deferred[Any] = Deferred()
+            self.slot.itemproc_queue.append((item, response, item_size, dfd))
+            assert self.crawler.stats
+            self.crawler.stats.inc_value(
+                "item_pipeline/queued", spider=self.crawler.spider
+            )
+            self.crawler.stats.max_value(
+                "item_pipeline/queue_max_depth",
+                len(self.slot.itemproc_queue),
+                spider=self.crawler.spider,
+            )
+            return dfd
+        return self._process_item(item, response, item_size)
+
+    def _process_item(
+        self, item: Any, response: Response | None, item_size: int
+    ) -> Deferred[Any]:
         assert self.slot is not None  # typing
         assert self.crawler.spider is not None  # typing
         self.slot.itemproc_size += 1
         dfd = self.itemproc.process_item(item, self.crawler.spider)
+        dfd.addBoth(self._release_item_size, item_size)
         dfd.addBoth(self._itemproc_finished, item, response, self.crawler.spider)
+        dfd.addBoth(self._process_queued_item)
         return dfd
 
+    def _process_queued_item(self, result: _T) -> _T:
+        assert self.slot is not None  # typing
+        if self.slot.itemproc_queue and (
+            self.slot.itemproc_size < self.itemproc_concurrency
+        ):
+            item, response, item_size, dfd = self.slot.itemproc_queue.popleft()
+            self._process_item(item, response, item_size).chainDeferred(dfd)
+        return result
+
+    def _release_item_size(self, result: _T, item_size: int) -> _T:
+        assert self.slot is not None  # typing
+        self.slot.items_size -= item_size
+        return result
+
     def _log_download_errors(
         self,
         spider_failure: Failure,
@@ -40,6 +40,7 @@ from scrapy.utils.reactor import (
     verify_installed_asyncio_event_loop,
     verify_installed_reactor,
 )
+from scrapy.utils.url import CanonicalizeUrlCache, canonicalize_url_cache
 
 if TYPE_CHECKING:
     from collections.abc import Generator, Iterable
@@ -82,6 +83,8 @@ class Crawler:
         self.stats: StatsCollector | None = None
         self.logformatter: LogFormatter | None = None
         self.request_fingerprinter: RequestFingerprinter | None = None  # 指纹
+        # shared with the link extractors, which have no access to the crawler
+        self.canonicalize_url_cache: CanonicalizeUrlCache = canonicalize_url_cache
         self.spider: Spider | None = None
         self.engine: ExecutionEngine | None = None
 
@@ -107,6 +110,9 @@ class Crawler:
         lf_cls: type[LogFormatter] = load_object(self.settings["LOG_FORMATTER"])
         self.logformatter = lf_cls.from_crawler(self)
 
+        self.canonicalize_url_cache.limit = self.settings.getint(
+            "URL_CANONICALIZATION_CACHE_SIZE"
+        )
         self.request_fingerprinter = build_from_crawler(
             load_object(self.settings["REQUEST_FINGERPRINTER_CLASS"]),
             self,
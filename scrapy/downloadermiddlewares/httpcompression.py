@@ -97,6 +97,9 @@ class HttpCompressionMiddleware:
     def process_request(
         self, request: Request, spider: Spider
     ) -> Request | Response | None:
+        if request.meta.get("download_spool_size"):
+            # spooled bodies are not decompressed, see process_response()
+            return None
         request.headers.setdefault("Accept-Encoding", b", ".join(ACCEPTED_ENCODINGS))
         return None
 
@@ -105,6 +108,9 @@ class HttpCompressionMiddleware:
     ) -> Request | Response:
         if request.method == "HEAD":
             return response
+        if response.spooled_body is not None:
+            # decompressing would load the whole body in memory
+            return response
         if isinstance(response, Response):
             content_encoding = response.headers.getlist("Content-Encoding")
             if content_encoding:
@@ -1,10 +1,15 @@
 from __future__ import annotations
 
+import hashlib
 import logging
+import math
+import mmap
+import os
+import struct
 from pathlib import Path
 from typing import TYPE_CHECKING
 
-from scrapy.utils.job import job_dir
+from scrapy.utils.job import GroupCommitFile, job_dir
 from scrapy.utils.request import (
     RequestFingerprinter,
     RequestFingerprinterProtocol,
@@ -12,6 +17,8 @@ from scrapy.utils.request import (
 )
 
 if TYPE_CHECKING:
+    from typing import BinaryIO
+
     from twisted.internet.defer import Deferred
 
     # typing.Self requires Python 3.11
@@ -21,6 +28,7 @@ if TYPE_CHECKING:
     from scrapy.http.request import Request
     from scrapy.settings import BaseSettings
     from scrapy.spiders import Spider
+    from scrapy.statscollectors import StatsCollector
 
 
 class BaseDupeFilter:
@@ -51,8 +59,12 @@ class RFPDupeFilter(BaseDupeFilter):
         debug: bool = False,
         *,
         fingerprinter: RequestFingerprinterProtocol | None = None,
+        flush_size: int = 65536,
+        flush_interval: float = 1.0,
+        fsync: bool = False,
     ) -> None:
         self.file = None
+        self.writer: GroupCommitFile | None = None
         self.fingerprinter: RequestFingerprinterProtocol = (
             fingerprinter or RequestFingerprinter()
         )
@@ -63,7 +75,19 @@ class RFPDupeFilter(BaseDupeFilter):
         if path:
             self.file = Path(path, "requests.seen").open("a+", encoding="utf-8")
             self.file.seek(0)
-            self.fingerprints.update(x.rstrip() for x in self.file)
+            line = ""
+            for line in self.file:
+                self.fingerprints.add(line.rstrip())
+            if line and not line.endswith("\n"):
+                # the last write was interrupted, do not append to it
+                self.file.write("\n")
+            self.writer = GroupCommitFile(
+                self.file,
+                flush_size=flush_size,
+                flush_interval=flush_interval,
+                fsync=fsync,
+                stats_prefix="jobdir/dupefilter",
+            )
 
     @classmethod
     def from_settings(
@@ -73,15 +97,25 @@ class RFPDupeFilter(BaseDupeFilter):
         fingerprinter: RequestFingerprinterProtocol | None = None,
     ) -> Self:
         debug = settings.getbool("DUPEFILTER_DEBUG")
-        return cls(job_dir(settings), debug, fingerprinter=fingerprinter)
+        return cls(
+            job_dir(settings),
+            debug,
+            fingerprinter=fingerprinter,
+            flush_size=settings.getint("JOBDIR_FLUSH_SIZE"),
+            flush_interval=settings.getfloat("JOBDIR_FLUSH_INTERVAL"),
+            fsync=settings.getbool("JOBDIR_FSYNC"),
+        )
 
     @classmethod
     def from_crawler(cls, crawler: Crawler) -> Self:
         assert crawler.request_fingerprinter
-        return cls.from_settings(
+        df = cls.from_settings(
             crawler.settings,
             fingerprinter=crawler.request_fingerprinter,
         )
+        if df.writer:
+            df.writer.stats = crawler.stats
+        return df
 
     def request_seen(self, request: Request) -> bool:
         # 生成请求指纹
@@ -91,8 +125,8 @@ class RFPDupeFilter(BaseDupeFilter):
         # 不重复则记录此指纹
         self.fingerprints.add(fp)
         # 如果有path则把指纹写入文件
-        if self.file:
-            self.file.write(fp + "\n")
+        if self.writer:
+            self.writer.write(fp + "\n")
         return False
 
     def request_fingerprint(self, request: Request) -> str:
@@ -100,7 +134,9 @@ class RFPDupeFilter(BaseDupeFilter):
         return self.fingerprinter.fingerprint(request).hex()
 
     def close(self, reason: str) -> None:
-        if self.file:
+        if self.writer:
+            self.writer.close()
+        elif self.file:
             self.file.close()
 
     def log(self, request: Request, spider: Spider) -> None:
@@ -119,3 +155,615 @@ class RFPDupeFilter(BaseDupeFilter):
 
         assert spider.crawler.stats
         spider.crawler.stats.inc_value("dupefilter/filtered", spider=spider)
+
+
+class _BloomFilterSlice:
+    """Fixed-size Bloom filter sized for *capacity* items at *error_rate*."""
+
+    __slots__ = ("bits", "capacity", "count", "error_rate", "num_bits", "num_hashes")
+
+    def __init__(
+        self,
+        capacity: int,
+        error_rate: float,
+        count: int = 0,
+        bits: bytearray | None = None,
+    ):
+        self.capacity: int = capacity
+        self.error_rate: float = error_rate
+        num_bits = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        self.num_bits: int = max(8, num_bits)
+        self.num_hashes: int = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.count: int = count
+        nbytes = (self.num_bits + 7) // 8
+        if bits is None:
+            bits = bytearray(nbytes)
+        elif len(bits) != nbytes:
+            raise ValueError(
+                f"Bloom filter slice expected {nbytes} bytes, got {len(bits)}"
+            )
+        self.bits: bytearray = bits
+
+    def contains(self, h1: int, h2: int) -> bool:
+        bits = self.bits
+        num_bits = self.num_bits
+        for i in range(self.num_hashes):
+            pos = (h1 + i * h2) % num_bits
+            if not bits[pos >> 3] & (1 << (pos & 7)):
+                return False
+        return True
+
+    def add(self, h1: int, h2: int) -> None:
+        bits = self.bits
+        num_bits = self.num_bits
+        for i in range(self.num_hashes):
+            pos = (h1 + i * h2) % num_bits
+            bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    @property
+    def fill_ratio(self) -> float:
+        """Estimated fraction of bits set, derived from the insertion count."""
+        return 1 - math.exp(-self.num_hashes * self.count / self.num_bits)
+
+    @property
+    def false_positive_rate(self) -> float:
+        return self.fill_ratio**self.num_hashes
+
+
+class ScalableBloomFilter:
+    """Probabilistic set of fingerprints with bounded memory usage.
+
+    It is a chain of Bloom filters: once the last filter reaches its capacity,
+    a new one is appended with ``growth`` times its capacity and a tighter
+    error rate, so that the compound false positive rate stays below
+    *error_rate* no matter how many fingerprints are added.
+
+    False negatives are not possible: a fingerprint that was added is always
+    reported as present.
+    """
+
+    growth = 2
+    tightening = 0.5
+
+    _magic = b"SBF1"
+    _header = struct.Struct("<4sQdI")
+    _slice_header = struct.Struct("<QdQ")
+
+    def __init__(self, capacity: int = 1000000, error_rate: float = 0.001):
+        if capacity <= 0:
+            raise ValueError(f"capacity must be positive, got {capacity!r}")
+        if not 0 < error_rate < 1:
+            raise ValueError(f"error_rate must be in (0, 1), got {error_rate!r}")
+        self.capacity: int = capacity
+        self.error_rate: float = error_rate
+        self.slices: list[_BloomFilterSlice] = []
+
+    #: Size of the digests returned by :meth:`digest`.
+    digest_size = 16
+
+    @classmethod
+    def digest(cls, fp: bytes) -> bytes:
+        """Return the digest of *fp* that the filter hashes are derived
+        from, which :meth:`add_digest` accepts."""
+        return hashlib.blake2b(fp, digest_size=cls.digest_size).digest()
+
+    @staticmethod
+    def _hashes(digest: bytes) -> tuple[int, int]:
+        return (
+            int.from_bytes(digest[:8], "little"),
+            int.from_bytes(digest[8:], "little") | 1,
+        )
+
+    def _new_slice(self) -> _BloomFilterSlice:
+        if not self.slices:
+            return _BloomFilterSlice(
+                self.capacity, self.error_rate * (1 - self.tightening)
+            )
+        last = self.slices[-1]
+        return _BloomFilterSlice(
+            last.capacity * self.growth, last.error_rate * self.tightening
+        )
+
+    def __contains__(self, fp: bytes) -> bool:
+        h1, h2 = self._hashes(self.digest(fp))
+        return any(s.contains(h1, h2) for s in self.slices)
+
+    def add(self, fp: bytes) -> bool:
+        """Add *fp* to the filter. Return ``True`` if it was (probably)
+        already present, ``False`` otherwise."""
+        return self.add_digest(self.digest(fp))
+
+    def add_digest(self, digest: bytes) -> bool:
+        """Like :meth:`add`, for a fingerprint already reduced with
+        :meth:`digest`."""
+        h1, h2 = self._hashes(digest)
+        for s in self.slices:
+            if s.contains(h1, h2):
+                return True
+        if not self.slices or self.slices[-1].count >= self.slices[-1].capacity:
+            self.slices.append(self._new_slice())
+        self.slices[-1].add(h1, h2)
+        return False
+
+    def __len__(self) -> int:
+        return sum(s.count for s in self.slices)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(len(s.bits) for s in self.slices)
+
+    @property
+    def fill_ratio(self) -> float:
+        if not self.slices:
+            return 0.0
+        return sum(s.fill_ratio * s.num_bits for s in self.slices) / sum(
+            s.num_bits for s in self.slices
+        )
+
+    @property
+    def false_positive_rate(self) -> float:
+        """Estimated probability that an unseen fingerprint is reported as
+        seen, given the current fill of every slice."""
+        p = 1.0
+        for s in self.slices:
+            p *= 1 - s.false_positive_rate
+        return 1 - p
+
+    def dump(self, path: str | os.PathLike) -> None:
+        """Write the filter to *path* atomically, in a binary format."""
+        tmp_path = Path(f"{path}.tmp")
+        with tmp_path.open("wb") as f:
+            f.write(
+                self._header.pack(
+                    self._magic, self.capacity, self.error_rate, len(self.slices)
+                )
+            )
+            for s in self.slices:
+                f.write(self._slice_header.pack(s.capacity, s.error_rate, s.count))
+                f.write(s.bits)
+            f.flush()
+            os.fsync(f.fileno())
+        tmp_path.replace(path)
+
+    @classmethod
+    def load(cls, path: str | os.PathLike) -> Self:
+        """Read a filter previously written with :meth:`dump`."""
+        with Path(path).open("rb") as f:
+            magic, capacity, error_rate, num_slices = cls._header.unpack(
+                f.read(cls._header.size)
+            )
+            if magic != cls._magic:
+                raise ValueError(f"{path} is not a Bloom filter file")
+            bf = cls(capacity, error_rate)
+            for _ in range(num_slices):
+                capacity, error_rate, count = cls._slice_header.unpack(
+                    f.read(cls._slice_header.size)
+                )
+                s = _BloomFilterSlice(capacity, error_rate, count)
+                if f.readinto(s.bits) != len(s.bits):
+                    raise ValueError(f"{path} is truncated")
+                bf.slices.append(s)
+        return bf
+
+
+class BloomDupeFilter(RFPDupeFilter):
+    """Request fingerprint duplicates filter backed by a
+    :class:`ScalableBloomFilter`.
+
+    Memory usage is a few bytes per request instead of the ~100 bytes per
+    request of :class:`RFPDupeFilter`, at the cost of a small, configurable
+    probability of dropping a request that was never seen before.
+
+    When :setting:`JOBDIR` is set, the digest of every new fingerprint is
+    appended to ``requests.bloom.log`` in that directory, with the same
+    grouped writes as :class:`RFPDupeFilter` (see *flush_size*,
+    *flush_interval* and *fsync*). Every *checkpoint_size* new fingerprints,
+    and when the spider is closed, the filter is saved to ``requests.bloom``
+    and the log is truncated. When the crawl is resumed, the filter is loaded
+    and the log is replayed on top of it, so only fingerprints that were not
+    committed to the log yet are lost if the process dies.
+
+    The ``dupefilter/bloom/*`` stats are updated every :attr:`stats_interval`
+    new fingerprints, at every checkpoint and on close.
+    """
+
+    #: Number of new fingerprints between updates of the filter stats.
+    stats_interval = 10000
+
+    def __init__(
+        self,
+        path: str | None = None,
+        debug: bool = False,
+        *,
+        fingerprinter: RequestFingerprinterProtocol | None = None,
+        capacity: int = 1000000,
+        error_rate: float = 0.001,
+        checkpoint_size: int = 1000000,
+        flush_size: int = 65536,
+        flush_interval: float = 1.0,
+        fsync: bool = False,
+    ) -> None:
+        super().__init__(None, debug, fingerprinter=fingerprinter)
+        self.stats: StatsCollector | None = None
+        self.path: Path | None = Path(path, "requests.bloom") if path else None
+        self.checkpoint_size: int = max(checkpoint_size, 1)
+        self._log: GroupCommitFile | None = None
+        self._logged: int = 0
+        self._added: int = 0
+        if self.path and self.path.exists():
+            self.bloom = ScalableBloomFilter.load(self.path)
+        else:
+            self.bloom = ScalableBloomFilter(capacity, error_rate)
+        if self.path:
+            log_path = Path(f"{self.path}.log")
+            if log_path.exists():
+                data = log_path.read_bytes()
+                size = self.bloom.digest_size
+                end = len(data) - len(data) % size  # ignore a torn last write
+                for i in range(0, end, size):
+                    self.bloom.add_digest(data[i : i + size])
+                self._logged = end // size
+            self._log = GroupCommitFile(
+                log_path.open("ab"),
+                flush_size=flush_size,
+                flush_interval=flush_interval,
+                fsync=fsync,
+                stats_prefix="jobdir/dupefilter",
+            )
+
+    @classmethod
+    def from_settings(
+        cls,
+        settings: BaseSettings,
+        *,
+        fingerprinter: RequestFingerprinterProtocol | None = None,
+    ) -> Self:
+        return cls(
+            job_dir(settings),
+            settings.getbool("DUPEFILTER_DEBUG"),
+            fingerprinter=fingerprinter,
+            capacity=settings.getint("DUPEFILTER_BLOOM_CAPACITY"),
+            error_rate=settings.getfloat("DUPEFILTER_BLOOM_ERROR_RATE"),
+            checkpoint_size=settings.getint("DUPEFILTER_BLOOM_CHECKPOINT_SIZE"),
+            flush_size=settings.getint("JOBDIR_FLUSH_SIZE"),
+            flush_interval=settings.getfloat("JOBDIR_FLUSH_INTERVAL"),
+            fsync=settings.getbool("JOBDIR_FSYNC"),
+        )
+
+    @classmethod
+    def from_crawler(cls, crawler: Crawler) -> Self:
+        df = super().from_crawler(crawler)
+        df.stats = crawler.stats
+        if df._log:
+            df._log.stats = crawler.stats
+        return df
+
+    def request_seen(self, request: Request) -> bool:
+        digest = self.bloom.digest(self.fingerprinter.fingerprint(request))
+        if self.bloom.add_digest(digest):
+            return True
+        self._added += 1
+        if self._log:
+            self._log.write(digest)
+            self._logged += 1
+            if self._logged >= self.checkpoint_size:
+                self.checkpoint()
+        if self._added % self.stats_interval == 0:
+            self._update_stats()
+        return False
+
+    def checkpoint(self) -> None:
+        """Save the filter to ``requests.bloom`` and truncate the log."""
+        assert self.path and self._log
+        self.bloom.dump(self.path)
+        # if the process dies before the truncation, the log is replayed on
+        # top of a filter that already holds it, which is harmless
+        self._log.discard()
+        self._log.file.seek(0)
+        self._log.file.truncate()
+        self._log.file.flush()
+        self._logged = 0
+        self._update_stats()
+
+    def _update_stats(self) -> None:
+        if self.stats:
+            self.stats.set_value("dupefilter/bloom/count", len(self.bloom))
+            self.stats.set_value("dupefilter/bloom/bytes", self.bloom.nbytes)
+            self.stats.set_value("dupefilter/bloom/slices", len(self.bloom.slices))
+            self.stats.set_value(
+                "dupefilter/bloom/fill_ratio", round(self.bloom.fill_ratio, 6)
+            )
+            self.stats.set_value(
+                "dupefilter/bloom/estimated_fp_rate",
+                self.bloom.false_positive_rate,
+            )
+
+    def close(self, reason: str) -> None:
+        if self._log:
+            self.checkpoint()
+            self._log.close()
+        else:
+            self._update_stats()
+
+
+class MmapFingerprintSet:
+    """Exact set of fingerprints stored in a memory-mapped file.
+
+    Fingerprints are kept as raw :attr:`record_size`-byte digests in an
+    open-addressing hash table that lives in *path*, so opening an existing
+    set takes constant time and lookups are served from the page cache
+    instead of from a Python :class:`set`.
+
+    New fingerprints go to an in-memory tail, and are also appended to a
+    ``<path>.log`` write-ahead log. Writes to the log are committed in groups,
+    according to *flush_size*, *flush_interval* and *fsync* (see
+    :class:`~scrapy.utils.job.GroupCommitFile`); fingerprints not committed
+    yet are lost if the process dies. Once the tail holds *tail_size*
+    fingerprints, or when :meth:`close` is called, it is merged into the
+    table and the log is truncated. If the process dies before that, the log
+    is replayed next time the set is opened, and the number of stored
+    fingerprints in the table header, which may not match the table after
+    an interrupted merge, is recounted.
+
+    If *path* is ``None``, the table is kept in anonymous memory.
+
+    Fingerprints that are not :attr:`record_size` bytes long are reduced to
+    that size with SHA1.
+    """
+
+    record_size = 20
+    max_load = 0.5
+
+    _magic = b"SFP1"
+    # magic, record size, number of slots, number of stored records, whether
+    # the all-zeros record (which marks empty slots) is a member
+    _header = struct.Struct("<4sIQQ?")
+
+    def __init__(
+        self,
+        path: str | os.PathLike | None = None,
+        tail_size: int = 10000,
+        initial_slots: int = 1 << 16,
+        *,
+        flush_size: int = 65536,
+        flush_interval: float = 1.0,
+        fsync: bool = False,
+    ):
+        self.path: Path | None = Path(path) if path else None
+        self.tail_size: int = tail_size
+        self.tail: set[bytes] = set()
+        self._empty: bytes = bytes(self.record_size)
+        self._file: BinaryIO | None = None
+        self._log: GroupCommitFile | None = None
+        if self.path and self.path.exists():
+            self._file = self.path.open("r+b")
+            self._mm: mmap.mmap = mmap.mmap(self._file.fileno(), 0)
+            magic, record_size, self.num_slots, self.count, self._has_empty = (
+                self._header.unpack_from(self._mm)
+            )
+            if magic != self._magic or record_size != self.record_size:
+                raise ValueError(f"{self.path} is not a fingerprint set file")
+        else:
+            self.num_slots = initial_slots
+            self.count = 0
+            self._has_empty = False
+            self._file, self._mm = self._create_table(self.path, initial_slots)
+            self._write_header()
+        if self.path:
+            log_path = Path(f"{self.path}.log")
+            if log_path.exists():
+                data = log_path.read_bytes()
+                size = self.record_size
+                end = len(data) - len(data) % size  # ignore a torn last write
+                self.tail.update(data[i : i + size] for i in range(0, end, size))
+                if data:
+                    # the set was not closed, a merge may have been interrupted
+                    self._recount()
+            self._log = GroupCommitFile(
+                log_path.open("ab"),
+                flush_size=flush_size,
+                flush_interval=flush_interval,
+                fsync=fsync,
+            )
+
+    def _create_table(
+        self, path: Path | None, num_slots: int
+    ) -> tuple[BinaryIO | None, mmap.mmap]:
+        size = self._header.size + num_slots * self.record_size
+        if path is None:
+            return None, mmap.mmap(-1, size)
+        f = path.open("w+b")
+        f.truncate(size)
+        return f, mmap.mmap(f.fileno(), 0)
+
+    def _recount(self) -> None:
+        offset, size = self._header.size, self.record_size
+        count = sum(
+            self._mm[pos : pos + size] != self._empty
+            for pos in range(offset, offset + self.num_slots * size, size)
+        )
+        self.count = count + self._has_empty
+        self._write_header()
+
+    def _write_header(self) -> None:
+        self._header.pack_into(
+            self._mm,
+            0,
+            self._magic,
+            self.record_size,
+            self.num_slots,
+            self.count,
+            self._has_empty,
+        )
+
+    def _normalize(self, fp: bytes) -> bytes:
+        if len(fp) != self.record_size:
+            return hashlib.sha1(fp).digest()  # nosec
+        return fp
+
+    @staticmethod
+    def _probe(
+        mm: mmap.mmap, num_slots: int, record_size: int, offset: int, fp: bytes
+    ) -> tuple[int, bool]:
+        """Return the offset of the slot holding *fp*, or of the empty slot
+        where it would go, and whether *fp* was found."""
+        empty = bytes(record_size)
+        i = int.from_bytes(fp[:8], "little") % num_slots
+        while True:
+            pos = offset + i * record_size
+            record = mm[pos : pos + record_size]
+            if record == fp:
+                return pos, True
+            if record == empty:
+                return pos, False
+            i = (i + 1) % num_slots
+
+    def _in_table(self, fp: bytes) -> bool:
+        if fp == self._empty:
+            return self._has_empty
+        return self._probe(
+            self._mm, self.num_slots, self.record_size, self._header.size, fp
+        )[1]
+
+    def __contains__(self, fp: bytes) -> bool:
+        fp = self._normalize(fp)
+        return fp in self.tail or self._in_table(fp)
+
+    def add(self, fp: bytes) -> bool:
+        """Add *fp* to the set. Return ``True`` if it was already present,
+        ``False`` otherwise."""
+        fp = self._normalize(fp)
+        if fp in self.tail or self._in_table(fp):
+            return True
+        self.tail.add(fp)
+        if self._log:
+            self._log.write(fp)
+        if len(self.tail) >= self.tail_size:
+            self.flush()
+        return False
+
+    def __len__(self) -> int:
+        return self.count + len(self.tail)
+
+    def _resize(self, num_slots: int) -> None:
+        tmp_path = Path(f"{self.path}.tmp") if self.path else None
+        new_file, new_mm = self._create_table(tmp_path, num_slots)
+        offset, size = self._header.size, self.record_size
+        for i in range(self.num_slots):
+            pos = offset + i * size
+            record = self._mm[pos : pos + size]
+            if record != self._empty:
+                new_pos, _ = self._probe(new_mm, num_slots, size, offset, record)
+                new_mm[new_pos : new_pos + size] = record
+        self._close_table()
+        self.num_slots = num_slots
+        # the header must be valid before the new table replaces the old file
+        self._mm = new_mm
+        self._write_header()
+        if self.path and tmp_path:
+            new_mm.close()
+            assert new_file
+            new_file.close()
+            tmp_path.replace(self.path)
+            new_file = self.path.open("r+b")
+            new_mm = mmap.mmap(new_file.fileno(), 0)
+        self._file, self._mm = new_file, new_mm
+
+    def flush(self) -> None:
+        """Merge the in-memory tail into the table and truncate the log."""
+        needed = self.count + len(self.tail)
+        if needed > self.num_slots * self.max_load:
+            num_slots = self.num_slots
+            while needed > num_slots * self.max_load:
+                num_slots *= 2
+            self._resize(num_slots)
+        offset, size = self._header.size, self.record_size
+        for fp in self.tail:
+            if fp == self._empty:
+                if not self._has_empty:
+                    self._has_empty = True
+                    self.count += 1
+                continue
+            pos, found = self._probe(self._mm, self.num_slots, size, offset, fp)
+            if not found:
+                self._mm[pos : pos + size] = fp
+                self.count += 1
+        self.tail.clear()
+        self._write_header()
+        if self._file:
+            self._mm.flush()
+        if self._log:
+            # the merged fingerprints do not need to be logged anymore
+            self._log.discard()
+            self._log.file.seek(0)
+            self._log.file.truncate()
+            self._log.file.flush()
+
+    def _close_table(self) -> None:
+        self._mm.close()
+        if self._file:
+            self._file.close()
+
+    def close(self) -> None:
+        self.flush()
+        self._close_table()
+        if self._log:
+            self._log.close()
+
+
+class MmapDupeFilter(RFPDupeFilter):
+    """Request fingerprint duplicates filter backed by a
+    :class:`MmapFingerprintSet`.
+
+    Like :class:`RFPDupeFilter`, it never drops a request that was not seen
+    before, but it stores fingerprints as raw digests in a memory-mapped
+    hash table instead of as hex strings in a Python set.
+
+    When :setting:`JOBDIR` is set, the table is stored in
+    ``requests.fingerprints`` in that directory, so resuming a crawl does not
+    need to read all previously seen fingerprints.
+    """
+
+    def __init__(
+        self,
+        path: str | None = None,
+        debug: bool = False,
+        *,
+        fingerprinter: RequestFingerprinterProtocol | None = None,
+        tail_size: int = 10000,
+        flush_size: int = 65536,
+        flush_interval: float = 1.0,
+        fsync: bool = False,
+    ) -> None:
+        super().__init__(None, debug, fingerprinter=fingerprinter)
+        self.store: MmapFingerprintSet = MmapFingerprintSet(
+            Path(path, "requests.fingerprints") if path else None,
+            tail_size=tail_size,
+            flush_size=flush_size,
+            flush_interval=flush_interval,
+            fsync=fsync,
+        )
+
+    @classmethod
+    def from_settings(
+        cls,
+        settings: BaseSettings,
+        *,
+        fingerprinter: RequestFingerprinterProtocol | None = None,
+    ) -> Self:
+        return cls(
+            job_dir(settings),
+            settings.getbool("DUPEFILTER_DEBUG"),
+            fingerprinter=fingerprinter,
+            tail_size=settings.getint("DUPEFILTER_MMAP_TAIL_SIZE"),
+            flush_size=settings.getint("JOBDIR_FLUSH_SIZE"),
+            flush_interval=settings.getfloat("JOBDIR_FLUSH_INTERVAL"),
+            fsync=settings.getbool("JOBDIR_FSYNC"),
+        )
+
+    def request_seen(self, request: Request) -> bool:
+        return self.store.add(self.fingerprinter.fingerprint(request))
+
+    def close(self, reason: str) -> None:
+        self.store.close()
@@ -15,17 +15,21 @@ if TYPE_CHECKING:
 
     from scrapy.crawler import Crawler
     from scrapy.statscollectors import StatsCollector
+    from scrapy.utils.url import CanonicalizeUrlCache
 
 
 class CoreStats:
     def __init__(self, stats: StatsCollector):
         self.stats: StatsCollector = stats
         self.start_time: datetime | None = None
+        self.url_cache: CanonicalizeUrlCache | None = None
+        self._url_cache_start: tuple[int, int] = (0, 0)
 
     @classmethod
     def from_crawler(cls, crawler: Crawler) -> Self:
         assert crawler.stats
         o = cls(crawler.stats)
+        o.url_cache = crawler.canonicalize_url_cache
         crawler.signals.connect(o.spider_opened, signal=signals.spider_opened)
         crawler.signals.connect(o.spider_closed, signal=signals.spider_closed)
         crawler.signals.connect(o.item_scraped, signal=signals.item_scraped)
@@ -36,6 +40,9 @@ class CoreStats:
     def spider_opened(self, spider: Spider) -> None:
         self.start_time = datetime.now(tz=timezone.utc)
         self.stats.set_value("start_time", self.start_time, spider=spider)
+        if self.url_cache is not None:
+            # the cache is process-wide, only count what this crawl used
+            self._url_cache_start = (self.url_cache.hits, self.url_cache.misses)
 
     def spider_closed(self, spider: Spider, reason: str) -> None:
         assert self.start_time is not None
@@ -47,6 +54,14 @@ class CoreStats:
         )
         self.stats.set_value("finish_time", finish_time, spider=spider)
         self.stats.set_value("finish_reason", reason, spider=spider)
+        if self.url_cache is not None:
+            hits = self.url_cache.hits - self._url_cache_start[0]
+            misses = self.url_cache.misses - self._url_cache_start[1]
+            if hits or misses:
+                self.stats.set_value("canonicalize_url_cache/hits", hits, spider=spider)
+                self.stats.set_value(
+                    "canonicalize_url_cache/misses", misses, spider=spider
+                )
 
     def item_scraped(self, item: Any, spider: Spider) -> None:
         self.stats.inc_value("item_scraped_count", spider=spider)
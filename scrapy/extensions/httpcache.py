@@ -4,8 +4,11 @@ import gzip
 import logging
 import os
 import pickle  # nosec
+import shutil
+import tempfile
 from email.utils import mktime_tz, parsedate_tz
 from importlib import import_module
+from io import BytesIO
 from pathlib import Path
 from time import time
 from types import ModuleType
@@ -15,6 +18,7 @@ from weakref import WeakKeyDictionary
 from w3lib.http import headers_dict_to_raw, headers_raw_to_dict
 
 from scrapy.http import Headers, Response
+from scrapy.http.response import SpooledBody
 from scrapy.responsetypes import responsetypes
 from scrapy.utils.httpobj import urlparse_cached
 from scrapy.utils.project import data_path
@@ -280,10 +284,7 @@ class DbmCacheStorage:
         url = data["url"]
         status = data["status"]
         headers = Headers(data["headers"])
-        body = data["body"]
-        respcls = responsetypes.from_args(headers=headers, url=url, body=body)
-        response = respcls(url=url, headers=headers, status=status, body=body)
-        return response
+        return _build_response(request, url, status, headers, BytesIO(data["body"]))
 
     def store_response(
         self, spider: Spider, request: Request, response: Response
@@ -293,7 +294,12 @@ class DbmCacheStorage:
             "status": response.status,
             "url": response.url,
             "headers": dict(response.headers),
-            "body": response.body,
+            # DBM values are read and written in memory
+            "body": (
+                response.body
+                if response.spooled_body is None
+                else response.spooled_body.getvalue()
+            ),
         }
         self.db[f"{key}_data"] = pickle.dumps(data, protocol=4)
         self.db[f"{key}_time"] = str(time())
@@ -341,16 +347,13 @@ class FilesystemCacheStorage:
         if metadata is None:
             return None  # not cached
         rpath = Path(self._get_request_path(spider, request))
-        with self._open(rpath / "response_body", "rb") as f:
-            body = f.read()
         with self._open(rpath / "response_headers", "rb") as f:
             rawheaders = f.read()
         url = metadata["response_url"]
         status = metadata["status"]
         headers = Headers(headers_raw_to_dict(rawheaders))
-        respcls = responsetypes.from_args(headers=headers, url=url, body=body)
-        response = respcls(url=url, headers=headers, status=status, body=body)
-        return response
+        with self._open(rpath / "response_body", "rb") as f:
+            return _build_response(request, url, status, headers, f)
 
     def store_response(
         self, spider: Spider, request: Request, response: Response
@@ -373,7 +376,11 @@ class FilesystemCacheStorage:
         with self._open(rpath / "response_headers", "wb") as f:
             f.write(headers_dict_to_raw(response.headers))
         with self._open(rpath / "response_body", "wb") as f:
-            f.write(response.body)
+            if response.spooled_body is None:
+                f.write(response.body)
+            else:
+                with response.spooled_body.open() as body:
+                    shutil.copyfileobj(body, f)
         with self._open(rpath / "request_headers", "wb") as f:
             f.write(headers_dict_to_raw(request.headers))
         with self._open(rpath / "request_body", "wb") as f:
@@ -395,6 +402,28 @@ class FilesystemCacheStorage:
             return cast(dict[str, Any], pickle.load(f))  # nosec
 
 
+def _build_response(
+    request: Request, url: str, status: int, headers: Headers, body_file: IO[bytes]
+) -> Response:
+    """Build a cached response, spooling its body like the download handler
+    would if it is larger than :reqmeta:`download_spool_size`."""
+    spool_size = request.meta.get("download_spool_size", 0)
+    body = body_file.read(spool_size + 1) if spool_size else body_file.read()
+    if not spool_size or len(body) <= spool_size:
+        respcls = responsetypes.from_args(headers=headers, url=url, body=body)
+        return respcls(url=url, headers=headers, status=status, body=body)
+    spool = tempfile.TemporaryFile()
+    spool.write(body)
+    shutil.copyfileobj(body_file, spool)
+    return Response(
+        url=url,
+        headers=headers,
+        status=status,
+        flags=["spooled"],
+        spooled_body=SpooledBody(spool),
+    )
+
+
 def parse_cachecontrol(header: bytes) -> dict[bytes, bytes | None]:
     """Parse Cache-Control header
 
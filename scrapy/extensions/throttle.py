@@ -1,7 +1,9 @@
 from __future__ import annotations
 
 import logging
+import time
 from typing import TYPE_CHECKING
+from weakref import WeakKeyDictionary
 
 from scrapy import Request, Spider, signals
 from scrapy.exceptions import NotConfigured
@@ -123,3 +125,167 @@ class AutoThrottle:
             return
 
         slot.delay = new_delay
+
+
+class _ConcurrencyWindow:
+    """Adaptive concurrency state of a downloader slot"""
+
+    def __init__(self, size: float):
+        self.size: float = size
+        self.acked: int = 0
+        self.min_latency: float | None = None
+        self.latency: float | None = None
+        self.last_decrease: float = 0.0
+
+
+class AdaptiveConcurrency:
+    """Adjust the concurrency of each downloader slot with an AIMD controller.
+
+    The concurrency of a slot grows by one for every window of responses
+    received with a latency close to the lowest one seen for the slot, and is
+    multiplied by :setting:`ADAPTIVE_CONCURRENCY_BACKOFF` when latency grows
+    past :setting:`ADAPTIVE_CONCURRENCY_LATENCY_TOLERANCE` times that lowest
+    latency, on error responses and on download errors.
+    """
+
+    def __init__(self, crawler: Crawler):
+        self.crawler: Crawler = crawler
+        settings = crawler.settings
+        if not settings.getbool("ADAPTIVE_CONCURRENCY_ENABLED"):
+            raise NotConfigured
+
+        self.debug: bool = settings.getbool("ADAPTIVE_CONCURRENCY_DEBUG")
+        self.min_concurrency: int = settings.getint("ADAPTIVE_CONCURRENCY_MIN")
+        self.max_concurrency: int = settings.getint("ADAPTIVE_CONCURRENCY_MAX")
+        if not 1 <= self.min_concurrency <= self.max_concurrency:
+            raise NotConfigured(
+                f"ADAPTIVE_CONCURRENCY_MIN ({self.min_concurrency!r}) must be at "
+                f"least 1 and at most ADAPTIVE_CONCURRENCY_MAX "
+                f"({self.max_concurrency!r})."
+            )
+        self.backoff: float = settings.getfloat("ADAPTIVE_CONCURRENCY_BACKOFF")
+        if not 0.0 < self.backoff < 1.0:
+            raise NotConfigured(
+                f"ADAPTIVE_CONCURRENCY_BACKOFF ({self.backoff!r}) must be "
+                f"between 0.0 and 1.0."
+            )
+        self.latency_tolerance: float = settings.getfloat(
+            "ADAPTIVE_CONCURRENCY_LATENCY_TOLERANCE"
+        )
+        self.error_http_codes: set[int] = {
+            int(x) for x in settings.getlist("ADAPTIVE_CONCURRENCY_ERROR_HTTP_CODES")
+        }
+        self._windows: WeakKeyDictionary[Slot, _ConcurrencyWindow] = WeakKeyDictionary()
+        # requests in the downloader that got a response
+        self._responded: set[Request] = set()
+        crawler.signals.connect(
+            self._response_downloaded, signal=signals.response_downloaded
+        )
+        crawler.signals.connect(
+            self._request_left_downloader, signal=signals.request_left_downloader
+        )
+
+    @classmethod
+    def from_crawler(cls, crawler: Crawler) -> Self:
+        return cls(crawler)
+
+    def _response_downloaded(
+        self, response: Response, request: Request, spider: Spider
+    ) -> None:
+        self._responded.add(request)
+        key, slot = self._get_slot(request)
+        latency = request.meta.get("download_latency")
+        if latency is None or slot is None or slot.throttle is False:
+            return
+        window = self._get_window(slot)
+        if response.status in self.error_http_codes:
+            self._decrease(window)
+        else:
+            self._sample(window, latency)
+        self._apply(key, slot, window, spider)
+
+    def _request_left_downloader(self, request: Request, spider: Spider) -> None:
+        if request in self._responded:
+            self._responded.remove(request)
+            return
+        key, slot = self._get_slot(request)
+        if slot is None or slot.throttle is False:
+            return
+        window = self._get_window(slot)
+        self._decrease(window)
+        self._apply(key, slot, window, spider)
+
+    def _get_slot(self, request: Request) -> tuple[str | None, Slot | None]:
+        key: str | None = request.meta.get("download_slot")
+        if key is None:
+            return None, None
+        assert self.crawler.engine
+        return key, self.crawler.engine.downloader.slots.get(key)
+
+    def _get_window(self, slot: Slot) -> _ConcurrencyWindow:
+        if slot not in self._windows:
+            size = min(
+                max(slot.concurrency, self.min_concurrency), self.max_concurrency
+            )
+            self._windows[slot] = _ConcurrencyWindow(size)
+        return self._windows[slot]
+
+    def _sample(self, window: _ConcurrencyWindow, latency: float) -> None:
+        """Define the concurrency adjustment policy for a successful response"""
+
+        # The lowest latency approximates the latency of an unloaded server. It
+        # is allowed to drift up slowly, in case the server got slower for
+        # reasons unrelated to our load.
+        if window.min_latency is None or latency < window.min_latency:
+            window.min_latency = latency
+        else:
+            window.min_latency += (latency - window.min_latency) / 100
+        if window.latency is None:
+            window.latency = latency
+        else:
+            window.latency += (latency - window.latency) / 5
+
+        # Queueing on the server makes latency grow with concurrency: back off
+        # when it does, otherwise probe for more parallelism.
+        if window.latency > window.min_latency * self.latency_tolerance:
+            self._decrease(window)
+        else:
+            window.acked += 1
+            if window.acked >= window.size:
+                window.acked = 0
+                window.size = min(window.size + 1, self.max_concurrency)
+
+    def _decrease(self, window: _ConcurrencyWindow) -> None:
+        # Responses to requests sent before a decrease reflect the old
+        # concurrency, so back off at most once per round trip.
+        now = time.monotonic()
+        if now - window.last_decrease < (window.latency or 0.0):
+            return
+        window.last_decrease = now
+        window.acked = 0
+        window.size = max(window.size * self.backoff, self.min_concurrency)
+
+    def _apply(
+        self,
+        key: str | None,
+        slot: Slot,
+        window: _ConcurrencyWindow,
+        spider: Spider,
+    ) -> None:
+        concurrency = int(window.size)
+        if concurrency == slot.concurrency:
+            return
+        if self.debug:
+            logger.info(
+                "slot: %(slot)s | concurrency: %(old)d -> %(new)d | "
+                "latency:%(latency)5d ms | min latency:%(min_latency)5d ms",
+                {
+                    "slot": key,
+                    "old": slot.concurrency,
+                    "new": concurrency,
+                    "latency": (window.latency or 0.0) * 1000,
+                    "min_latency": (window.min_latency or 0.0) * 1000,
+                },
+                extra={"spider": spider},
+            )
+        slot.concurrency = concurrency
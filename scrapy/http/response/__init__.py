@@ -7,7 +7,9 @@ See documentation in docs/topics/request-response.rst
 
 from __future__ import annotations
 
-from typing import TYPE_CHECKING, Any, AnyStr, TypeVar, overload
+import mmap
+import os
+from typing import IO, TYPE_CHECKING, Any, AnyStr, TypeVar, overload
 from urllib.parse import urljoin
 
 from scrapy.exceptions import NotSupported
@@ -33,6 +35,61 @@ if TYPE_CHECKING:
 ResponseTypeVar = TypeVar("ResponseTypeVar", bound="Response")
 
 
+class SpooledBody:
+    """Response body that was written to a file instead of being kept in
+    memory, see :reqmeta:`download_spool_size`.
+
+    It owns *file*, a temporary file that is removed when it is closed, be it
+    explicitly with :meth:`close` or when it is garbage-collected.
+    """
+
+    def __init__(self, file: IO[bytes]):
+        self._file: IO[bytes] | None = file
+        file.flush()
+        self.size: int = os.fstat(file.fileno()).st_size
+
+    @property
+    def closed(self) -> bool:
+        """Whether :meth:`close` was called."""
+        return self._file is None
+
+    def open(self) -> mmap.mmap:
+        """Return a new read-only memory map of the body.
+
+        The map can be used as :class:`bytes` (slicing, ``find()``, regular
+        expressions) and as a binary file (``read()``, ``seek()``) without
+        loading the body in memory. Each map has its own file position, and
+        remains valid after :meth:`close` until it is closed itself.
+        """
+        if self._file is None:
+            raise ValueError("I/O operation on a closed spooled body")
+        return mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def getvalue(self) -> bytes:
+        """Return the whole body as :class:`bytes`, loading it in memory."""
+        with self.open() as body:
+            return body[:]
+
+    def close(self) -> None:
+        """Close and remove the file of the body."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+    def __repr__(self) -> str:
+        state = "closed" if self.closed else "open"
+        return f"<{self.__class__.__name__} {state}, {self.size} bytes>"
+
+
 class Response(object_ref):
     """An object that represents an HTTP response, which is usually
     downloaded (by the Downloader) and fed to the Spiders for processing.
@@ -48,6 +105,7 @@ class Response(object_ref):
         "certificate",
         "ip_address",
         "protocol",
+        "spooled_body",
     )
     """A tuple of :class:`str` objects containing the name of all public
     attributes of the class that are also keyword parameters of the
@@ -67,6 +125,7 @@ class Response(object_ref):
         certificate: Certificate | None = None,
         ip_address: IPv4Address | IPv6Address | None = None,
         protocol: str | None = None,
+        spooled_body: SpooledBody | None = None,
     ):
         self.headers: Headers = Headers(headers or {})
         self.status: int = int(status)
@@ -77,6 +136,7 @@ class Response(object_ref):
         self.certificate: Certificate | None = certificate
         self.ip_address: IPv4Address | IPv6Address | None = ip_address
         self.protocol: str | None = protocol
+        self.spooled_body: SpooledBody | None = spooled_body
 
     @property
     def cb_kwargs(self) -> dict[str, Any]:
@@ -145,6 +205,9 @@ class Response(object_ref):
         self, *args: Any, cls: type[Response] | None = None, **kwargs: Any
     ) -> Response:
         """Create a new Response with the same attributes except for those given new values"""
+        if "body" in kwargs:
+            # a new body replaces the spooled one
+            kwargs.setdefault("spooled_body", None)
         for x in self.attributes:
             kwargs.setdefault(x, getattr(self, x))
         if cls is None:
@@ -15,14 +15,18 @@ from urllib.parse import urljoin, urlparse
 from lxml import etree  # nosec
 from parsel.csstranslator import HTMLTranslator
 from w3lib.html import strip_html5_whitespace
-from w3lib.url import canonicalize_url, safe_url_string
+from w3lib.url import safe_url_string
 
 from scrapy.link import Link
 from scrapy.linkextractors import IGNORED_EXTENSIONS, _is_valid_url, _matches
 from scrapy.utils.misc import arg_to_iter, rel_has_nofollow
 from scrapy.utils.python import unique as unique_list
 from scrapy.utils.response import get_base_url
-from scrapy.utils.url import url_has_any_extension, url_is_from_any_domain
+from scrapy.utils.url import (
+    canonicalize_url_cached,
+    url_has_any_extension,
+    url_is_from_any_domain,
+)
 
 if TYPE_CHECKING:
 
@@ -52,7 +56,7 @@ def _identity(x: Any) -> Any:
 
 
 def _canonicalize_link_url(link: Link) -> str:
-    return canonicalize_url(link.url, keep_fragments=True)
+    return canonicalize_url_cached(link.url, keep_fragments=True)
 
 
 class LxmlParserLinkExtractor:
@@ -252,7 +256,7 @@ class LxmlLinkExtractor:
         links = [x for x in links if self._link_allowed(x)]
         if self.canonicalize:
             for link in links:
-                link.url = canonicalize_url(link.url)
+                link.url = canonicalize_url_cached(link.url)
         links = self.link_extractor._process_links(links)
         return links
 
@@ -6,22 +6,42 @@ See documentation in docs/item-pipeline.rst
 
 from __future__ import annotations
 
+import time
+from functools import wraps
 from typing import TYPE_CHECKING, Any
 
+from twisted.internet.defer import Deferred
+
 from scrapy.middleware import MiddlewareManager
 from scrapy.utils.conf import build_component_list
 from scrapy.utils.defer import deferred_f_from_coro_f
+from scrapy.utils.python import global_object_name
 
 if TYPE_CHECKING:
-    from twisted.internet.defer import Deferred
+    from collections.abc import Callable
+
+    # typing.Self requires Python 3.11
+    from typing_extensions import Self
 
     from scrapy import Spider
+    from scrapy.crawler import Crawler
     from scrapy.settings import Settings
+    from scrapy.statscollectors import StatsCollector
 
 
 class ItemPipelineManager(MiddlewareManager):
     component_name = "item pipeline"
 
+    def __init__(self, *middlewares: Any) -> None:
+        self.stats: StatsCollector | None = None
+        super().__init__(*middlewares)
+
+    @classmethod
+    def from_crawler(cls, crawler: Crawler) -> Self:
+        manager = super().from_crawler(crawler)
+        manager.stats = crawler.stats
+        return manager
+
     @classmethod
     def _get_mwlist_from_settings(cls, settings: Settings) -> list[Any]:
         # 从配置文件加载ITEM_PIPELINES_BASE和ITEM_PIPELINES类
@@ -32,9 +52,45 @@ class ItemPipelineManager(MiddlewareManager):
         # 定义默认的pipeline处理逻辑
         if hasattr(pipe, "process_item"):
             self.methods["process_item"].append(
-                deferred_f_from_coro_f(pipe.process_item)
+                self._timed(
+                    global_object_name(pipe.__class__),
+                    deferred_f_from_coro_f(pipe.process_item),
+                )
             )
 
+    def _timed(
+        self, name: str, process_item: Callable[[Any, Spider], Any]
+    ) -> Callable[[Any, Spider], Any]:
+        """Wrap the ``process_item`` method of a pipeline to record the number
+        of items it processes and the time it takes, in stats."""
+
+        @wraps(process_item)
+        def f(item: Any, spider: Spider) -> Any:
+            if self.stats is None:
+                return process_item(item, spider)
+            start = time.monotonic()
+            try:
+                result = process_item(item, spider)
+            except Exception:
+                self._record_time(None, name, start, spider)
+                raise
+            if isinstance(result, Deferred):
+                return result.addBoth(self._record_time, name, start, spider)
+            self._record_time(None, name, start, spider)
+            return result
+
+        return f
+
+    def _record_time(self, result: Any, name: str, start: float, spider: Spider) -> Any:
+        assert self.stats is not None  # typing
+        # stats counters are integers
+        elapsed = round((time.monotonic() - start) * 1_000_000)
+        prefix = f"item_pipeline/{name}"
+        self.stats.inc_value(f"{prefix}/items", spider=spider)
+        self.stats.inc_value(f"{prefix}/time_microseconds", elapsed, spider=spider)
+        self.stats.max_value(f"{prefix}/time_max_microseconds", elapsed, spider=spider)
+        return result
+
     def process_item(self, item: Any, spider: Spider) -> Deferred[Any]:
         # 依次调用所有子类的process_item方法
         return self._process_chain("process_item", item, spider)
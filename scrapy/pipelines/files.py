@@ -11,6 +11,7 @@ import functools
 import hashlib
 import logging
 import mimetypes
+import shutil
 import time
 from collections import defaultdict
 from contextlib import suppress
@@ -119,7 +120,9 @@ class FSFilesStore:
     ) -> None:
         absolute_path = self._get_filesystem_path(path)
         self._mkdir(absolute_path.parent, info)
-        absolute_path.write_bytes(buf.getvalue())
+        buf.seek(0)
+        with absolute_path.open("wb") as f:
+            shutil.copyfileobj(buf, f)
 
     def stat_file(
         self, path: str | PathLike[str], info: MediaPipeline.SpiderInfo
@@ -337,9 +340,10 @@ class GCSFilesStore:
         blob = self.bucket.blob(blob_path)
         blob.cache_control = self.CACHE_CONTROL
         blob.metadata = {k: str(v) for k, v in (meta or {}).items()}
+        buf.seek(0)
         return deferToThread(
             blob.upload_from_string,
-            data=buf.getvalue(),
+            data=buf.read(),
             content_type=self._get_content_type(headers),
             predefined_acl=self.POLICY,
         )
@@ -590,7 +594,7 @@ class FilesPipeline(MediaPipeline):
             )
             raise FileException("download-error")
 
-        if not response.body:
+        if not response.body and response.spooled_body is None:
             logger.warning(
                 "File (empty-content): Empty file from %(request)s referred "
                 "in <%(referer)s>: no-content",
@@ -658,10 +662,21 @@ class FilesPipeline(MediaPipeline):
         item: Any = None,
     ) -> str:
         path = self.file_path(request, response=response, info=info, item=item)
-        buf = BytesIO(response.body)
+        if response.spooled_body is None:
+            buf = BytesIO(response.body)
+        else:
+            # a memory map of the spooled body works as a file without
+            # loading the body in memory
+            buf = cast(BytesIO, response.spooled_body.open())
         checksum = _md5sum(buf)
         buf.seek(0)
-        self.store.persist_file(path, buf, info)
+        dfd = self.store.persist_file(path, buf, info)
+        if response.spooled_body is not None:
+            # remote stores upload the body from a thread
+            if isinstance(dfd, Deferred):
+                dfd.addBoth(self._close_after, buf)
+            else:
+                buf.close()
         return checksum
 
     def item_completed(
@@ -193,7 +193,13 @@ class ImagesPipeline(FilesPipeline):
         item: Any = None,
     ) -> Iterable[tuple[str, Image.Image, BytesIO]]:
         path = self.file_path(request, response=response, info=info, item=item)
-        orig_image = self._Image.open(BytesIO(response.body))
+        # images are decoded in memory anyway
+        body = (
+            response.body
+            if response.spooled_body is None
+            else response.spooled_body.getvalue()
+        )
+        orig_image = self._Image.open(BytesIO(body))
 
         width, height = orig_image.size
         if width < self.min_width or height < self.min_height:
@@ -217,9 +223,7 @@ class ImagesPipeline(FilesPipeline):
         if self._deprecated_convert_image:
             image, buf = self.convert_image(orig_image)
         else:
-            image, buf = self.convert_image(
-                orig_image, response_body=BytesIO(response.body)
-            )
+            image, buf = self.convert_image(orig_image, response_body=BytesIO(body))
         yield path, image, buf
 
         for thumb_id, size in self.thumbs.items():
@@ -5,6 +5,7 @@ import logging
 from abc import ABC, abstractmethod
 from collections import defaultdict
 from typing import (
+    IO,
     TYPE_CHECKING,
     Any,
     Literal,
@@ -15,7 +16,7 @@ from typing import (
     cast,
 )
 
-from twisted.internet.defer import Deferred, DeferredList
+from twisted.internet.defer import Deferred, DeferredList, maybeDeferred
 from twisted.python.failure import Failure
 
 from scrapy.http.request import NO_CALLBACK, Request
@@ -34,6 +35,7 @@ if TYPE_CHECKING:
     from scrapy import Spider
     from scrapy.crawler import Crawler
     from scrapy.http import Response
+    from scrapy.http.response import SpooledBody
     from scrapy.utils.request import RequestFingerprinter
 
 
@@ -194,11 +196,29 @@ class MediaPipeline(ABC):
             assert self.crawler.engine
             dfd = self.crawler.engine.download(request)
         dfd2: Deferred[FileInfo] = dfd.addCallback(
-            self.media_downloaded, request, info, item=item
+            self._media_downloaded, request, info, item=item
         )
         dfd2.addErrback(self.media_failed, request, info)
         return dfd2
 
+    def _media_downloaded(
+        self, response: Response, request: Request, info: SpiderInfo, item: Any
+    ) -> FileInfo | Deferred[FileInfo]:
+        if response.spooled_body is None:
+            return self.media_downloaded(response, request, info, item=item)
+        # memory maps opened from the spooled body remain valid once it is
+        # closed, so media_downloaded() may keep using them
+        spooled_body = response.spooled_body
+        dfd: Deferred[FileInfo] = maybeDeferred(
+            self.media_downloaded, response, request, info, item=item
+        )
+        return dfd.addBoth(self._close_after, spooled_body)
+
+    @staticmethod
+    def _close_after(result: _T, file: SpooledBody | IO[bytes]) -> _T:
+        file.close()
+        return result
+
     def _cache_result_and_execute_waiters(
         self, result: FileInfo | Failure, fp: bytes, info: SpiderInfo
     ) -> None:
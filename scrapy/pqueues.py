@@ -1,15 +1,23 @@
 from __future__ import annotations
 
 import hashlib
+import heapq
 import logging
-from typing import TYPE_CHECKING, Protocol, cast
+import pickle  # nosec
+import sqlite3
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Protocol, cast
 
-from scrapy import Request
+from queuelib import queue
+
+from scrapy import Request, signals
 from scrapy.core.downloader import Downloader
+from scrapy.squeues import _CompactRequestCodec, _pickle_serialize
 from scrapy.utils.misc import build_from_crawler
+from scrapy.utils.request import request_from_dict
 
 if TYPE_CHECKING:
-    from collections.abc import Iterable
+    from collections.abc import Callable, Iterable
 
     # typing.Self requires Python 3.11
     from typing_extensions import Self
@@ -67,7 +75,8 @@ class ScrapyPriorityQueue:
     a new priority is allocated.
 
     Only integer priorities should be used. Lower numbers are higher
-    priorities.
+    priorities. Active priorities are kept in a heap, so that pushing and
+    popping are O(log P), P being the number of active priorities.
 
     startprios is a sequence of priorities to start with. If the queue was
     previously closed leaving some priority buckets non-empty, those priorities
@@ -96,17 +105,35 @@ class ScrapyPriorityQueue:
         self.downstream_queue_cls: type[QueueProtocol] = downstream_queue_cls
         self.key: str = key
         self.queues: dict[int, QueueProtocol] = {}
-        self.curprio: int | None = None
+        # min-heap of the keys of self.queues, the top one is the current
+        # priority and its queue is never empty
+        self._prios: list[int] = []
+        self._len: int = 0
         self.init_prios(startprios)
 
+    @property
+    def curprio(self) -> int | None:
+        return self._prios[0] if self._prios else None
+
+    @property
+    def lastprio(self) -> int | None:
+        """The lowest active priority, i.e. the highest key, that of the
+        requests returned by :meth:`poplast`."""
+        return max(self._prios) if self._prios else None
+
     def init_prios(self, startprios: Iterable[int]) -> None:
         if not startprios:
             return
 
         for priority in startprios:
-            self.queues[priority] = self.qfactory(priority)
-
-        self.curprio = min(startprios)
+            q = self.qfactory(priority)
+            if q:
+                self.queues[priority] = q
+                self._len += len(q)
+            else:
+                q.close()
+        self._prios = list(self.queues)
+        heapq.heapify(self._prios)
 
     def qfactory(self, key: int) -> QueueProtocol:
         return build_from_crawler(
@@ -122,21 +149,46 @@ class ScrapyPriorityQueue:
         priority = self.priority(request)
         if priority not in self.queues:
             self.queues[priority] = self.qfactory(priority)
+            heapq.heappush(self._prios, priority)
         q = self.queues[priority]
-        q.push(request)  # this may fail (eg. serialization error)
-        if self.curprio is None or priority < self.curprio:
-            self.curprio = priority
+        try:
+            q.push(request)  # this may fail (eg. serialization error)
+        except Exception:
+            if not q:
+                del self.queues[priority]
+                self._prios.remove(priority)
+                heapq.heapify(self._prios)
+                q.close()
+            raise
+        self._len += 1
 
     def pop(self) -> Request | None:
-        if self.curprio is None:
+        if not self._prios:
+            return None
+        q = self.queues[self._prios[0]]
+        m = q.pop()
+        if m is not None:
+            self._len -= 1
+        if not q:
+            del self.queues[heapq.heappop(self._prios)]
+            q.close()
+        return m
+
+    def poplast(self) -> Request | None:
+        """Remove and return a request of the lowest priority. Used by the
+        scheduler to spill requests from memory to disk."""
+        priority = self.lastprio
+        if priority is None:
             return None
-        q = self.queues[self.curprio]
+        q = self.queues[priority]
         m = q.pop()
+        if m is not None:
+            self._len -= 1
         if not q:
-            del self.queues[self.curprio]
+            del self.queues[priority]
+            self._prios.remove(priority)
+            heapq.heapify(self._prios)
             q.close()
-            prios = [p for p, q in self.queues.items() if q]
-            self.curprio = min(prios) if prios else None
         return m
 
     def peek(self) -> Request | None:
@@ -146,9 +198,9 @@ class ScrapyPriorityQueue:
         Raises :exc:`NotImplementedError` if the underlying queue class does
         not implement a ``peek`` method, which is optional for queues.
         """
-        if self.curprio is None:
+        if not self._prios:
             return None
-        queue = self.queues[self.curprio]
+        queue = self.queues[self._prios[0]]
         # Protocols can't declare optional members
         return cast(Request, queue.peek())  # type: ignore[attr-defined]
 
@@ -160,7 +212,193 @@ class ScrapyPriorityQueue:
         return active
 
     def __len__(self) -> int:
-        return sum(len(x) for x in self.queues.values()) if self.queues else 0
+        return self._len
+
+
+class SqlitePriorityQueue:
+    """A priority queue that stores requests in a single SQLite database,
+    instead of one internal queue per priority value.
+
+    Requests are kept in one table, indexed by priority and push order, so
+    that both :meth:`push` and :meth:`pop` are O(log n) regardless of how many
+    distinct priorities are in use. The database is stored as
+    ``requests.sqlite`` inside the *key* directory, and uses `write-ahead
+    logging <https://www.sqlite.org/wal.html>`_. Pushed requests are inserted
+    in batches of :setting:`SCHEDULER_SQLITE_BATCH_SIZE`, and changes are
+    committed at most every :setting:`SCHEDULER_SQLITE_BATCH_SIZE` operations
+    and on :meth:`close`. A request that is still in the pending batch is
+    popped from memory if it comes first.
+
+    Requests of the same priority are returned in LIFO order if
+    *downstream_queue_cls* is a LIFO queue, and in FIFO order otherwise. No
+    downstream queue is instantiated, but requests are serialized the way
+    *downstream_queue_cls* serializes them: with :mod:`marshal` for the
+    ``Marshal*`` queues, with the compact encoding of the ``Compact*`` queues,
+    and with :mod:`pickle` otherwise.
+
+    Requests kept in memory need not be serializable, so if *key* is empty, as
+    is the case for the memory queue of the scheduler, a
+    :class:`ScrapyPriorityQueue` is returned instead.
+    """
+
+    _lifo_queue_classes = (queue.LifoDiskQueue, queue.LifoMemoryQueue)
+
+    @classmethod
+    def from_crawler(
+        cls,
+        crawler: Crawler,
+        downstream_queue_cls: type[QueueProtocol],
+        key: str,
+        startprios: Iterable[int] = (),
+    ) -> Self | ScrapyPriorityQueue:
+        if not key:
+            return ScrapyPriorityQueue(crawler, downstream_queue_cls, key, startprios)
+        return cls(crawler, downstream_queue_cls, key, startprios)
+
+    def __init__(
+        self,
+        crawler: Crawler,
+        downstream_queue_cls: type[QueueProtocol],
+        key: str,
+        startprios: Iterable[int] = (),
+    ):
+        if startprios:
+            raise ValueError(
+                f"{self.__class__.__name__} got a list of start priorities. Most "
+                "likely, it means the state is created by an incompatible priority "
+                "queue. Only a crawl started with the same priority queue class "
+                "can be resumed."
+            )
+        self.crawler: Crawler = crawler
+        self.key: str = key
+        self.batch_size: int = max(
+            crawler.settings.getint("SCHEDULER_SQLITE_BATCH_SIZE"), 1
+        )
+        self._lifo: bool = issubclass(downstream_queue_cls, self._lifo_queue_classes)
+        Path(key).mkdir(parents=True, exist_ok=True)
+        self._codec: _CompactRequestCodec | None = None
+        self._saved_strings: int = 0
+        self._serialize: Callable[[Any], bytes] = _pickle_serialize
+        self._deserialize: Callable[[bytes], Any] = pickle.loads
+        if getattr(downstream_queue_cls, "_codec_class", None):
+            self._codec = downstream_queue_cls._codec_class(  # type: ignore[attr-defined]
+                Path(key, "requests.sqlite.strings"),
+                crawler.settings.get("SCHEDULER_DISK_QUEUE_COMPRESSION"),
+            )
+            self._serialize = self._codec.encode
+            self._deserialize = self._codec.decode
+            self._saved_strings = len(self._codec.strings)
+        elif hasattr(downstream_queue_cls, "_serialize"):
+            self._serialize = downstream_queue_cls._serialize
+            self._deserialize = downstream_queue_cls._deserialize  # type: ignore[attr-defined]
+        self._db = sqlite3.connect(Path(key, "requests.sqlite"))
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS requests ("
+            "id INTEGER PRIMARY KEY, priority INTEGER NOT NULL, "
+            "seq INTEGER NOT NULL, request BLOB NOT NULL)"
+        )
+        self._db.execute(
+            "CREATE INDEX IF NOT EXISTS requests_order ON requests (priority, seq)"
+        )
+        self._db.commit()
+        self._lastid: int = self._db.execute(
+            "SELECT COALESCE(MAX(id), 0) FROM requests"
+        ).fetchone()[0]
+        self._len: int = self._db.execute("SELECT COUNT(*) FROM requests").fetchone()[0]
+        self._batch: list[tuple[int, int, int, bytes]] = []
+        self._uncommitted: int = 0
+
+    def priority(self, request: Request) -> int:
+        return -request.priority
+
+    def push(self, request: Request) -> None:
+        data = self._serialize(request.to_dict(spider=self.crawler.spider))
+        self._lastid += 1
+        seq = -self._lastid if self._lifo else self._lastid
+        self._batch.append((self._lastid, self.priority(request), seq, data))
+        self._len += 1
+        if len(self._batch) >= self.batch_size:
+            self._flush()
+
+    def _flush(self) -> None:
+        if self._batch:
+            self._db.executemany(
+                "INSERT INTO requests (id, priority, seq, request) VALUES (?, ?, ?, ?)",
+                self._batch,
+            )
+            self._uncommitted += len(self._batch)
+            self._batch.clear()
+        if self._uncommitted >= self.batch_size:
+            self._commit()
+
+    def _commit(self) -> None:
+        # committed rows must not refer to strings missing from the saved
+        # string table
+        if self._codec is not None and len(self._codec.strings) > self._saved_strings:
+            self._codec.close()
+            self._saved_strings = len(self._codec.strings)
+        self._db.commit()
+        self._uncommitted = 0
+
+    def _first(self) -> tuple[int | None, int, bytes] | None:
+        """Return the index in the pending batch, or ``None`` if it is in the
+        database, the id and the data of the next request."""
+        row = cast(
+            "tuple[int, int, int, bytes] | None",
+            self._db.execute(
+                "SELECT id, priority, seq, request FROM requests"
+                " ORDER BY priority, seq LIMIT 1"
+            ).fetchone(),
+        )
+        if self._batch:
+            index = min(range(len(self._batch)), key=lambda i: self._batch[i][1:3])
+            id_, priority, seq, data = self._batch[index]
+            if row is None or (priority, seq) < row[1:3]:
+                return index, id_, data
+        if row is None:
+            return None
+        return None, row[0], row[3]
+
+    def _request(self, data: bytes) -> Request:
+        request_dict: dict[str, Any] = self._deserialize(data)  # nosec
+        return request_from_dict(request_dict, spider=self.crawler.spider)
+
+    def pop(self) -> Request | None:
+        first = self._first()
+        if first is None:
+            return None
+        index, id_, data = first
+        if index is None:
+            self._db.execute("DELETE FROM requests WHERE id = ?", (id_,))
+            self._uncommitted += 1
+            if self._uncommitted >= self.batch_size:
+                self._commit()
+        else:
+            del self._batch[index]
+        self._len -= 1
+        return self._request(data)
+
+    def peek(self) -> Request | None:
+        """Returns the next object to be returned by :meth:`pop`,
+        but without removing it from the queue.
+        """
+        first = self._first()
+        if first is None:
+            return None
+        return self._request(first[2])
+
+    def close(self) -> list[int]:
+        self._flush()
+        if self._codec is not None:
+            self._codec.close(keep=self._len > 0)
+        self._db.commit()
+        self._db.close()
+        return []
+
+    def __len__(self) -> int:
+        return self._len
 
 
 class DownloaderInterface:
@@ -185,6 +423,16 @@ class DownloaderAwarePriorityQueue:
     """PriorityQueue which takes Downloader activity into account:
     domains (slots) with the least amount of active downloads are dequeued
     first.
+
+    Active downloads are counted from the
+    :signal:`request_reached_downloader` and :signal:`request_left_downloader`
+    signals, and slots are kept in a min-heap keyed by that count, so that
+    choosing the next slot does not need to look at every slot.
+
+    Until the first :signal:`request_reached_downloader` signal is received,
+    e.g. with a custom downloader that does not send these signals, the
+    ``active`` downloads of every slot in ``downloader.slots`` are counted
+    instead, on every pop.
     """
 
     @classmethod
@@ -229,6 +477,26 @@ class DownloaderAwarePriorityQueue:
         for slot, startprios in (slot_startprios or {}).items():
             self.pqueues[slot] = self.pqfactory(slot, startprios)
 
+        # slot -> active downloads, only for slots with active downloads
+        self._active: dict[str, int] = {}
+        for slot in self._downloader_interface.downloader.slots:
+            active = self._downloader_interface._active_downloads(slot)
+            if active:
+                self._active[slot] = active
+        # (active downloads, slot) entries of the slots in self.pqueues, an
+        # entry is stale if its count is outdated or its slot has no queue
+        self._heap: list[tuple[int, str]] = [
+            (self._active.get(slot, 0), slot) for slot in self.pqueues
+        ]
+        heapq.heapify(self._heap)
+        self._signals: bool = False
+        crawler.signals.connect(
+            self._request_reached_downloader, signals.request_reached_downloader
+        )
+        crawler.signals.connect(
+            self._request_left_downloader, signals.request_left_downloader
+        )
+
     def pqfactory(
         self, slot: str, startprios: Iterable[int] = ()
     ) -> ScrapyPriorityQueue:
@@ -239,23 +507,79 @@ class DownloaderAwarePriorityQueue:
             startprios,
         )
 
-    def pop(self) -> Request | None:
-        stats = self._downloader_interface.stats(self.pqueues)
+    def _request_reached_downloader(self, request: Request) -> None:
+        self._signals = True
+        slot = self._downloader_interface.get_slot_key(request)
+        self._set_active(slot, self._active.get(slot, 0) + 1)
 
-        if not stats:
-            return None
+    def _request_left_downloader(self, request: Request) -> None:
+        slot = self._downloader_interface.get_slot_key(request)
+        self._set_active(slot, self._active.get(slot, 0) - 1)
+
+    def _set_active(self, slot: str, active: int) -> None:
+        if active > 0:
+            self._active[slot] = active
+        else:
+            self._active.pop(slot, None)
+            active = 0
+        if slot in self.pqueues:
+            self._heappush(active, slot)
+
+    def _heappush(self, active: int, slot: str) -> None:
+        if len(self._heap) > 2 * len(self.pqueues) + 64:
+            # drop stale entries
+            self._heap = [(self._active.get(s, 0), s) for s in self.pqueues]
+            heapq.heapify(self._heap)
+        heapq.heappush(self._heap, (active, slot))
+
+    def _next_slot(self) -> str | None:
+        if not self._signals:
+            if not self.pqueues:
+                return None
+            stats = self._downloader_interface.stats(self.pqueues)
+            return min(stats)[1]
+        heap = self._heap
+        while heap:
+            active, slot = heap[0]
+            if slot in self.pqueues and active == self._active.get(slot, 0):
+                return slot
+            heapq.heappop(heap)
+        return None
 
-        slot = min(stats)[1]
+    def pop(self) -> Request | None:
+        slot = self._next_slot()
+        if slot is None:
+            return None
         queue = self.pqueues[slot]
         request = queue.pop()
         if len(queue) == 0:
             del self.pqueues[slot]
         return request
 
+    @property
+    def lastprio(self) -> int | None:
+        """The lowest active priority among all slots, see
+        :attr:`ScrapyPriorityQueue.lastprio`."""
+        prios = [q.lastprio for q in self.pqueues.values()]
+        return max((p for p in prios if p is not None), default=None)
+
+    def poplast(self) -> Request | None:
+        """Remove and return a request of the lowest priority among all
+        slots, see :meth:`ScrapyPriorityQueue.poplast`."""
+        priority = self.lastprio
+        if priority is None:
+            return None
+        slot = next(s for s, q in self.pqueues.items() if q.lastprio == priority)
+        request = self.pqueues[slot].poplast()
+        if len(self.pqueues[slot]) == 0:
+            del self.pqueues[slot]
+        return request
+
     def push(self, request: Request) -> None:
         slot = self._downloader_interface.get_slot_key(request)
         if slot not in self.pqueues:
             self.pqueues[slot] = self.pqfactory(slot)
+            self._heappush(self._active.get(slot, 0), slot)
         queue = self.pqueues[slot]
         queue.push(request)
 
@@ -266,16 +590,22 @@ class DownloaderAwarePriorityQueue:
         Raises :exc:`NotImplementedError` if the underlying queue class does
         not implement a ``peek`` method, which is optional for queues.
         """
-        stats = self._downloader_interface.stats(self.pqueues)
-        if not stats:
+        slot = self._next_slot()
+        if slot is None:
             return None
-        slot = min(stats)[1]
         queue = self.pqueues[slot]
         return queue.peek()
 
     def close(self) -> dict[str, list[int]]:
+        self.crawler.signals.disconnect(
+            self._request_reached_downloader, signals.request_reached_downloader
+        )
+        self.crawler.signals.disconnect(
+            self._request_left_downloader, signals.request_left_downloader
+        )
         active = {slot: queue.close() for slot, queue in self.pqueues.items()}
         self.pqueues.clear()
+        self._heap.clear()
         return active
 
     def __len__(self) -> int:
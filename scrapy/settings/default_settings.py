@@ -17,6 +17,14 @@ import sys
 from importlib import import_module
 from pathlib import Path
 
+ADAPTIVE_CONCURRENCY_ENABLED = False
+ADAPTIVE_CONCURRENCY_BACKOFF = 0.5
+ADAPTIVE_CONCURRENCY_DEBUG = False
+ADAPTIVE_CONCURRENCY_ERROR_HTTP_CODES = [429, 502, 503, 504]
+ADAPTIVE_CONCURRENCY_LATENCY_TOLERANCE = 2.0
+ADAPTIVE_CONCURRENCY_MAX = 16
+ADAPTIVE_CONCURRENCY_MIN = 1
+
 ADDONS = {}
 
 AJAXCRAWL_ENABLED = False
@@ -31,6 +39,9 @@ AUTOTHROTTLE_TARGET_CONCURRENCY = 1.0
 
 BOT_NAME = "scrapybot"
 
+CALLBACK_PROCESS_POOL_ENABLED = False
+CALLBACK_PROCESS_POOL_SIZE = 0
+
 CLOSESPIDER_TIMEOUT = 0
 CLOSESPIDER_PAGECOUNT = 0
 CLOSESPIDER_ITEMCOUNT = 0
@@ -66,6 +77,7 @@ DNS_RESOLVER = "scrapy.resolver.CachingThreadedResolver"
 DNS_TIMEOUT = 60
 
 DOWNLOAD_DELAY = 0
+DOWNLOAD_DELAY_TIMER_RESOLUTION = 0
 
 DOWNLOAD_HANDLERS = {}
 DOWNLOAD_HANDLERS_BASE = {
@@ -77,6 +89,17 @@ DOWNLOAD_HANDLERS_BASE = {
     "ftp": "scrapy.core.downloader.handlers.ftp.FTPDownloadHandler",
 }
 
+DOWNLOAD_POOL_IDLE_TIMEOUT = 240
+DOWNLOAD_POOL_MAXSIZE = 0
+
+DOWNLOAD_RATE_LIMIT = 0
+DOWNLOAD_RATE_LIMIT_BURST = 1
+DOWNLOAD_RATE_LIMIT_GROUP = None
+DOWNLOAD_RATE_LIMIT_GROUPS = {}
+DOWNLOAD_RATE_LIMITER = "scrapy.core.downloader.ratelimit.RateLimiter"
+
+DOWNLOAD_SLOT_PRIORITY_QUEUE = False
+
 DOWNLOAD_TIMEOUT = 180  # 3mins
 
 DOWNLOAD_MAXSIZE = 1024 * 1024 * 1024  # 1024m
@@ -97,6 +120,8 @@ DOWNLOADER_CLIENT_TLS_CIPHERS = "DEFAULT"
 DOWNLOADER_CLIENT_TLS_METHOD = "TLS"
 DOWNLOADER_CLIENT_TLS_VERBOSE_LOGGING = False
 
+DOWNLOADER_MAX_ACTIVE_SIZE = 0
+
 DOWNLOADER_MIDDLEWARES = {}
 
 DOWNLOADER_MIDDLEWARES_BASE = {
@@ -121,7 +146,11 @@ DOWNLOADER_MIDDLEWARES_BASE = {
 
 DOWNLOADER_STATS = True
 
+DUPEFILTER_BLOOM_CAPACITY = 1000000
+DUPEFILTER_BLOOM_CHECKPOINT_SIZE = 1000000
+DUPEFILTER_BLOOM_ERROR_RATE = 0.001
 DUPEFILTER_CLASS = "scrapy.dupefilters.RFPDupeFilter"
+DUPEFILTER_MMAP_TAIL_SIZE = 10000
 
 EDITOR = "vi"
 if sys.platform == "win32":
@@ -139,6 +168,7 @@ EXTENSIONS_BASE = {
     "scrapy.extensions.logstats.LogStats": 0,
     "scrapy.extensions.spiderstate.SpiderState": 0,
     "scrapy.extensions.throttle.AutoThrottle": 0,
+    "scrapy.extensions.throttle.AdaptiveConcurrency": 0,
 }
 
 FEED_TEMPDIR = None
@@ -206,8 +236,13 @@ ITEM_PROCESSOR = "scrapy.pipelines.ItemPipelineManager"
 
 ITEM_PIPELINES = {}
 ITEM_PIPELINES_BASE = {}
+ITEM_PIPELINE_CONCURRENCY = 0
 
 JOBDIR = None
+JOBDIR_FLUSH_INTERVAL = 1.0
+JOBDIR_FLUSH_SIZE = 65536
+JOBDIR_FSYNC = False
+JOBDIR_QUEUE_FLUSH_SIZE = 0
 
 LOG_ENABLED = True
 LOG_ENCODING = "utf-8"
@@ -261,6 +296,7 @@ REFERER_ENABLED = True
 REFERRER_POLICY = "scrapy.spidermiddlewares.referer.DefaultReferrerPolicy"
 
 REQUEST_FINGERPRINTER_CLASS = "scrapy.utils.request.RequestFingerprinter"
+REQUEST_FINGERPRINTER_HASH = None
 REQUEST_FINGERPRINTER_IMPLEMENTATION = "SENTINEL"
 
 RETRY_ENABLED = True
@@ -289,10 +325,18 @@ ROBOTSTXT_USER_AGENT = None
 
 SCHEDULER = "scrapy.core.scheduler.Scheduler"
 SCHEDULER_DISK_QUEUE = "scrapy.squeues.PickleLifoDiskQueue"
+SCHEDULER_DISK_QUEUE_COMPRESSION = None
+SCHEDULER_DISPATCH_BATCH_SIZE = 1
 SCHEDULER_MEMORY_QUEUE = "scrapy.squeues.LifoMemoryQueue"
 SCHEDULER_PRIORITY_QUEUE = "scrapy.pqueues.ScrapyPriorityQueue"
+SCHEDULER_SPILL_BYTES = 0
+SCHEDULER_SPILL_COUNT = 0
+SCHEDULER_SPILL_REFILL_SIZE = 1000
+SCHEDULER_SQLITE_BATCH_SIZE = 100
 
+SCRAPER_PREPARSE_THREADS = 0
 SCRAPER_SLOT_MAX_ACTIVE_SIZE = 5000000
+SCRAPER_SLOT_SIZE_ESTIMATOR = "scrapy.core.scraper.BodySizeEstimator"
 
 SPIDER_LOADER_CLASS = "scrapy.spiderloader.SpiderLoader"
 SPIDER_LOADER_WARN_ONLY = False
@@ -319,6 +363,8 @@ TEMPLATES_DIR = str((Path(__file__).parent / ".." / "templates").resolve())
 
 URLLENGTH_LIMIT = 2083
 
+URL_CANONICALIZATION_CACHE_SIZE = 10000
+
 USER_AGENT = f'Scrapy/{import_module("scrapy").__version__} (+https://scrapy.org)'
 
 TELNETCONSOLE_ENABLED = 1
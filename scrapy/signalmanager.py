@@ -1,14 +1,12 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING, Any
+from typing import Any
 
 from pydispatch import dispatcher
+from twisted.internet.defer import Deferred, succeed
 
 from scrapy.utils import signal as _signal
 
-if TYPE_CHECKING:
-    from twisted.internet.defer import Deferred
-
 
 class SignalManager:
     def __init__(self, sender: Any = dispatcher.Anonymous):
@@ -40,6 +38,18 @@ class SignalManager:
         kwargs.setdefault("sender", self.sender)
         dispatcher.disconnect(receiver, signal, **kwargs)
 
+    def has_receivers(self, signal: Any, **kwargs: Any) -> bool:
+        """
+        Return whether any receiver is connected to the given signal.
+
+        Senders of frequent signals can use it to avoid building signal
+        arguments that nobody would receive.
+
+        :param signal: the signal to check
+        :type signal: object
+        """
+        return _signal.has_receivers(signal, kwargs.get("sender", self.sender))
+
     def send_catch_log(self, signal: Any, **kwargs: Any) -> list[tuple[Any, Any]]:
         """
         Send a signal, catch exceptions and log them.
@@ -48,6 +58,8 @@ class SignalManager:
         through the :meth:`connect` method).
         """
         kwargs.setdefault("sender", self.sender)
+        if not _signal.has_receivers(signal, kwargs["sender"]):
+            return []
         return _signal.send_catch_log(signal, **kwargs)
 
     def send_catch_log_deferred(
@@ -64,6 +76,8 @@ class SignalManager:
         through the :meth:`connect` method).
         """
         kwargs.setdefault("sender", self.sender)
+        if not _signal.has_receivers(signal, kwargs["sender"]):
+            return succeed([])
         return _signal.send_catch_log_deferred(signal, **kwargs)
 
     def disconnect_all(self, signal: Any, **kwargs: Any) -> None:
@@ -4,8 +4,14 @@ Scheduler queues
 
 from __future__ import annotations
 
+import json
 import marshal
+import os
 import pickle  # nosec
+import struct
+import time
+import zlib
+from collections import deque
 from pathlib import Path
 from typing import TYPE_CHECKING, Any
 
@@ -22,6 +28,166 @@ if TYPE_CHECKING:
 
     from scrapy import Request
     from scrapy.crawler import Crawler
+    from scrapy.statscollectors import StatsCollector
+
+
+def _record_flush(stats: StatsCollector | None, nbytes: int, start: float) -> None:
+    if stats:
+        prefix = "jobdir/queue"
+        stats.inc_value(f"{prefix}/bytes_written", nbytes)
+        stats.inc_value(f"{prefix}/flushes")
+        stats.max_value(f"{prefix}/flush_latency_max", time.perf_counter() - start)
+
+
+class _BufferedFifoDiskQueue(queue.FifoDiskQueue):
+    """:class:`queuelib.queue.FifoDiskQueue` that, if *flush_size* is set,
+    keeps pushed items in memory until they add up to *flush_size* bytes,
+    and then writes them to disk with one write per chunk file.
+
+    Buffered items are newer than any item on disk, so they are popped only
+    once the items on disk are exhausted.
+    """
+
+    def __init__(
+        self, path: str | PathLike, chunksize: int = 100000, flush_size: int = 0
+    ):
+        super().__init__(path, chunksize)
+        self.flush_size: int = flush_size
+        self.stats: StatsCollector | None = None
+        self._buffer: deque[bytes] = deque()
+        self._buffered: int = 0
+
+    def push(self, string: bytes) -> None:
+        if not self.flush_size:
+            super().push(string)
+            return
+        if not isinstance(string, bytes):
+            raise TypeError(f"Unsupported type: {type(string).__name__}")
+        self._buffer.append(string)
+        self._buffered += len(string)
+        if self._buffered >= self.flush_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._buffer:
+            return
+        start = time.perf_counter()
+        hnum, hpos = self.info["head"]
+        nbytes = 0
+        parts: list[bytes] = []
+        for string in self._buffer:
+            parts.append(struct.pack(self.szhdr_format, len(string)))
+            parts.append(string)
+            hpos += 1
+            if hpos == self.chunksize:
+                data = b"".join(parts)
+                os.write(self.headf.fileno(), data)
+                nbytes += len(data)
+                parts = []
+                hpos = 0
+                hnum += 1
+                self.headf.close()
+                self.headf = self._openchunk(hnum, "ab+")
+        if parts:
+            data = b"".join(parts)
+            os.write(self.headf.fileno(), data)
+            nbytes += len(data)
+        self.info["size"] += len(self._buffer)
+        self.info["head"] = [hnum, hpos]
+        self._buffer.clear()
+        self._buffered = 0
+        _record_flush(self.stats, nbytes, start)
+
+    def pop(self) -> bytes | None:
+        if self.info["size"] or not self._buffer:
+            return super().pop()
+        string = self._buffer.popleft()
+        self._buffered -= len(string)
+        return string
+
+    def peek(self) -> bytes | None:
+        if self.info["size"] or not self._buffer:
+            return super().peek()
+        return self._buffer[0]
+
+    def clear(self) -> None:
+        self._buffer.clear()
+        self._buffered = 0
+        super().clear()
+
+    def close(self) -> None:
+        self.flush()
+        super().close()
+
+    def __len__(self) -> int:
+        return super().__len__() + len(self._buffer)
+
+
+class _BufferedLifoDiskQueue(queue.LifoDiskQueue):
+    """:class:`queuelib.queue.LifoDiskQueue` that, if *flush_size* is set,
+    keeps pushed items in memory until they add up to *flush_size* bytes,
+    and then writes them to disk at once.
+
+    Buffered items are the newest ones, so they are popped first, without
+    touching the disk.
+    """
+
+    def __init__(self, path: str | PathLike, flush_size: int = 0):
+        super().__init__(path)
+        self.flush_size: int = flush_size
+        self.stats: StatsCollector | None = None
+        self._buffer: list[bytes] = []
+        self._buffered: int = 0
+
+    def push(self, string: bytes) -> None:
+        if not self.flush_size:
+            super().push(string)
+            return
+        if not isinstance(string, bytes):
+            raise TypeError(f"Unsupported type: {type(string).__name__}")
+        self._buffer.append(string)
+        self._buffered += len(string)
+        if self._buffered >= self.flush_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._buffer:
+            return
+        start = time.perf_counter()
+        data = b"".join(
+            string + struct.pack(self.SIZE_FORMAT, len(string))
+            for string in self._buffer
+        )
+        self.f.seek(0, os.SEEK_END)
+        self.f.write(data)
+        self.size += len(self._buffer)
+        self._buffer.clear()
+        self._buffered = 0
+        _record_flush(self.stats, len(data), start)
+
+    def pop(self) -> bytes | None:
+        if not self._buffer:
+            return super().pop()
+        string = self._buffer.pop()
+        self._buffered -= len(string)
+        return string
+
+    def peek(self) -> bytes | None:
+        if not self._buffer:
+            return super().peek()
+        return self._buffer[-1]
+
+    def clear(self) -> None:
+        self._buffer.clear()
+        self._buffered = 0
+        super().clear()
+
+    def close(self) -> None:
+        self.flush()
+        super().close()
+
+    def __len__(self) -> int:
+        return super().__len__() + len(self._buffer)
 
 
 def _with_mkdir(queue_class: type[queue.BaseQueue]) -> type[queue.BaseQueue]:
@@ -41,6 +207,9 @@ def _serializable_queue(
     deserialize: Callable[[bytes], Any],
 ) -> type[queue.BaseQueue]:
     class SerializableQueue(queue_class):  # type: ignore[valid-type,misc]
+        _serialize = staticmethod(serialize)
+        _deserialize = staticmethod(deserialize)
+
         def push(self, obj: Any) -> None:
             s = serialize(obj)
             super().push(s)
@@ -71,6 +240,257 @@ def _serializable_queue(
     return SerializableQueue
 
 
+def _write_varint(buf: bytearray, n: int) -> None:
+    while n >= 0x80:
+        buf.append((n & 0x7F) | 0x80)
+        n >>= 7
+    buf.append(n)
+
+
+def _read_varint(data: bytes, pos: int) -> tuple[int, int]:
+    result = shift = 0
+    while True:
+        b = data[pos]
+        pos += 1
+        result |= (b & 0x7F) << shift
+        if b < 0x80:
+            return result, pos
+        shift += 7
+
+
+def _write_bytes(buf: bytearray, b: bytes) -> None:
+    _write_varint(buf, len(b))
+    buf += b
+
+
+def _read_bytes(data: bytes, pos: int) -> tuple[bytes, int]:
+    size, pos = _read_varint(data, pos)
+    return data[pos : pos + size], pos + size
+
+
+class _CompactRequestCodec:
+    """Serializes the dicts returned by :meth:`Request.to_dict
+    <scrapy.Request.to_dict>` into compact, length-prefixed binary records.
+
+    Methods, callback and errback names, request classes, encodings and
+    header names are stored as varint indexes of a string table, which is
+    saved to *path* on :meth:`close`. Other fields use varints and
+    length-prefixed bytes. Meta, cookies and ``cb_kwargs`` are pickled only
+    when not empty; attributes of :class:`~scrapy.Request` subclasses are
+    always pickled.
+
+    If *compression* is ``"zlib"`` or ``"zstd"``, records of
+    :attr:`compression_threshold` bytes or more are compressed.
+    """
+
+    _RAW, _ZLIB, _ZSTD = 0, 1, 2
+    _DONT_FILTER, _EXTRA = 1, 2
+    _fields = frozenset(
+        (
+            "url",
+            "method",
+            "callback",
+            "errback",
+            "_class",
+            "encoding",
+            "priority",
+            "headers",
+            "body",
+            "flags",
+            "dont_filter",
+        )
+    )
+    # other fields of Request that are left out when empty, as that is their
+    # default value
+    _optional_fields = frozenset(("cookies", "meta", "cb_kwargs"))
+    compression_threshold = 1024
+
+    def __init__(self, path: Path | None = None, compression: str | None = None):
+        self.path: Path | None = path
+        self.strings: list[str] = []
+        self._string_ids: dict[str, int] = {}
+        if path and path.exists():
+            for string in json.loads(path.read_text(encoding="utf-8")):
+                self._intern(string)
+        self.compression: str | None = None
+        self.set_compression(compression)
+
+    def set_compression(self, compression: str | None) -> None:
+        if compression == "zstd":
+            self._zstd()
+        elif compression not in (None, "zlib"):
+            raise ValueError(f"Unsupported disk queue compression: {compression!r}")
+        self.compression = compression
+
+    @staticmethod
+    def _zstd() -> Any:
+        try:
+            import zstandard
+        except ImportError:
+            raise ValueError("zstd disk queue compression requires zstandard")
+        return zstandard
+
+    def _intern(self, string: str) -> int:
+        try:
+            return self._string_ids[string]
+        except KeyError:
+            index = self._string_ids[string] = len(self.strings)
+            self.strings.append(string)
+            return index
+
+    def _write_optional_string(self, buf: bytearray, string: str | None) -> None:
+        _write_varint(buf, 0 if string is None else self._intern(string) + 1)
+
+    def _read_optional_string(self, data: bytes, pos: int) -> tuple[str | None, int]:
+        index, pos = _read_varint(data, pos)
+        return (self.strings[index - 1] if index else None), pos
+
+    def encode(self, d: dict[str, Any]) -> bytes:
+        extra = {
+            key: value
+            for key, value in d.items()
+            if key not in self._fields and (value or key not in self._optional_fields)
+        }
+        buf = bytearray()
+        _write_varint(
+            buf,
+            (self._DONT_FILTER if d["dont_filter"] else 0)
+            | (self._EXTRA if extra else 0),
+        )
+        _write_bytes(buf, d["url"].encode())
+        _write_varint(buf, self._intern(d["method"]))
+        self._write_optional_string(buf, d["callback"])
+        self._write_optional_string(buf, d["errback"])
+        self._write_optional_string(buf, d.get("_class"))
+        _write_varint(buf, self._intern(d["encoding"]))
+        priority = d["priority"]
+        _write_varint(buf, priority << 1 if priority >= 0 else (-priority << 1) - 1)
+        headers = d["headers"]
+        _write_varint(buf, len(headers))
+        for name, values in headers.items():
+            _write_varint(buf, self._intern(name.decode("latin-1")))
+            _write_varint(buf, len(values))
+            for value in values:
+                _write_bytes(buf, value)
+        _write_bytes(buf, d["body"])
+        _write_varint(buf, len(d["flags"]))
+        for flag in d["flags"]:
+            _write_bytes(buf, flag.encode())
+        if extra:
+            _write_bytes(buf, _pickle_serialize(extra))
+        if self.compression and len(buf) >= self.compression_threshold:
+            if self.compression == "zstd":
+                compressed = self._zstd().ZstdCompressor().compress(bytes(buf))
+                return bytes((self._ZSTD,)) + compressed
+            return bytes((self._ZLIB,)) + zlib.compress(buf)
+        return bytes((self._RAW,)) + buf
+
+    def decode(self, record: bytes) -> dict[str, Any]:
+        if record[0] == self._ZSTD:
+            data = self._zstd().ZstdDecompressor().decompress(record[1:])
+        elif record[0] == self._ZLIB:
+            data = zlib.decompress(record[1:])
+        else:
+            data = record[1:]
+        strings = self.strings
+        flags, pos = _read_varint(data, 0)
+        url, pos = _read_bytes(data, pos)
+        method, pos = _read_varint(data, pos)
+        callback, pos = self._read_optional_string(data, pos)
+        errback, pos = self._read_optional_string(data, pos)
+        request_class, pos = self._read_optional_string(data, pos)
+        encoding, pos = _read_varint(data, pos)
+        priority, pos = _read_varint(data, pos)
+        count, pos = _read_varint(data, pos)
+        headers: dict[bytes, list[bytes]] = {}
+        for _ in range(count):
+            name, pos = _read_varint(data, pos)
+            num_values, pos = _read_varint(data, pos)
+            values = []
+            for _ in range(num_values):
+                value, pos = _read_bytes(data, pos)
+                values.append(value)
+            headers[strings[name].encode("latin-1")] = values
+        body, pos = _read_bytes(data, pos)
+        count, pos = _read_varint(data, pos)
+        request_flags = []
+        for _ in range(count):
+            flag, pos = _read_bytes(data, pos)
+            request_flags.append(flag.decode())
+        d: dict[str, Any] = {
+            "url": url.decode(),
+            "callback": callback,
+            "errback": errback,
+            "method": strings[method],
+            "headers": headers,
+            "body": body,
+            "encoding": strings[encoding],
+            "priority": priority >> 1 if not priority & 1 else -((priority + 1) >> 1),
+            "dont_filter": bool(flags & self._DONT_FILTER),
+            "flags": request_flags,
+        }
+        if request_class is not None:
+            d["_class"] = request_class
+        if flags & self._EXTRA:
+            extra, pos = _read_bytes(data, pos)
+            d.update(pickle.loads(extra))  # nosec
+        return d
+
+    def close(self, keep: bool = True) -> None:
+        """Save the string table to :attr:`path`, or remove it if *keep* is
+        ``False``."""
+        if not self.path:
+            return
+        if keep:
+            self.path.write_text(json.dumps(self.strings), encoding="utf-8")
+        elif self.path.exists():
+            self.path.unlink()
+
+
+def _compact_serialization_queue(
+    queue_class: type[queue.BaseQueue],
+) -> type[queue.BaseQueue]:
+    class CompactSerializationQueue(queue_class):  # type: ignore[valid-type,misc]
+        _codec_class = _CompactRequestCodec
+
+        def __init__(self, path: str | PathLike, *args: Any, **kwargs: Any):
+            compression = kwargs.pop("compression", None)
+            super().__init__(path, *args, **kwargs)
+            self.codec = _CompactRequestCodec(Path(f"{path}.strings"), compression)
+
+        def push(self, obj: dict[str, Any]) -> None:
+            super().push(self.codec.encode(obj))
+
+        def pop(self) -> dict[str, Any] | None:
+            s = super().pop()
+            if s:
+                return self.codec.decode(s)
+            return None
+
+        def peek(self) -> dict[str, Any] | None:
+            """Returns the next object to be returned by :meth:`pop`,
+            but without removing it from the queue.
+
+            Raises :exc:`NotImplementedError` if the underlying queue class does
+            not implement a ``peek`` method, which is optional for queues.
+            """
+            try:
+                s = super().peek()
+            except AttributeError as ex:
+                raise NotImplementedError(
+                    "The underlying queue class does not implement 'peek'"
+                ) from ex
+            if s:
+                return self.codec.decode(s)
+            return None
+
+        def close(self) -> None:
+            super().close()
+            self.codec.close(keep=len(self) > 0)
+
+    return CompactSerializationQueue
+
+
 def _scrapy_serialization_queue(
     queue_class: type[queue.BaseQueue],
 ) -> type[queue.BaseQueue]:
@@ -78,6 +498,13 @@ def _scrapy_serialization_queue(
         def __init__(self, crawler: Crawler, key: str):
             self.spider = crawler.spider
             super().__init__(key)
+            if isinstance(self, (_BufferedFifoDiskQueue, _BufferedLifoDiskQueue)):
+                self.flush_size = crawler.settings.getint("JOBDIR_QUEUE_FLUSH_SIZE")
+                self.stats = crawler.stats
+            if isinstance(getattr(self, "codec", None), _CompactRequestCodec):
+                self.codec.set_compression(
+                    crawler.settings.get("SCHEDULER_DISK_QUEUE_COMPRESSION")
+                )
 
         @classmethod
         def from_crawler(
@@ -147,16 +574,22 @@ def _pickle_serialize(obj: Any) -> bytes:
 
 # queue.*Queue aren't subclasses of queue.BaseQueue
 _PickleFifoSerializationDiskQueue = _serializable_queue(
-    _with_mkdir(queue.FifoDiskQueue), _pickle_serialize, pickle.loads  # type: ignore[arg-type]
+    _with_mkdir(_BufferedFifoDiskQueue), _pickle_serialize, pickle.loads  # type: ignore[arg-type]
 )
 _PickleLifoSerializationDiskQueue = _serializable_queue(
-    _with_mkdir(queue.LifoDiskQueue), _pickle_serialize, pickle.loads  # type: ignore[arg-type]
+    _with_mkdir(_BufferedLifoDiskQueue), _pickle_serialize, pickle.loads  # type: ignore[arg-type]
 )
 _MarshalFifoSerializationDiskQueue = _serializable_queue(
-    _with_mkdir(queue.FifoDiskQueue), marshal.dumps, marshal.loads  # type: ignore[arg-type]
+    _with_mkdir(_BufferedFifoDiskQueue), marshal.dumps, marshal.loads  # type: ignore[arg-type]
 )
 _MarshalLifoSerializationDiskQueue = _serializable_queue(
-    _with_mkdir(queue.LifoDiskQueue), marshal.dumps, marshal.loads  # type: ignore[arg-type]
+    _with_mkdir(_BufferedLifoDiskQueue), marshal.dumps, marshal.loads  # type: ignore[arg-type]
+)
+_CompactFifoSerializationDiskQueue = _compact_serialization_queue(
+    _with_mkdir(_BufferedFifoDiskQueue)  # type: ignore[arg-type]
+)
+_CompactLifoSerializationDiskQueue = _compact_serialization_queue(
+    _with_mkdir(_BufferedLifoDiskQueue)  # type: ignore[arg-type]
 )
 
 # public queue classes
@@ -164,5 +597,7 @@ PickleFifoDiskQueue = _scrapy_serialization_queue(_PickleFifoSerializationDiskQu
 PickleLifoDiskQueue = _scrapy_serialization_queue(_PickleLifoSerializationDiskQueue)
 MarshalFifoDiskQueue = _scrapy_serialization_queue(_MarshalFifoSerializationDiskQueue)
 MarshalLifoDiskQueue = _scrapy_serialization_queue(_MarshalLifoSerializationDiskQueue)
+CompactFifoDiskQueue = _scrapy_serialization_queue(_CompactFifoSerializationDiskQueue)
+CompactLifoDiskQueue = _scrapy_serialization_queue(_CompactLifoSerializationDiskQueue)
 FifoMemoryQueue = _scrapy_non_serialization_queue(queue.FifoMemoryQueue)  # type: ignore[arg-type]
 LifoMemoryQueue = _scrapy_non_serialization_queue(queue.LifoMemoryQueue)  # type: ignore[arg-type]
@@ -53,12 +53,14 @@ class _DecompressionMaxSizeExceeded(ValueError):
 def _inflate(data: bytes, *, max_size: int = 0) -> bytes:
     decompressor = zlib.decompressobj()
     raw_decompressor = zlib.decompressobj(wbits=-15)
-    input_stream = BytesIO(data)
+    input_view = memoryview(data)
     output_stream = BytesIO()
     output_chunk = b"."
     decompressed_size = 0
+    offset = 0
     while output_chunk:
-        input_chunk = input_stream.read(_CHUNK_SIZE)
+        input_chunk = input_view[offset : offset + _CHUNK_SIZE]
+        offset += _CHUNK_SIZE
         try:
             output_chunk = decompressor.decompress(input_chunk)
         except zlib.error:
@@ -80,8 +82,7 @@ def _inflate(data: bytes, *, max_size: int = 0) -> bytes:
                 f"({max_size} B)."
             )
         output_stream.write(output_chunk)
-    output_stream.seek(0)
-    return output_stream.read()
+    return output_stream.getvalue()
 
 
 def _unbrotli(data: bytes, *, max_size: int = 0) -> bytes:
@@ -101,8 +102,7 @@ def _unbrotli(data: bytes, *, max_size: int = 0) -> bytes:
                 f"({max_size} B)."
             )
         output_stream.write(output_chunk)
-    output_stream.seek(0)
-    return output_stream.read()
+    return output_stream.getvalue()
 
 
 def _unzstd(data: bytes, *, max_size: int = 0) -> bytes:
@@ -121,5 +121,4 @@ def _unzstd(data: bytes, *, max_size: int = 0) -> bytes:
                 f"({max_size} B)."
             )
         output_stream.write(output_chunk)
-    output_stream.seek(0)
-    return output_stream.read()
+    return output_stream.getvalue()
@@ -65,3 +65,10 @@ def inthread(func: Callable[_P, _T]) -> Callable[_P, Deferred[_T]]:
         return deferToThread(func, *a, **kw)
 
     return wrapped
+
+
+def run_in_process(func: Callable[_P, _T]) -> Callable[_P, _T]:
+    """Decorator to run a spider callback in a worker process, see
+    :setting:`CALLBACK_PROCESS_POOL_ENABLED`"""
+    func.run_in_process = True  # type: ignore[attr-defined]
+    return func
@@ -26,6 +26,8 @@ def get_engine_status(engine: ExecutionEngine) -> list[tuple[str, Any]]:
         "len(engine.scraper.slot.active)",
         "engine.scraper.slot.active_size",
         "engine.scraper.slot.itemproc_size",
+        "len(engine.scraper.slot.itemproc_queue)",
+        "engine.scraper.slot.items_size",
         "engine.scraper.slot.needs_backout()",
     ]
 
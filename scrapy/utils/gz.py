@@ -38,8 +38,7 @@ def gunzip(data: bytes, *, max_size: int = 0) -> bytes:
                 f"({max_size} B)."
             )
         output_stream.write(chunk)
-    output_stream.seek(0)
-    return output_stream.read()
+    return output_stream.getvalue()
 
 
 def gzip_magic_number(response: Response) -> bool:
@@ -1,10 +1,15 @@
 from __future__ import annotations
 
+import os
+import time
 from pathlib import Path
-from typing import TYPE_CHECKING
+from typing import IO, TYPE_CHECKING, Any
 
 if TYPE_CHECKING:
+    from twisted.internet.base import DelayedCall
+
     from scrapy.settings import BaseSettings
+    from scrapy.statscollectors import StatsCollector
 
 
 def job_dir(settings: BaseSettings) -> str | None:
@@ -14,3 +19,100 @@ def job_dir(settings: BaseSettings) -> str | None:
     if not Path(path).exists():
         Path(path).mkdir(parents=True)
     return path
+
+
+class GroupCommitFile:
+    """Wrapper for files under :setting:`JOBDIR` that groups many small
+    writes into a single write, flush and (optionally) ``fsync`` call.
+
+    Buffered data is committed once it reaches *flush_size* bytes (or
+    characters, for text files), *flush_interval* seconds after the previous
+    commit, and on :meth:`close`. The interval is enforced with a reactor
+    timer while the reactor is running, and otherwise checked on each write.
+
+    Each call to :meth:`write` is committed as a whole, in order, so after a
+    crash the file holds everything up to the last commit, followed at most by
+    a partially written record.
+
+    If *stats* is given, ``<stats_prefix>/bytes_written``,
+    ``<stats_prefix>/flushes`` and ``<stats_prefix>/flush_latency_max`` (in
+    seconds) are recorded.
+    """
+
+    def __init__(
+        self,
+        file: IO[Any],
+        flush_size: int = 65536,
+        flush_interval: float = 1.0,
+        fsync: bool = False,
+        stats: StatsCollector | None = None,
+        stats_prefix: str = "jobdir",
+    ):
+        self.file: IO[Any] = file
+        self.flush_size: int = flush_size
+        self.flush_interval: float = flush_interval
+        self.fsync: bool = fsync
+        self.stats: StatsCollector | None = stats
+        self.stats_prefix: str = stats_prefix
+        self._buffer: list[Any] = []
+        self._buffered: int = 0
+        self._last_flush: float = time.monotonic()
+        self._flush_call: DelayedCall | None = None
+
+    def write(self, data: Any) -> None:
+        self._buffer.append(data)
+        self._buffered += len(data)
+        if (
+            self._buffered >= self.flush_size
+            or time.monotonic() - self._last_flush >= self.flush_interval
+        ):
+            self.flush()
+        elif self._flush_call is None:
+            self._schedule_flush()
+
+    def _schedule_flush(self) -> None:
+        from twisted.internet import reactor
+
+        if not reactor.running:
+            return
+        delay = self.flush_interval - (time.monotonic() - self._last_flush)
+        self._flush_call = reactor.callLater(max(delay, 0), self._scheduled_flush)
+
+    def _scheduled_flush(self) -> None:
+        self._flush_call = None
+        self.flush()
+
+    def _cancel_flush(self) -> None:
+        if self._flush_call is not None:
+            if self._flush_call.active():
+                self._flush_call.cancel()
+            self._flush_call = None
+
+    def flush(self) -> None:
+        self._cancel_flush()
+        if self._buffer:
+            start = time.perf_counter()
+            data = self._buffer[0][:0].join(self._buffer)
+            self.file.write(data)
+            self.file.flush()
+            if self.fsync:
+                os.fsync(self.file.fileno())
+            latency = time.perf_counter() - start
+            self._buffer.clear()
+            self._buffered = 0
+            if self.stats:
+                prefix = self.stats_prefix
+                self.stats.inc_value(f"{prefix}/bytes_written", len(data))
+                self.stats.inc_value(f"{prefix}/flushes")
+                self.stats.max_value(f"{prefix}/flush_latency_max", latency)
+        self._last_flush = time.monotonic()
+
+    def discard(self) -> None:
+        """Drop buffered data without writing it."""
+        self._cancel_flush()
+        self._buffer.clear()
+        self._buffered = 0
+
+    def close(self) -> None:
+        self.flush()
+        self.file.close()
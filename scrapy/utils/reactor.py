@@ -1,9 +1,11 @@
 from __future__ import annotations
 
 import asyncio
+import logging
+import math
 import sys
 from contextlib import suppress
-from typing import TYPE_CHECKING, Any, Generic, TypeVar
+from typing import TYPE_CHECKING, Any, Generic, TypeVar, cast
 from warnings import catch_warnings, filterwarnings, warn
 
 from twisted.internet import asyncioreactor, error
@@ -16,6 +18,7 @@ if TYPE_CHECKING:
     from asyncio import AbstractEventLoop, AbstractEventLoopPolicy
     from collections.abc import Callable
 
+    from twisted.internet.interfaces import IReactorTime
     from twisted.internet.protocol import ServerFactory
     from twisted.internet.tcp import Port
 
@@ -26,6 +29,8 @@ if TYPE_CHECKING:
 
 _T = TypeVar("_T")
 
+logger = logging.getLogger(__name__)
+
 
 def listen_tcp(portrange: list[int], host: str, factory: ServerFactory) -> Port:  # type: ignore[return]
     """Like reactor.listenTCP but tries different ports in a range."""
@@ -75,6 +80,199 @@ class CallLaterOnce(Generic[_T]):
         return self._func(*self._a, **self._kw)
 
 
+class TimerWheelCall:
+    """A call scheduled with :meth:`TimerWheel.call_later`.
+
+    Like :class:`~twisted.internet.base.DelayedCall`, it has ``active()`` and
+    ``cancel()`` methods.
+    """
+
+    __slots__ = ("_wheel", "args", "called", "cancelled", "expiry", "func", "kw")
+
+    def __init__(
+        self,
+        wheel: TimerWheel,
+        expiry: int,
+        func: Callable[..., Any],
+        args: tuple[Any, ...],
+        kw: dict[str, Any],
+    ):
+        self._wheel: TimerWheel = wheel
+        self.expiry: int = expiry  # tick
+        self.func: Callable[..., Any] = func
+        self.args: tuple[Any, ...] = args
+        self.kw: dict[str, Any] = kw
+        self.called: bool = False
+        self.cancelled: bool = False
+
+    def active(self) -> bool:
+        return not (self.called or self.cancelled)
+
+    def cancel(self) -> None:
+        if self.cancelled:
+            raise error.AlreadyCancelled
+        if self.called:
+            raise error.AlreadyCalled
+        # removed lazily from its bucket
+        self.cancelled = True
+        self._wheel._pending -= 1
+
+
+class TimerWheel:
+    """Schedule many delayed calls with a single reactor delayed call.
+
+    Calls are kept in a hierarchical timer wheel: *levels* wheels of
+    *wheel_size* buckets each, where a bucket of the first wheel spans one tick
+    of *resolution* seconds, and a bucket of each following wheel spans a
+    whole turn of the previous one. Scheduling and cancelling a call are O(1),
+    and calls are run at most one tick late. The reactor only wakes up on
+    ticks with calls in their bucket of the first wheel, and at the start of
+    each turn of the first wheel while upper wheels may have calls to cascade.
+    """
+
+    #: Fraction of a tick ignored when converting times to ticks, so that float
+    #: rounding does not delay calls by a whole tick.
+    _TOLERANCE = 1e-9
+
+    def __init__(
+        self,
+        resolution: float,
+        wheel_size: int = 256,
+        levels: int = 4,
+        clock: IReactorTime | None = None,
+    ):
+        if resolution <= 0:
+            raise ValueError(f"Invalid timer wheel resolution: {resolution!r}")
+        if wheel_size < 2 or wheel_size & (wheel_size - 1):
+            raise ValueError(f"Timer wheel size must be a power of 2: {wheel_size!r}")
+        if clock is None:
+            from twisted.internet import reactor
+
+            clock = cast("IReactorTime", reactor)
+        self.resolution: float = resolution
+        self._clock: IReactorTime = clock
+        self._bits: int = wheel_size.bit_length() - 1
+        self._mask: int = wheel_size - 1
+        self._wheels: list[list[list[TimerWheelCall]]] = [
+            [[] for _ in range(wheel_size)] for _ in range(levels)
+        ]
+        self._start: float = 0.0  # time of tick 0
+        self._tick: int = 0  # last tick processed
+        self._pending: int = 0
+        self._call: DelayedCall | None = None
+        self._call_tick: int = 0  # tick that self._call wakes up for
+
+    def call_later(
+        self, delay: float, func: Callable[..., Any], *args: Any, **kw: Any
+    ) -> TimerWheelCall:
+        """Call *func* with *args* and *kw* in *delay* seconds, rounded up to
+        the next tick."""
+        now = self._clock.seconds()
+        if not self._pending:
+            # idle: restart counting ticks from now, dropping cancelled calls
+            self.stop()
+            for wheel in self._wheels:
+                for bucket in wheel:
+                    bucket.clear()
+            self._start = now
+            self._tick = 0
+        ticks = (now + delay - self._start) / self.resolution
+        expiry = math.ceil(ticks - self._TOLERANCE)
+        call = TimerWheelCall(self, max(expiry, self._tick + 1), func, args, kw)
+        self._insert(call)
+        self._pending += 1
+        if self._call is not None and call.expiry < self._call_tick:
+            self.stop()
+        self._schedule()
+        return call
+
+    def __len__(self) -> int:
+        return self._pending
+
+    def stop(self) -> None:
+        """Cancel the reactor delayed call. Pending calls are not run unless
+        :meth:`call_later` is called again."""
+        if self._call is not None and self._call.active():
+            self._call.cancel()
+        self._call = None
+
+    def _insert(self, call: TimerWheelCall) -> None:
+        diff = call.expiry - self._tick
+        for level, wheel in enumerate(self._wheels):
+            shift = self._bits * level
+            if diff >> (shift + self._bits) == 0:
+                wheel[(call.expiry >> shift) & self._mask].append(call)
+                return
+        # beyond the last wheel: park it in the bucket cascaded last, it is
+        # re-inserted until it expires
+        shift = self._bits * (len(self._wheels) - 1)
+        self._wheels[-1][((self._tick >> shift) - 1) & self._mask].append(call)
+
+    def _next_tick(self) -> int:
+        """Return the next tick with calls in its bucket of the first wheel,
+        or the start of the next turn of the first wheel, when upper wheels
+        cascade, whichever comes first."""
+        wheel = self._wheels[0]
+        turn = (self._tick | self._mask) + 1
+        for tick in range(self._tick + 1, turn):
+            if wheel[tick & self._mask]:
+                return tick
+        return turn
+
+    def _schedule(self) -> None:
+        if self._call is None and self._pending:
+            self._call_tick = self._next_tick()
+            tick = self._call_tick - self._TOLERANCE
+            delay = self._start + tick * self.resolution - self._clock.seconds()
+            self._call = self._clock.callLater(max(delay, 0), self._run)
+
+    def _run(self) -> None:
+        self._call = None
+        now = self._clock.seconds()
+        # calls may restart tick counting from call_later(), so the due ticks
+        # are checked against the current start time on each iteration
+        while self._pending and self._elapsed(now) >= self._tick + 1:
+            self._advance()
+        self._schedule()
+
+    def _elapsed(self, now: float) -> int:
+        """Return the number of whole ticks elapsed at *now*."""
+        return math.floor((now - self._start) / self.resolution + self._TOLERANCE)
+
+    def _advance(self) -> None:
+        self._tick += 1
+        tick = self._tick
+        # cascade the buckets of upper wheels whose turn starts now
+        for level in range(1, len(self._wheels)):
+            if tick & ((1 << (self._bits * level)) - 1):
+                break
+            index = (tick >> (self._bits * level)) & self._mask
+            bucket = self._wheels[level][index]
+            self._wheels[level][index] = []
+            for call in bucket:
+                if call.active():
+                    self._insert(call)
+        index = tick & self._mask
+        bucket = self._wheels[0][index]
+        self._wheels[0][index] = []
+        for call in bucket:
+            if not call.active():
+                continue
+            if call.expiry > tick:
+                self._insert(call)
+                continue
+            call.called = True
+            self._pending -= 1
+            try:
+                call.func(*call.args, **call.kw)
+            except Exception:
+                logger.error(
+                    "Error in timer wheel call %(func)r",
+                    {"func": call.func},
+                    exc_info=True,
+                )
+
+
 def set_asyncio_event_loop_policy() -> None:
     """The policy functions from asyncio often behave unexpectedly,
     so we restrict their use to the absolutely essential case.
@@ -5,24 +5,26 @@ scrapy.http.Request objects
 
 from __future__ import annotations
 
+import binascii
 import hashlib
 import json
 import warnings
-from typing import TYPE_CHECKING, Any, Protocol
+from json.encoder import encode_basestring_ascii
+from typing import TYPE_CHECKING, Any, Protocol, cast
 from urllib.parse import urlunparse
 from weakref import WeakKeyDictionary
 
 from w3lib.http import basic_auth_header
-from w3lib.url import canonicalize_url
 
 from scrapy import Request, Spider
 from scrapy.exceptions import ScrapyDeprecationWarning
 from scrapy.utils.httpobj import urlparse_cached
 from scrapy.utils.misc import load_object
 from scrapy.utils.python import to_bytes, to_unicode
+from scrapy.utils.url import CanonicalizeUrlCache, canonicalize_url_cached
 
 if TYPE_CHECKING:
-    from collections.abc import Iterable
+    from collections.abc import Callable, Iterable
 
     # typing.Self requires Python 3.11
     from typing_extensions import Self
@@ -48,6 +50,7 @@ def fingerprint(
     *,
     include_headers: Iterable[bytes | str] | None = None,
     keep_fragments: bool = False,
+    url_cache: CanonicalizeUrlCache | None = None,
 ) -> bytes:
     """
     Return the request fingerprint.
@@ -78,6 +81,9 @@ def fingerprint(
     so they are also ignored by default when calculating the fingerprint.
     If you want to include them, set the keep_fragments argument to True
     (for instance when handling requests with a headless browser).
+
+    Canonical URLs are cached in url_cache, or in the process-wide
+    :data:`~scrapy.utils.url.canonicalize_url_cache` if it is None.
     """
     processed_include_headers: tuple[bytes, ...] | None = None
     if include_headers:  # 指纹生成是否包含headers
@@ -99,12 +105,14 @@ def fingerprint(
                     ]
         fingerprint_data = {
             "method": to_unicode(request.method),
-            "url": canonicalize_url(request.url, keep_fragments=keep_fragments),
+            "url": canonicalize_url_cached(request.url, keep_fragments, url_cache),
             "body": (request.body or b"").hex(),
             "headers": headers,
         }
         fingerprint_json = json.dumps(fingerprint_data, sort_keys=True)
-        cache[cache_key] = hashlib.sha1(fingerprint_json.encode()).digest()  # nosec  # 使用sha1算法生成指纹
+        cache[cache_key] = hashlib.sha1(
+            fingerprint_json.encode()
+        ).digest()  # nosec  # 使用sha1算法生成指纹
     return cache[cache_key]
 
 
@@ -144,9 +152,104 @@ class RequestFingerprinter:
             )
             warnings.warn(message, category=ScrapyDeprecationWarning, stacklevel=2)
         self._fingerprint = fingerprint
+        self._url_cache: CanonicalizeUrlCache | None = (
+            crawler.canonicalize_url_cache if crawler else None
+        )
+
+    def fingerprint(self, request: Request) -> bytes:
+        return self._fingerprint(request, url_cache=self._url_cache)
+
+
+class FastRequestFingerprinter:
+    """Request fingerprinter that feeds the request method, canonical URL and
+    body straight into an incremental hash, without building and JSON-encoding
+    an intermediate dictionary.
+
+    If :setting:`REQUEST_FINGERPRINTER_HASH` is ``None`` (default), the
+    fingerprints are identical to those of :class:`RequestFingerprinter`, so
+    this class can replace it in existing projects, including those resuming a
+    :ref:`job <topics-jobs>` or reusing an :ref:`HTTP cache
+    <httpcache-storage-fs>`.
+
+    Otherwise, :setting:`REQUEST_FINGERPRINTER_HASH` is the name of the hash
+    algorithm to use, and a cheaper, incompatible serialization is hashed.
+    Any algorithm of :mod:`hashlib` is supported, as well as those of the
+    `xxhash <https://github.com/ifduyue/python-xxhash>`_ library (e.g.
+    ``"xxh3_128"``) if it is installed. Extendable-output functions, like
+    ``"shake_128"``, are not supported.
+    """
+
+    @classmethod
+    def from_crawler(cls, crawler: Crawler) -> Self:
+        return cls(
+            crawler.settings.get("REQUEST_FINGERPRINTER_HASH"),
+            url_cache=crawler.canonicalize_url_cache,
+        )
+
+    def __init__(
+        self,
+        algorithm: str | None = None,
+        *,
+        url_cache: CanonicalizeUrlCache | None = None,
+    ):
+        self.algorithm: str | None = algorithm
+        self.url_cache: CanonicalizeUrlCache | None = url_cache
+        self._cache: WeakKeyDictionary[Request, bytes] = WeakKeyDictionary()
+        self._new_hash: Callable[[], Any]
+        if algorithm is None:
+            self._new_hash = hashlib.sha1
+            self._fingerprint = self._compat_fingerprint
+            return
+        self._fingerprint = self._fast_fingerprint
+        if algorithm.startswith("xxh"):
+            try:
+                import xxhash
+            except ImportError:
+                raise ValueError(
+                    f"The {algorithm!r} request fingerprint hash requires the"
+                    f" xxhash library"
+                )
+            self._new_hash = getattr(xxhash, algorithm)
+        else:
+            self._new_hash = lambda: hashlib.new(algorithm)
+        # fail early on unknown algorithms and on those, like SHAKE, whose
+        # digest() requires a length
+        try:
+            self._new_hash().digest()
+        except TypeError:
+            raise ValueError(
+                f"The {algorithm!r} request fingerprint hash has no fixed digest"
+                f" size"
+            )
+
+    def _compat_fingerprint(self, request: Request) -> bytes:
+        # Same bytes as json.dumps(..., sort_keys=True) in fingerprint()
+        fp = self._new_hash()
+        fp.update(b'{"body": "')
+        fp.update(binascii.hexlify(request.body))
+        fp.update(b'", "headers": {}, "method": ')
+        fp.update(encode_basestring_ascii(request.method).encode())
+        fp.update(b', "url": ')
+        url = canonicalize_url_cached(request.url, cache=self.url_cache)
+        fp.update(encode_basestring_ascii(url).encode())
+        fp.update(b"}")
+        return cast(bytes, fp.digest())
+
+    def _fast_fingerprint(self, request: Request) -> bytes:
+        fp = self._new_hash()
+        fp.update(request.method.encode())
+        fp.update(b" ")
+        fp.update(canonicalize_url_cached(request.url, cache=self.url_cache).encode())
+        fp.update(b"\n")
+        fp.update(request.body)
+        return cast(bytes, fp.digest())
 
     def fingerprint(self, request: Request) -> bytes:
-        return self._fingerprint(request)
+        try:
+            return self._cache[request]
+        except KeyError:
+            fp = self._cache[request] = self._fingerprint(request)
+            return fp
 
 
 def request_authenticate(
@@ -9,6 +9,7 @@ from typing import Any as TypingAny
 from pydispatch.dispatcher import (
     Anonymous,
     Any,
+    connections,
     disconnect,
     getAllReceivers,
     liveReceivers,
@@ -24,6 +25,21 @@ from scrapy.utils.log import failure_to_exc_info
 logger = logging.getLogger(__name__)
 
 
+def has_receivers(signal: TypingAny = Any, sender: TypingAny = Anonymous) -> bool:
+    """Return whether any receiver may get *signal* from *sender*, looking up
+    the pydispatcher connections table directly, without building the list of
+    receivers.
+
+    It may return ``True`` when the only receivers are dead weak references,
+    never ``False`` when there are live receivers.
+    """
+    for senderkey in (id(sender), id(Any)):
+        receivers = connections.get(senderkey)
+        if receivers and (receivers.get(signal) or receivers.get(Any)):
+            return True
+    return False
+
+
 def send_catch_log(
     signal: TypingAny = Any,
     sender: TypingAny = Anonymous,
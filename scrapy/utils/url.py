@@ -9,13 +9,15 @@ to the w3lib.url module. Always import those from there instead.
 from __future__ import annotations
 
 import re
+from collections import OrderedDict
+from contextlib import suppress
 from typing import TYPE_CHECKING, Union, cast
 from urllib.parse import ParseResult, urldefrag, urlparse, urlunparse
 
 # scrapy.utils.url was moved to w3lib.url and import * ensures this
 # move doesn't break old code
 from w3lib.url import *
-from w3lib.url import _safe_chars, _unquotepath  # noqa: F401
+from w3lib.url import _safe_chars, _unquotepath, canonicalize_url  # noqa: F401
 
 from scrapy.utils.python import to_unicode
 
@@ -189,3 +191,68 @@ def strip_url(
             "" if strip_fragment else parsed_url.fragment,
         )
     )
+
+
+class CanonicalizeUrlCache:
+    """Bounded LRU cache of :func:`~w3lib.url.canonicalize_url` results.
+
+    Calling an instance with an URL and, optionally, *keep_fragments* returns
+    the same as :func:`~w3lib.url.canonicalize_url`, but the result is
+    cached, so that URLs seen repeatedly, e.g. links from a navigation menu
+    present on every page, are only parsed once.
+
+    At most *limit* URLs are cached; the least recently used ones are evicted
+    first. If *limit* is ``0``, the cache is not used.
+
+    The :attr:`hits` and :attr:`misses` counters record cache usage.
+    """
+
+    def __init__(self, limit: int = 10000):
+        self.limit: int = limit
+        self.hits: int = 0
+        self.misses: int = 0
+        self._cache: OrderedDict[tuple[str, bool], str] = OrderedDict()
+
+    def __call__(self, url: str, keep_fragments: bool = False) -> str:
+        if not self.limit:
+            self.misses += 1
+            return canonicalize_url(url, keep_fragments=keep_fragments)
+        key = (url, keep_fragments)
+        try:
+            result = self._cache[key]
+        except KeyError:
+            self.misses += 1
+            result = canonicalize_url(url, keep_fragments=keep_fragments)
+            self._cache[key] = result
+            while len(self._cache) > self.limit:
+                self._cache.popitem(last=False)
+            return result
+        self.hits += 1
+        with suppress(KeyError):  # evicted meanwhile by another thread
+            self._cache.move_to_end(key)
+        return result
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+
+#: Process-wide cache, used by the link extractors and, as the
+#: ``canonicalize_url_cache`` attribute of crawlers, by the request
+#: fingerprinters. Its size is set by the
+#: :setting:`URL_CANONICALIZATION_CACHE_SIZE` setting.
+canonicalize_url_cache = CanonicalizeUrlCache()
+
+
+def canonicalize_url_cached(
+    url: str,
+    keep_fragments: bool = False,
+    cache: CanonicalizeUrlCache | None = None,
+) -> str:
+    """Return :func:`~w3lib.url.canonicalize_url` of *url*, using *cache*, or
+    :data:`canonicalize_url_cache` if *cache* is ``None``."""
+    if cache is None:
+        cache = canonicalize_url_cache
+    return cache(url, keep_fragments)
@@ -0,0 +1,270 @@
+import os
+from concurrent.futures.process import _RemoteTraceback
+
+from testfixtures import LogCapture
+from twisted.internet import defer
+from twisted.trial import unittest
+
+from scrapy import Spider, signals
+from scrapy.core import callbackpool
+from scrapy.core.callbackpool import (
+    CallbackProcessPool,
+    _failure_from_worker,
+    _init_worker,
+    _run_callback,
+    _spider_state,
+)
+from scrapy.http import HtmlResponse, Request, Response
+from scrapy.linkextractors import LinkExtractor
+from scrapy.spiders import CrawlSpider, Rule
+from scrapy.utils.decorators import run_in_process
+from scrapy.utils.test import get_crawler
+from tests.mockserver import MockServer
+
+
+class ProcessPoolSpider(Spider):
+    name = "processpool"
+
+    def __init__(self, mockserver=None, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if mockserver is not None:
+            # the mock server cannot be sent to worker processes
+            self.base_url = mockserver.url("/status?n=200")
+
+    def start_requests(self):
+        yield Request(self.base_url, cb_kwargs={"page": 1})
+
+    @run_in_process
+    def parse(self, response, page):
+        yield {"page": page, "pid": os.getpid(), "url": response.url}
+        if page == 1:
+            yield response.follow(
+                f"{self.base_url}&page=2", self.parse, cb_kwargs={"page": 2}
+            )
+
+    def parse_sync(self, response):
+        return [{}]
+
+    def parse_spooled(self, response):
+        return [{"spooled_body": response.spooled_body}]
+
+    async def parse_async(self, response):
+        return [{}]
+
+    async def parse_agen(self, response):
+        yield {}
+
+
+class ErrorSpider(ProcessPoolSpider):
+    name = "error"
+
+    @run_in_process
+    def parse(self, response, page):
+        raise ValueError("worker error")
+
+
+class LocalCallbackSpider(ProcessPoolSpider):
+    name = "localcallback"
+
+    def start_requests(self):
+        yield Request(self.base_url, callback=lambda response: {"pid": os.getpid()})
+
+
+class CallbackProcessPoolTest(unittest.TestCase):
+    def tearDown(self):
+        callbackpool._spider = None
+
+    def test_handles(self):
+        spider = ProcessPoolSpider()
+        pool = CallbackProcessPool(get_crawler())
+        self.assertTrue(pool.handles(Request("https://a.example"), spider))
+        self.assertTrue(
+            pool.handles(Request("https://a.example", spider.parse), spider)
+        )
+        self.assertFalse(
+            pool.handles(Request("https://a.example", spider.parse_sync), spider)
+        )
+        self.assertFalse(
+            pool.handles(Request("https://a.example", spider.parse_async), spider)
+        )
+
+    def test_handles_enabled(self):
+        spider = ProcessPoolSpider()
+        pool = CallbackProcessPool(
+            get_crawler(settings_dict={"CALLBACK_PROCESS_POOL_ENABLED": True})
+        )
+        self.assertTrue(
+            pool.handles(Request("https://a.example", spider.parse_sync), spider)
+        )
+        # asynchronous callbacks run in the main process
+        self.assertFalse(
+            pool.handles(Request("https://a.example", spider.parse_async), spider)
+        )
+        self.assertFalse(
+            pool.handles(Request("https://a.example", spider.parse_agen), spider)
+        )
+        # callbacks and errbacks that are not spider methods too
+        self.assertFalse(
+            pool.handles(Request("https://a.example", lambda response: None), spider)
+        )
+        self.assertFalse(
+            pool.handles(
+                Request("https://a.example", spider.parse_sync, errback=print),
+                spider,
+            )
+        )
+        other_spider = ProcessPoolSpider()
+        self.assertFalse(
+            pool.handles(Request("https://a.example", other_spider.parse), spider)
+        )
+
+    def test_handles_unpicklable_spider(self):
+        spider = ProcessPoolSpider()
+        spider.unpicklable = lambda: None
+        pool = CallbackProcessPool(get_crawler())
+        with LogCapture() as log:
+            self.assertFalse(pool.handles(Request("https://a.example"), spider))
+            self.assertFalse(pool.handles(Request("https://a.example"), spider))
+        self.assertEqual(len(log.records), 1)
+        self.assertIn("unpicklable", log.records[0].getMessage())
+
+    def test_size(self):
+        pool = CallbackProcessPool(get_crawler())
+        self.assertEqual(pool.size, os.cpu_count())
+        pool = CallbackProcessPool(
+            get_crawler(settings_dict={"CALLBACK_PROCESS_POOL_SIZE": 3})
+        )
+        self.assertEqual(pool.size, 3)
+
+    def test_spider_state(self):
+        spider = ProcessPoolSpider(foo="bar")
+        spider.crawler = get_crawler()
+        spider.unpicklable = lambda: None
+        state, unpicklable = _spider_state(spider)
+        self.assertEqual(state["foo"], "bar")
+        self.assertNotIn("unpicklable", state)
+        self.assertNotIn("crawler", state)
+        self.assertEqual(unpicklable, ["unpicklable"])
+
+    def test_spider_state_crawlspider(self):
+        class RulesSpider(CrawlSpider):
+            name = "rules"
+            rules = (Rule(LinkExtractor(), callback="parse_item"),)
+
+            def parse_item(self, response):
+                pass
+
+        spider = RulesSpider.from_crawler(get_crawler(RulesSpider))
+        self.assertEqual(_spider_state(spider)[1], ["_rules"])
+
+    def _run_callback(self, spider, request):
+        _init_worker(type(spider), _spider_state(spider)[0])
+        return _run_callback(
+            HtmlResponse,
+            {"url": request.url, "body": b"<html></html>"},
+            request.to_dict(spider=spider),
+        )
+
+    def test_run_callback(self):
+        spider = ProcessPoolSpider(base_url="https://example.com/?a=1")
+        request = Request(spider.base_url, spider.parse, cb_kwargs={"page": 1})
+        output = self._run_callback(spider, request)
+        self.assertEqual(len(output), 2)
+        self.assertEqual(
+            output[0],
+            (False, {"page": 1, "pid": os.getpid(), "url": spider.base_url}),
+        )
+        is_request, request_dict = output[1]
+        self.assertTrue(is_request)
+        self.assertEqual(request_dict["url"], "https://example.com/?a=1&page=2")
+        self.assertEqual(request_dict["callback"], "parse")
+        self.assertEqual(request_dict["cb_kwargs"], {"page": 2})
+        self.assertIsNot(callbackpool._spider, spider)
+
+    def test_run_callback_spooled(self):
+        spider = ProcessPoolSpider()
+        request = Request("https://example.com", spider.parse_spooled)
+        _init_worker(type(spider), _spider_state(spider)[0])
+        output = _run_callback(
+            Response,
+            {"url": request.url, "body": b"", "spooled_body": b"data"},
+            request.to_dict(spider=spider),
+        )
+        ((is_request, item),) = output
+        self.assertFalse(is_request)
+        self.assertEqual(len(item["spooled_body"]), 4)
+        self.assertTrue(item["spooled_body"].closed)
+
+    def test_failure_from_worker(self):
+        exc = ValueError("worker error")
+        exc.__cause__ = _RemoteTraceback("Traceback (most recent call last): ...")
+        failure = _failure_from_worker(exc)
+        self.assertIs(failure.value, exc)
+        self.assertEqual(
+            failure.remote_traceback, "Traceback (most recent call last): ..."
+        )
+        self.assertIsNone(_failure_from_worker(ValueError()).remote_traceback)
+
+    def test_load_output(self):
+        spider = ProcessPoolSpider()
+        request = Request("https://example.com", spider.parse, cb_kwargs={"page": 2})
+        output = CallbackProcessPool._load_output(
+            [(False, {"a": 1}), (True, request.to_dict(spider=spider))], spider
+        )
+        self.assertEqual(output[0], {"a": 1})
+        self.assertEqual(output[1].url, "https://example.com")
+        self.assertEqual(output[1].callback, spider.parse)
+        self.assertEqual(output[1].cb_kwargs, {"page": 2})
+
+
+class CallbackProcessPoolCrawlTest(unittest.TestCase):
+    def setUp(self):
+        self.mockserver = MockServer()
+        self.mockserver.__enter__()
+
+    def tearDown(self):
+        self.mockserver.__exit__(None, None, None)
+
+    @defer.inlineCallbacks
+    def _crawl(self, spidercls, settings_dict=None):
+        items = []
+        crawler = get_crawler(spidercls, settings_dict)
+        crawler.signals.connect(
+            lambda item: items.append(item), signal=signals.item_scraped, weak=False
+        )
+        yield crawler.crawl(mockserver=self.mockserver)
+        return crawler, items
+
+    @defer.inlineCallbacks
+    def test_crawl(self):
+        crawler, items = yield self._crawl(
+            ProcessPoolSpider, {"CALLBACK_PROCESS_POOL_SIZE": 2}
+        )
+        self.assertEqual(sorted(item["page"] for item in items), [1, 2])
+        for item in items:
+            self.assertNotEqual(item["pid"], os.getpid())
+            self.assertIn(self.mockserver.url("/status?n=200"), item["url"])
+        self.assertEqual(crawler.stats.get_value("scraper/process_pool/callbacks"), 2)
+        self.assertIsNone(crawler.engine.scraper.callback_pool._executor)
+
+    @defer.inlineCallbacks
+    def test_crawl_local_callback(self):
+        crawler, items = yield self._crawl(
+            LocalCallbackSpider,
+            {"CALLBACK_PROCESS_POOL_ENABLED": True, "CALLBACK_PROCESS_POOL_SIZE": 1},
+        )
+        self.assertEqual(items, [{"pid": os.getpid()}])
+        self.assertIsNone(crawler.stats.get_value("scraper/process_pool/callbacks"))
+
+    @defer.inlineCallbacks
+    def test_crawl_error(self):
+        with LogCapture() as log:
+            crawler, items = yield self._crawl(
+                ErrorSpider, {"CALLBACK_PROCESS_POOL_SIZE": 1}
+            )
+        self.assertEqual(items, [])
+        self.assertEqual(crawler.stats.get_value("spider_exceptions/ValueError"), 1)
+        (record,) = [r for r in log.records if r.exc_info]
+        cause = record.exc_info[1].__cause__
+        self.assertIsInstance(cause, _RemoteTraceback)
+        self.assertIn('raise ValueError("worker error")', cause.tb)
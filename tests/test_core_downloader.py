@@ -1,6 +1,16 @@
+import time
+from collections import deque
+
+from twisted.internet import defer
 from twisted.trial import unittest
+from twisted.web.iweb import UNKNOWN_LENGTH
 
-from scrapy.core.downloader import Slot
+from scrapy import Request, Spider, signals
+from scrapy.core.downloader import Downloader, Slot, _PrioritySlotQueue
+from scrapy.core.downloader.ratelimit import RateLimiter, TokenBucket
+from scrapy.http import Response
+from scrapy.utils.misc import build_from_crawler
+from scrapy.utils.test import get_crawler
 
 
 class SlotTest(unittest.TestCase):
@@ -10,3 +20,401 @@ class SlotTest(unittest.TestCase):
             repr(slot),
             "Slot(concurrency=8, delay=0.10, randomize_delay=True, throttle=None)",
         )
+
+
+class SlotGCTest(unittest.TestCase):
+    def setUp(self):
+        self.crawler = get_crawler(Spider)
+        self.crawler.stats.open_spider(None)
+        self.downloader = Downloader(self.crawler)
+        self.downloader._slot_gc_loop.stop()  # Prevent an unclean reactor.
+        self.spider = self.crawler._create_spider("foo")
+
+    def tearDown(self):
+        self.downloader._slot_gc_loop.start(60, now=False)
+        self.downloader.close()
+
+    def get_slot(self, key):
+        request = Request(f"https://{key}")
+        return self.downloader._get_slot(request, self.spider)[1]
+
+    def test_gc(self):
+        for key in ("a.example", "b.example", "c.example"):
+            self.get_slot(key)
+        self.get_slot("b.example").active.add(Request("https://b.example"))
+        self.downloader._idle_slots.pop("b.example")
+        self.downloader._slot_gc(age=0)
+        self.assertEqual(list(self.downloader.slots), ["b.example"])
+        stats = self.crawler.stats
+        self.assertEqual(stats.get_value("downloader/slots"), 1)
+        self.assertEqual(stats.get_value("downloader/slots_max"), 3)
+        self.assertEqual(stats.get_value("downloader/slot_gc/evicted"), 2)
+        self.assertGreaterEqual(stats.get_value("downloader/slot_gc/pause_max"), 0)
+
+    def test_gc_age(self):
+        self.get_slot("a.example")
+        self.downloader._slot_gc()
+        self.assertIn("a.example", self.downloader.slots)
+        self.downloader._mark_idle(
+            "a.example", self.downloader._idle_slots["a.example"] - 61
+        )
+        self.downloader._slot_gc()
+        self.assertNotIn("a.example", self.downloader.slots)
+
+    def test_gc_mixed_delays(self):
+        now = time.time()
+        slow = self.get_slot("slow.example")
+        slow.lastseen = now
+        slow.delay = 3600
+        # the first slot to become idle only counts as idle after its delay
+        self.downloader._mark_idle("slow.example", now + 3600)
+        for i in range(3):
+            self.get_slot(f"{i}.example")
+            self.downloader._mark_idle(f"{i}.example", now - 61)
+        self.downloader._slot_gc()
+        self.assertEqual(list(self.downloader.slots), ["slow.example"])
+        self.assertEqual(self.downloader._idle_slots, {"slow.example": now + 3600})
+
+    def test_gc_reactivated_slot(self):
+        self.get_slot("a.example")
+        self.downloader._mark_idle("a.example", time.time() - 120)
+        # active again, and then idle again, recently
+        self.downloader._idle_slots.pop("a.example")
+        self.downloader._mark_idle("a.example", time.time())
+        self.downloader._slot_gc()
+        self.assertIn("a.example", self.downloader.slots)
+        self.assertIn("a.example", self.downloader._idle_slots)
+
+    def test_gc_delay(self):
+        slot = self.get_slot("a.example")
+        slot.lastseen = time.time()
+        slot.delay = 30
+        self.downloader._mark_idle(
+            "a.example", self.downloader._idle_slots["a.example"] - 61
+        )
+        self.downloader._slot_gc()
+        self.assertIn("a.example", self.downloader.slots)
+        self.assertEqual(
+            self.downloader._idle_slots["a.example"], slot.lastseen + slot.delay
+        )
+
+    def test_gc_visits_idle_slots_only(self):
+        for i in range(100):
+            self.get_slot(f"{i}.example").active.add(Request(f"https://{i}.example"))
+            self.downloader._idle_slots.pop(f"{i}.example")
+        slots = self.downloader.slots
+        self.downloader.slots = _NoIterDict(slots)
+        self.downloader._slot_gc(age=0)
+        self.assertEqual(len(self.downloader.slots), 100)
+        self.downloader.slots = slots
+
+    @defer.inlineCallbacks
+    def test_idle_after_download(self):
+        download = defer.Deferred()
+        self.downloader.handlers.download_request = lambda request, spider: download
+        request = Request("https://a.example", dont_filter=True)
+        dfd = self.downloader.fetch(request, self.spider)
+        self.assertNotIn("a.example", self.downloader._idle_slots)
+        download.callback(Response(request.url))
+        yield dfd
+        self.assertIn("a.example", self.downloader._idle_slots)
+        self.downloader._slot_gc(age=0)
+        self.assertNotIn("a.example", self.downloader.slots)
+
+
+class _NoIterDict(dict):
+    def __iter__(self):
+        raise AssertionError("slots iterated")
+
+    def items(self):
+        raise AssertionError("slots iterated")
+
+    def values(self):
+        raise AssertionError("slots iterated")
+
+
+class TokenBucketTest(unittest.TestCase):
+    def test_rate(self):
+        bucket = TokenBucket(2, burst=1)
+        self.assertEqual(bucket.wait_time(0), 0)
+        bucket.consume(0)
+        self.assertEqual(bucket.wait_time(0), 0.5)
+        self.assertEqual(bucket.wait_time(0.25), 0.25)
+        self.assertEqual(bucket.wait_time(0.5), 0)
+        bucket.consume(0.5)
+        self.assertEqual(bucket.wait_time(10), 0)
+
+    def test_burst(self):
+        bucket = TokenBucket(1, burst=3)
+        for _ in range(3):
+            self.assertEqual(bucket.wait_time(0), 0)
+            bucket.consume(0)
+        self.assertEqual(bucket.wait_time(0), 1)
+        self.assertEqual(bucket.wait_time(100), 0)
+        self.assertEqual(bucket.tokens, 3)
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            TokenBucket(0)
+        with self.assertRaises(ValueError):
+            TokenBucket(1, burst=0)
+
+
+class RateLimiterTest(unittest.TestCase):
+    def get_limiter(self, settings):
+        crawler = get_crawler(Spider, settings)
+        return build_from_crawler(RateLimiter, crawler)
+
+    def acquire(self, limiter, url, now, meta=None):
+        request = Request(url, meta=meta)
+        key = request.url.split("/")[2]
+        slot = self.slots.setdefault(key, Slot(8, 0, False))
+        return limiter.acquire(request, key, slot, now)
+
+    def setUp(self):
+        self.slots = {}
+
+    def test_disabled(self):
+        self.assertFalse(self.get_limiter({}).enabled)
+        downloader = Downloader(get_crawler(Spider))
+        downloader._slot_gc_loop.stop()  # Prevent an unclean reactor.
+        self.assertIsNone(downloader._rate_limiter)
+
+    def test_global(self):
+        limiter = self.get_limiter(
+            {"DOWNLOAD_RATE_LIMIT": 1, "DOWNLOAD_RATE_LIMIT_BURST": 2}
+        )
+        self.assertTrue(limiter.enabled)
+        self.assertEqual(self.acquire(limiter, "https://a.example", 0), 0)
+        self.assertEqual(self.acquire(limiter, "https://b.example", 0), 0)
+        self.assertEqual(self.acquire(limiter, "https://c.example", 0), 1)
+        self.assertEqual(self.acquire(limiter, "https://c.example", 1), 0)
+
+    def test_slot(self):
+        limiter = self.get_limiter(
+            {"DOWNLOAD_SLOTS": {"a.example": {"rate": 2, "concurrency": 1}}}
+        )
+        self.assertTrue(limiter.enabled)
+        self.assertEqual(self.acquire(limiter, "https://a.example", 0), 0)
+        self.assertEqual(self.acquire(limiter, "https://a.example", 0), 0.5)
+        for _ in range(3):
+            self.assertEqual(self.acquire(limiter, "https://b.example", 0), 0)
+
+    def test_slot_coercion(self):
+        limiter = self.get_limiter(
+            {"DOWNLOAD_SLOTS": {"a.example": {"rate": "2", "burst": "2"}}}
+        )
+        self.assertEqual(self.acquire(limiter, "https://a.example", 0), 0)
+        self.assertEqual(self.acquire(limiter, "https://a.example", 0), 0)
+        self.assertEqual(self.acquire(limiter, "https://a.example", 0), 0.5)
+        for params in ({"rate": 0}, {"rate": "fast"}, {"rate": 1, "burst": 0}):
+            with self.assertRaises(ValueError):
+                self.get_limiter({"DOWNLOAD_SLOTS": {"a.example": params}})
+
+    def test_group(self):
+        settings = {
+            "DOWNLOAD_RATE_LIMIT_GROUPS": {"test-group": {"rate": 1}},
+            "DOWNLOAD_RATE_LIMIT_GROUP": "test-group",
+        }
+        limiter1 = self.get_limiter(settings)
+        limiter2 = self.get_limiter(settings)
+        self.assertEqual(self.acquire(limiter1, "https://a.example", 0), 0)
+        # the group is shared by both limiters
+        self.assertEqual(self.acquire(limiter2, "https://b.example", 0), 1)
+        meta = {"download_rate_group": None}
+        self.assertEqual(self.acquire(limiter2, "https://b.example", 0, meta), 0)
+
+    def test_group_meta(self):
+        limiter = self.get_limiter(
+            {"DOWNLOAD_RATE_LIMIT_GROUPS": {"test-group-meta": {"rate": 1}}}
+        )
+        meta = {"download_rate_group": "test-group-meta"}
+        self.assertEqual(self.acquire(limiter, "https://a.example", 0, meta), 0)
+        self.assertEqual(self.acquire(limiter, "https://b.example", 0, meta), 1)
+        self.assertEqual(self.acquire(limiter, "https://b.example", 0), 0)
+
+    def test_no_partial_consumption(self):
+        limiter = self.get_limiter(
+            {
+                "DOWNLOAD_RATE_LIMIT": 1,
+                "DOWNLOAD_RATE_LIMIT_BURST": 2,
+                "DOWNLOAD_SLOTS": {"a.example": {"rate": 1}},
+            }
+        )
+        self.assertEqual(self.acquire(limiter, "https://a.example", 0), 0)
+        self.assertEqual(self.acquire(limiter, "https://a.example", 0), 1)
+        # the global bucket kept its token
+        self.assertEqual(self.acquire(limiter, "https://b.example", 0), 0)
+
+    @defer.inlineCallbacks
+    def test_downloader(self):
+        crawler = get_crawler(Spider, {"DOWNLOAD_RATE_LIMIT": 20})
+        crawler.stats.open_spider(None)
+        downloader = Downloader(crawler)
+        downloader.handlers.download_request = lambda request, spider: defer.succeed(
+            Response(request.url)
+        )
+        spider = crawler._create_spider("foo")
+        start = time.monotonic()
+        yield defer.DeferredList(
+            [
+                downloader.fetch(
+                    Request(f"https://{i}.example", dont_filter=True), spider
+                )
+                for i in range(5)
+            ]
+        )
+        self.assertGreaterEqual(time.monotonic() - start, 0.19)
+        self.assertGreater(crawler.stats.get_value("downloader/rate_limit/delayed"), 0)
+        downloader.close()
+
+
+class PrioritySlotQueueTest(unittest.TestCase):
+    def test_order(self):
+        queue = _PrioritySlotQueue()
+        self.assertFalse(queue)
+        priorities = [0, 5, -1, 5, 0, 10]
+        for i, priority in enumerate(priorities):
+            queue.append((Request(f"https://example.com/{i}", priority=priority), i))
+        self.assertEqual(len(queue), 6)
+        self.assertEqual(queue[0][1], 5)
+        self.assertEqual([item[1] for item in queue], [5, 1, 3, 0, 4, 2])
+        self.assertEqual([queue.popleft()[1] for _ in range(6)], [5, 1, 3, 0, 4, 2])
+        self.assertFalse(queue)
+        with self.assertRaises(IndexError):
+            queue.popleft()
+
+    def test_slot(self):
+        self.assertIsInstance(Slot(1, 0, False).queue, deque)
+        self.assertIsInstance(
+            Slot(1, 0, False, priority_queue=True).queue, _PrioritySlotQueue
+        )
+
+    @defer.inlineCallbacks
+    def test_downloader(self):
+        crawler = get_crawler(
+            Spider,
+            {"CONCURRENT_REQUESTS_PER_DOMAIN": 1, "DOWNLOAD_SLOT_PRIORITY_QUEUE": True},
+        )
+        crawler.stats.open_spider(None)
+        downloader = Downloader(crawler)
+        downloads = {}
+        started = []
+
+        def download_request(request, spider):
+            started.append(request.url)
+            downloads[request.url] = defer.Deferred()
+            return downloads[request.url]
+
+        downloader.handlers.download_request = download_request
+        spider = crawler._create_spider("foo")
+        dfds = [
+            downloader.fetch(
+                Request(
+                    f"https://example.com/{priority}",
+                    priority=priority,
+                    dont_filter=True,
+                ),
+                spider,
+            )
+            for priority in (0, -1, 0, 1)
+        ]
+        for url in ("/0", "/1", "/0", "/-1"):
+            self.assertEqual(len(downloads), 1)
+            url = f"https://example.com{url}"
+            downloads.pop(url).callback(Response(url))
+        yield defer.DeferredList(dfds)
+        self.assertEqual(
+            started,
+            [
+                "https://example.com/0",
+                "https://example.com/1",
+                "https://example.com/0",
+                "https://example.com/-1",
+            ],
+        )
+        downloader.close()
+
+
+class ActiveSizeTest(unittest.TestCase):
+    def setUp(self):
+        self.crawler = get_crawler(
+            Spider, {"DOWNLOADER_MAX_ACTIVE_SIZE": 100, "CONCURRENT_REQUESTS": 8}
+        )
+        self.crawler.stats.open_spider(None)
+        self.downloader = Downloader(self.crawler)
+        self.downloader.handlers.download_request = self.download_request
+        self.spider = self.crawler._create_spider("foo")
+        self.downloads = {}
+
+    def tearDown(self):
+        self.downloader.close()
+
+    def download_request(self, request, spider):
+        self.downloads[request.url] = defer.Deferred()
+        return self.downloads[request.url]
+
+    def fetch(self, url):
+        return self.downloader.fetch(Request(url, dont_filter=True), self.spider)
+
+    def send(self, signal, url, **kwargs):
+        (request,) = (r for r in self.downloader.active if r.url == url)
+        self.crawler.signals.send_catch_log(
+            signal, request=request, spider=self.spider, **kwargs
+        )
+
+    def finish(self, url):
+        self.downloads.pop(url).callback(Response(url))
+
+    def test_expected_size(self):
+        self.fetch("https://a.example")
+        self.fetch("https://b.example")
+        self.send(
+            signals.headers_received, "https://a.example", headers={}, body_length=80
+        )
+        self.assertEqual(self.downloader.active_size, 80)
+        self.assertFalse(self.downloader.needs_backout())
+        self.send(signals.bytes_received, "https://a.example", data=b"x" * 50)
+        self.assertEqual(self.downloader.active_size, 80)
+        self.send(
+            signals.headers_received, "https://b.example", headers={}, body_length=30
+        )
+        self.assertEqual(self.downloader.active_size, 110)
+        self.assertTrue(self.downloader.needs_backout())
+        self.finish("https://a.example")
+        self.assertEqual(self.downloader.active_size, 30)
+        self.assertFalse(self.downloader.needs_backout())
+        self.finish("https://b.example")
+        self.assertEqual(self.downloader.active_size, 0)
+        self.assertEqual(self.downloader._active_sizes, {})
+        self.assertEqual(
+            self.crawler.stats.get_value("downloader/active_size_max"), 110
+        )
+
+    def test_received_size(self):
+        dfd = self.fetch("https://a.example")
+        dfd.addErrback(lambda failure: failure.trap(ValueError))
+        self.send(
+            signals.headers_received,
+            "https://a.example",
+            headers={},
+            body_length=UNKNOWN_LENGTH,
+        )
+        self.assertEqual(self.downloader.active_size, 0)
+        for _ in range(3):
+            self.send(signals.bytes_received, "https://a.example", data=b"x" * 40)
+        self.assertEqual(self.downloader.active_size, 120)
+        self.assertTrue(self.downloader.needs_backout())
+        self.downloads.pop("https://a.example").errback(ValueError())
+        self.assertEqual(self.downloader.active_size, 0)
+        self.assertFalse(self.downloader.needs_backout())
+
+    def test_disabled(self):
+        crawler = get_crawler(Spider)
+        downloader = Downloader(crawler)
+        downloader._slot_gc_loop.stop()  # Prevent an unclean reactor.
+        self.assertFalse(
+            crawler.signals.send_catch_log(
+                signals.bytes_received, data=b"x", request=Request("https://a.example")
+            )
+        )
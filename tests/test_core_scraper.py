@@ -0,0 +1,354 @@
+import sys
+import threading
+
+from twisted.internet import defer, reactor
+from twisted.internet.task import deferLater
+from twisted.python.failure import Failure
+from twisted.trial import unittest
+
+from scrapy import Spider, signals
+from scrapy.core.scraper import BodySizeEstimator, MemorySizeEstimator, Scraper, Slot
+from scrapy.http import HtmlResponse, Request, Response, TextResponse
+from scrapy.utils.test import get_crawler
+from tests.mockserver import MockServer
+
+
+class PreparseSpider(Spider):
+    name = "preparse"
+
+    def __init__(self, mockserver=None, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.mockserver = mockserver
+        self.preparsed = []
+        self.parse_threads = set()
+
+    def start_requests(self):
+        yield Request(self.mockserver.url("/follow?total=3&show=3"))
+
+    def parse(self, response):
+        self.preparsed.append(response._cached_selector is not None)
+        self.parse_threads.add(threading.current_thread())
+        for href in response.css("a::attr(href)").getall():
+            yield response.follow(href, self.parse_status)
+
+    def parse_status(self, response):
+        pass
+
+
+class PreparseTest(unittest.TestCase):
+    def setUp(self):
+        self.mockserver = MockServer()
+        self.mockserver.__enter__()
+
+    def tearDown(self):
+        self.mockserver.__exit__(None, None, None)
+
+    @defer.inlineCallbacks
+    def test_preparse(self):
+        crawler = get_crawler(PreparseSpider, {"SCRAPER_PREPARSE_THREADS": 2})
+        yield crawler.crawl(mockserver=self.mockserver)
+        self.assertEqual(crawler.spider.preparsed, [True])
+        self.assertEqual(crawler.spider.parse_threads, {threading.main_thread()})
+        self.assertEqual(crawler.stats.get_value("response_received_count"), 4)
+        self.assertEqual(crawler.stats.get_value("scraper/preparsed"), 4)
+        self.assertIsNone(crawler.engine.scraper._preparse_pool)
+        self.assertIsNone(crawler.engine.scraper._preparse_shutdown_trigger)
+
+    def test_preparse_pool_stopped_on_shutdown(self):
+        from twisted.internet import reactor
+
+        crawler = get_crawler(PreparseSpider, {"SCRAPER_PREPARSE_THREADS": 2})
+        scraper = Scraper(crawler)
+        scraper._start_preparse_pool()
+        pool = scraper._preparse_pool
+        self.assertTrue(pool.started)
+        trigger = scraper._preparse_shutdown_trigger
+        self.assertIsNotNone(trigger)
+        # unregister the trigger, then run it as the reactor would on shutdown
+        reactor.removeSystemEventTrigger(trigger)
+        scraper._stop_preparse_pool()
+        self.assertFalse(pool.started)
+        self.assertIsNone(scraper._preparse_pool)
+
+    @defer.inlineCallbacks
+    def test_preparse_disabled(self):
+        crawler = get_crawler(PreparseSpider)
+        yield crawler.crawl(mockserver=self.mockserver)
+        self.assertEqual(crawler.spider.preparsed, [False])
+        self.assertIsNone(crawler.stats.get_value("scraper/preparsed"))
+
+
+class SpooledSpider(Spider):
+    name = "spooled"
+
+    def __init__(self, mockserver=None, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.mockserver = mockserver
+        self.bodies = []
+
+    def start_requests(self):
+        url = self.mockserver.url("/follow?total=3&show=3")
+        yield Request(url, meta={"download_spool_size": 10})
+
+    def parse(self, response):
+        assert response.body == b""
+        self.bodies.append(response.spooled_body.getvalue())
+
+
+class SpooledBodyTest(unittest.TestCase):
+    def setUp(self):
+        self.mockserver = MockServer()
+        self.mockserver.__enter__()
+
+    def tearDown(self):
+        self.mockserver.__exit__(None, None, None)
+
+    @defer.inlineCallbacks
+    def test_spooled_body(self):
+        crawler = get_crawler(SpooledSpider)
+        yield crawler.crawl(mockserver=self.mockserver)
+        self.assertIsNone(crawler.stats.get_value("spider_exceptions/AssertionError"))
+        (body,) = crawler.spider.bodies
+        self.assertIn(b"follow?total=3", body)
+
+
+class SizeEstimatorTest(unittest.TestCase):
+    def test_body_size(self):
+        estimator = BodySizeEstimator()
+        body = b"a" * 2000
+        self.assertEqual(
+            estimator.response_size(HtmlResponse("https://a.example", body=body)),
+            2000,
+        )
+        self.assertEqual(
+            estimator.response_size(Response("https://a.example", body=b"a")), 1024
+        )
+        self.assertEqual(estimator.response_size(Failure(ValueError())), 1024)
+        self.assertEqual(estimator.item_size({"a": "b"}), 0)
+
+    def test_memory_size(self):
+        estimator = MemorySizeEstimator()
+        body = b"a" * 2000
+        self.assertEqual(
+            estimator.response_size(Response("https://a.example", body=body)), 2000
+        )
+        response = TextResponse("https://a.example", body=body, encoding="utf-8")
+        self.assertEqual(estimator.response_size(response), 2000)
+        response.text  # noqa: B018
+        self.assertEqual(
+            estimator.response_size(response), 2000 + sys.getsizeof(response.text)
+        )
+        response = HtmlResponse("https://a.example", body=body, encoding="utf-8")
+        self.assertEqual(estimator.response_size(response), 2000)
+        response.selector  # noqa: B018
+        self.assertEqual(
+            estimator.response_size(response),
+            2000 + sys.getsizeof(response.text) + 10 * 2000,
+        )
+        self.assertEqual(estimator.response_size(Failure(ValueError())), 1024)
+
+    def test_memory_item_size(self):
+        estimator = MemorySizeEstimator()
+        item = {"a": "x" * 1000}
+        self.assertEqual(
+            estimator.item_size(item), sys.getsizeof(item) + sys.getsizeof(item["a"])
+        )
+        self.assertEqual(estimator.item_size(1), sys.getsizeof(1))
+
+
+class SlotTest(unittest.TestCase):
+    def test_sizes(self):
+        slot = Slot(30000, MemorySizeEstimator())
+        request = Request("https://a.example")
+        response = TextResponse("https://a.example", body=b"a" * 2000)
+        slot.add_response_request(response, request)
+        slot.next_response_request_deferred()
+        self.assertEqual(slot.active_size, 2000)
+        response.text  # noqa: B018
+        slot.update_response_size(response, request)
+        self.assertEqual(slot.active_size, 2000 + sys.getsizeof(response.text))
+        slot.finish_response(response, request)
+        self.assertEqual(slot.active_size, 0)
+        slot.update_response_size(response, request)
+        self.assertEqual(slot.active_size, 0)
+
+    def test_needs_backout_items(self):
+        slot = Slot(5000)
+        request = Request("https://a.example")
+        response = Response("https://a.example", body=b"a" * 3000)
+        slot.add_response_request(response, request)
+        self.assertFalse(slot.needs_backout())
+        slot.items_size = 3000
+        self.assertTrue(slot.needs_backout())
+
+    def test_needs_backout_itemproc_queue(self):
+        slot = Slot(max_itemproc_queue=2)
+        self.assertFalse(slot.needs_backout())
+        for _ in range(2):
+            slot.itemproc_queue.append(({}, None, 0, defer.Deferred()))
+        self.assertFalse(slot.needs_backout())
+        self.assertFalse(slot.is_idle())
+        slot.itemproc_queue.append(({}, None, 0, defer.Deferred()))
+        self.assertTrue(slot.needs_backout())
+
+    def test_needs_backout_itemproc_queue_no_limit(self):
+        slot = Slot()
+        for _ in range(3):
+            slot.itemproc_queue.append(({}, None, 0, defer.Deferred()))
+        self.assertFalse(slot.needs_backout())
+
+
+class ItemsSizeSpider(Spider):
+    name = "itemssize"
+
+    def __init__(self, mockserver=None, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.mockserver = mockserver
+        self.items_sizes = []
+
+    def start_requests(self):
+        yield Request(self.mockserver.url("/status?n=200"))
+
+    def parse(self, response):
+        yield {"a": "x" * 1000}
+
+
+class ItemsSizePipeline:
+    def process_item(self, item, spider):
+        spider.items_sizes.append(spider.crawler.engine.scraper.slot.items_size)
+        return item
+
+
+class SelectorSizeSpider(ItemsSizeSpider):
+    name = "selectorsize"
+
+    def start_requests(self):
+        yield Request(self.mockserver.url("/follow?total=10&show=10"))
+
+    def parse(self, response):
+        self.body_size = len(response.body)
+        self.active_sizes = [self.crawler.engine.scraper.slot.active_size]
+        yield {"links": response.css("a::attr(href)").getall()}
+
+
+class SelectorSizePipeline:
+    def process_item(self, item, spider):
+        spider.active_sizes.append(spider.crawler.engine.scraper.slot.active_size)
+        return item
+
+
+class ItemsSizeTest(unittest.TestCase):
+    def setUp(self):
+        self.mockserver = MockServer()
+        self.mockserver.__enter__()
+
+    def tearDown(self):
+        self.mockserver.__exit__(None, None, None)
+
+    @defer.inlineCallbacks
+    def test_items_size(self):
+        crawler = get_crawler(
+            ItemsSizeSpider,
+            {
+                "ITEM_PIPELINES": {ItemsSizePipeline: 100},
+                "SCRAPER_SLOT_SIZE_ESTIMATOR": MemorySizeEstimator,
+            },
+        )
+        yield crawler.crawl(mockserver=self.mockserver)
+        item = {"a": "x" * 1000}
+        self.assertEqual(
+            crawler.spider.items_sizes,
+            [sys.getsizeof(item) + sys.getsizeof(item["a"])],
+        )
+        self.assertEqual(crawler.engine.scraper.slot.items_size, 0)
+
+    @defer.inlineCallbacks
+    def test_selector_size(self):
+        crawler = get_crawler(
+            SelectorSizeSpider,
+            {
+                "ITEM_PIPELINES": {SelectorSizePipeline: 100},
+                "SCRAPER_SLOT_SIZE_ESTIMATOR": MemorySizeEstimator,
+            },
+        )
+        yield crawler.crawl(mockserver=self.mockserver)
+        before, after = crawler.spider.active_sizes
+        self.assertGreaterEqual(
+            after - before,
+            MemorySizeEstimator.TREE_SIZE_RATIO * crawler.spider.body_size,
+        )
+        self.assertEqual(crawler.engine.scraper.slot.active_size, 0)
+
+
+class ManyItemsSpider(Spider):
+    name = "manyitems"
+
+    def __init__(self, mockserver=None, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.mockserver = mockserver
+        self.active = 0
+        self.max_active = 0
+
+    def start_requests(self):
+        yield Request(self.mockserver.url("/status?n=200"))
+
+    def parse(self, response):
+        for i in range(5):
+            yield {"i": i}
+
+
+class SlowPipeline:
+    @defer.inlineCallbacks
+    def process_item(self, item, spider):
+        spider.active += 1
+        spider.max_active = max(spider.max_active, spider.active)
+        yield deferLater(reactor, 0.05)
+        spider.active -= 1
+        return item
+
+
+class ItemPipelineConcurrencyTest(unittest.TestCase):
+    def setUp(self):
+        self.mockserver = MockServer()
+        self.mockserver.__enter__()
+
+    def tearDown(self):
+        self.mockserver.__exit__(None, None, None)
+
+    @defer.inlineCallbacks
+    def _crawl(self, settings_dict):
+        items = []
+        crawler = get_crawler(
+            ManyItemsSpider, {"ITEM_PIPELINES": {SlowPipeline: 100}, **settings_dict}
+        )
+        crawler.signals.connect(
+            lambda item: items.append(item), signal=signals.item_scraped, weak=False
+        )
+        yield crawler.crawl(mockserver=self.mockserver)
+        return crawler, items
+
+    @defer.inlineCallbacks
+    def test_concurrency(self):
+        crawler, items = yield self._crawl({"ITEM_PIPELINE_CONCURRENCY": 2})
+        self.assertEqual(items, [{"i": i} for i in range(5)])
+        self.assertEqual(crawler.spider.max_active, 2)
+        self.assertEqual(crawler.stats.get_value("item_pipeline/queued"), 3)
+        self.assertEqual(crawler.stats.get_value("item_pipeline/queue_max_depth"), 3)
+
+    @defer.inlineCallbacks
+    def test_no_concurrency_limit(self):
+        crawler, items = yield self._crawl({})
+        self.assertEqual(len(items), 5)
+        self.assertEqual(crawler.spider.max_active, 5)
+        self.assertIsNone(crawler.stats.get_value("item_pipeline/queued"))
+
+    @defer.inlineCallbacks
+    def test_pipeline_stats(self):
+        crawler, _ = yield self._crawl({})
+        prefix = "item_pipeline/tests.test_core_scraper.SlowPipeline"
+        self.assertEqual(crawler.stats.get_value(f"{prefix}/items"), 5)
+        time = crawler.stats.get_value(f"{prefix}/time_microseconds")
+        time_max = crawler.stats.get_value(f"{prefix}/time_max_microseconds")
+        self.assertIsInstance(time, int)
+        self.assertGreaterEqual(time, time_max)
+        self.assertGreater(time_max, 0)
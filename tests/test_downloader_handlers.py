@@ -26,7 +26,8 @@ from scrapy.core.downloader.handlers.http10 import HTTP10DownloadHandler
 from scrapy.core.downloader.handlers.http11 import HTTP11DownloadHandler
 from scrapy.core.downloader.handlers.s3 import S3DownloadHandler
 from scrapy.exceptions import NotConfigured
-from scrapy.http import Headers, HtmlResponse, Request
+from scrapy.http import Headers, HtmlResponse, Request, Response
+from scrapy.http.response import SpooledBody
 from scrapy.http.response.text import TextResponse
 from scrapy.responsetypes import responsetypes
 from scrapy.spiders import Spider
@@ -522,6 +523,108 @@ class Http11TestCase(HttpTestCase):
         d.addCallback(self.assertEqual, b"0123456789")
         return d
 
+    @defer.inlineCallbacks
+    def test_download_spooled(self):
+        meta = {"download_spool_size": 1000}
+        request = Request(self.getURL("largechunkedfile"), meta=meta)
+        response = yield self.download_request(request, Spider("foo"))
+        self.assertIs(type(response), Response)
+        self.assertEqual(response.body, b"")
+        self.assertIsInstance(response.spooled_body, SpooledBody)
+        self.assertIn("spooled", response.flags)
+        self.assertEqual(len(response.spooled_body), 1024 * 1024)
+        with response.spooled_body.open() as body:
+            self.assertEqual(body[-3:], b"xxx")
+            self.assertEqual(body.read(3), b"xxx")
+        self.assertEqual(response.spooled_body.getvalue(), b"x" * 1024 * 1024)
+        response.spooled_body.close()
+
+    @defer.inlineCallbacks
+    def test_download_spooled_content_length(self):
+        meta = {"download_spool_size": 5}
+        request = Request(self.getURL("file"), meta=meta)
+        response = yield self.download_request(request, Spider("foo"))
+        self.assertEqual(response.body, b"")
+        self.assertEqual(response.spooled_body.getvalue(), b"0123456789")
+        response.spooled_body.close()
+
+    @defer.inlineCallbacks
+    def test_download_not_spooled(self):
+        for meta in ({"download_spool_size": 10}, {}):
+            request = Request(self.getURL("file"), meta=meta)
+            response = yield self.download_request(request, Spider("foo"))
+            self.assertEqual(response.body, b"0123456789")
+            self.assertIsNone(response.spooled_body)
+            self.assertNotIn("spooled", response.flags)
+
+    @defer.inlineCallbacks
+    def test_download_spooled_maxsize(self):
+        meta = {"download_spool_size": 1000, "download_maxsize": 1500}
+        request = Request(self.getURL("largechunkedfile"), meta=meta)
+        d = self.download_request(request, Spider("foo"))
+        yield self.assertFailure(d, defer.CancelledError, error.ConnectionAborted)
+
+    @defer.inlineCallbacks
+    def _download_with_pool(self, settings_dict, concurrent, sequential=1, wait=0):
+        crawler = get_crawler(settings_dict=settings_dict)
+        download_handler = build_from_crawler(self.download_handler_cls, crawler)
+        try:
+            for _ in range(sequential):
+                responses = yield defer.gatherResults(
+                    [
+                        download_handler.download_request(
+                            Request(self.getURL("file")), Spider("foo")
+                        )
+                        for _ in range(concurrent)
+                    ]
+                )
+                for response in responses:
+                    self.assertEqual(response.body, b"0123456789")
+                d = defer.Deferred()
+                reactor.callLater(wait, d.callback, None)
+                yield d
+        finally:
+            yield download_handler.close()
+        return crawler.stats
+
+    @defer.inlineCallbacks
+    def test_pool_stats(self):
+        stats = yield self._download_with_pool({}, concurrent=1, sequential=2)
+        self.assertEqual(stats.get_value("downloader/pool/connections_opened"), 1)
+        self.assertEqual(stats.get_value("downloader/pool/connections_reused"), 1)
+        self.assertEqual(
+            stats.get_value("downloader/pool/tls_handshakes"),
+            1 if self.scheme == "https" else None,
+        )
+
+    @defer.inlineCallbacks
+    def test_pool_idle_timeout(self):
+        stats = yield self._download_with_pool(
+            {"DOWNLOAD_POOL_IDLE_TIMEOUT": 0.1}, concurrent=1, sequential=2, wait=0.3
+        )
+        self.assertEqual(stats.get_value("downloader/pool/connections_opened"), 2)
+        self.assertEqual(stats.get_value("downloader/pool/connections_reused"), None)
+        self.assertEqual(stats.get_value("downloader/pool/evicted/idle_timeout"), 2)
+
+    @defer.inlineCallbacks
+    def test_pool_maxsize(self):
+        stats = yield self._download_with_pool(
+            {"DOWNLOAD_POOL_MAXSIZE": 1}, concurrent=3, sequential=2
+        )
+        self.assertEqual(stats.get_value("downloader/pool/connections_opened"), 5)
+        self.assertEqual(stats.get_value("downloader/pool/connections_reused"), 1)
+        self.assertEqual(stats.get_value("downloader/pool/evicted/maxsize"), 4)
+        self.assertEqual(stats.get_value("downloader/pool/evicted/host_maxsize"), None)
+
+    @defer.inlineCallbacks
+    def test_pool_host_maxsize(self):
+        stats = yield self._download_with_pool(
+            {"CONCURRENT_REQUESTS_PER_DOMAIN": 1}, concurrent=2
+        )
+        self.assertEqual(stats.get_value("downloader/pool/connections_opened"), 2)
+        self.assertEqual(stats.get_value("downloader/pool/evicted/host_maxsize"), 1)
+        self.assertEqual(stats.get_value("downloader/pool/evicted/maxsize"), None)
+
     def test_download_chunked_content(self):
         request = Request(self.getURL("chunked"))
         d = self.download_request(request, Spider("foo"))
@@ -8,6 +8,7 @@ from contextlib import contextmanager
 from scrapy.downloadermiddlewares.httpcache import HttpCacheMiddleware
 from scrapy.exceptions import IgnoreRequest
 from scrapy.http import HtmlResponse, Request, Response
+from scrapy.http.response import SpooledBody
 from scrapy.settings import Settings
 from scrapy.spiders import Spider
 from scrapy.utils.test import get_crawler
@@ -143,6 +144,26 @@ class DefaultStorageTest(_BaseTest):
             self.assertIsInstance(cached_response, HtmlResponse)
             self.assertEqualResponse(response, cached_response)
 
+    def test_storage_spooled(self):
+        f = tempfile.TemporaryFile()
+        f.write(b"test body")
+        response = self.response.replace(body=b"", spooled_body=SpooledBody(f))
+        with self._storage() as storage:
+            storage.store_response(self.spider, self.request, response)
+            response.spooled_body.close()
+
+            cached_response = storage.retrieve_response(self.spider, self.request)
+            self.assertEqualResponse(self.response, cached_response)
+            self.assertIsNone(cached_response.spooled_body)
+
+            request = self.request.replace(meta={"download_spool_size": 4})
+            cached_response = storage.retrieve_response(self.spider, request)
+            self.assertIs(type(cached_response), Response)
+            self.assertEqual(cached_response.body, b"")
+            self.assertIn("spooled", cached_response.flags)
+            with cached_response.spooled_body:
+                self.assertEqual(cached_response.spooled_body.getvalue(), b"test body")
+
 
 class DbmStorageTest(DefaultStorageTest):
     storage_class = "scrapy.extensions.httpcache.DbmCacheStorage"
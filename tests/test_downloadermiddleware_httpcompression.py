@@ -2,6 +2,7 @@ from gzip import GzipFile
 from io import BytesIO
 from logging import WARNING
 from pathlib import Path
+from tempfile import TemporaryFile
 from unittest import SkipTest, TestCase
 from warnings import catch_warnings
 
@@ -14,6 +15,7 @@ from scrapy.downloadermiddlewares.httpcompression import (
 )
 from scrapy.exceptions import IgnoreRequest, NotConfigured, ScrapyDeprecationWarning
 from scrapy.http import HtmlResponse, Request, Response
+from scrapy.http.response import SpooledBody
 from scrapy.responsetypes import responsetypes
 from scrapy.spiders import Spider
 from scrapy.utils.gz import gunzip
@@ -421,6 +423,29 @@ class HttpCompressionTest(TestCase):
         self.assertStatsEqual("httpcompression/response_count", 1)
         self.assertStatsEqual("httpcompression/response_bytes", 230)
 
+    def test_process_request_spooled(self):
+        request = Request("http://scrapytest.org", meta={"download_spool_size": 10})
+        self.mw.process_request(request, self.spider)
+        self.assertNotIn("Accept-Encoding", request.headers)
+
+    def test_process_response_spooled(self):
+        response = self._getresponse("gzip")
+        f = TemporaryFile()
+        f.write(response.body)
+        with SpooledBody(f) as body:
+            response = Response(
+                response.url,
+                headers=response.headers,
+                flags=["spooled"],
+                spooled_body=body,
+            )
+            request = Request(response.url)
+            newresponse = self.mw.process_response(request, response, self.spider)
+            self.assertIs(newresponse, response)
+            self.assertFalse(body.closed)
+        self.assertEqual(newresponse.headers["Content-Encoding"], b"gzip")
+        self.assertStatsEqual("httpcompression/response_count", None)
+
     def test_process_response_head_request_no_decode_required(self):
         response = self._getresponse("gzip")
         response.headers["Content-Type"] = "application/gzip"
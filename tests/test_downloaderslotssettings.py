@@ -74,6 +74,25 @@ class CrawlTestCase(TestCase):
 
         self.assertTrue(max(list(error_delta.values())) < tolerance)
 
+    @defer.inlineCallbacks
+    def test_delay_timer_wheel(self):
+        crawler = CrawlerRunner(
+            {"DOWNLOAD_DELAY_TIMER_RESOLUTION": 0.05}
+        ).create_crawler(DownloaderSlotsSettingsTestSpider)
+        yield crawler.crawl(mockserver=self.mockserver)
+        self.assertIsNotNone(crawler.engine.downloader._timer_wheel)
+        slots = crawler.engine.downloader.slots
+        times = crawler.spider.times
+        tolerance = 0.3
+
+        delays_real = {k: v[1] - v[0] for k, v in times.items()}
+        error_delta = {
+            k: 1 - min(delays_real[k], v.delay) / max(delays_real[k], v.delay)
+            for k, v in slots.items()
+        }
+
+        self.assertTrue(max(list(error_delta.values())) < tolerance)
+
 
 def test_params():
     params = {
@@ -81,6 +100,7 @@ def test_params():
         "delay": 2,
         "randomize_delay": False,
         "throttle": False,
+        "priority_queue": True,
     }
     settings = {
         "DOWNLOAD_SLOTS": {
@@ -4,11 +4,18 @@ import sys
 import tempfile
 import unittest
 from pathlib import Path
+from unittest import mock
 
 from testfixtures import LogCapture
 
 from scrapy.core.scheduler import Scheduler
-from scrapy.dupefilters import RFPDupeFilter
+from scrapy.dupefilters import (
+    BloomDupeFilter,
+    MmapDupeFilter,
+    MmapFingerprintSet,
+    RFPDupeFilter,
+    ScalableBloomFilter,
+)
 from scrapy.http import Request
 from scrapy.utils.python import to_bytes
 from scrapy.utils.test import get_crawler
@@ -270,3 +277,431 @@ class RFPDupeFilterTest(unittest.TestCase):
             )
 
             dupefilter.close("finished")
+
+
+class ScalableBloomFilterTest(unittest.TestCase):
+    def test_add_contains(self):
+        bf = ScalableBloomFilter(capacity=100, error_rate=0.01)
+        fps = [hashlib.sha1(str(i).encode()).digest() for i in range(50)]
+        for fp in fps:
+            assert not bf.add(fp)
+        for fp in fps:
+            assert fp in bf
+            assert bf.add(fp)
+        self.assertEqual(len(bf), 50)
+
+    def test_scaling(self):
+        bf = ScalableBloomFilter(capacity=100, error_rate=0.01)
+        fps = [hashlib.sha1(str(i).encode()).digest() for i in range(1000)]
+        false_positives = sum(bf.add(fp) for fp in fps)
+        self.assertGreater(len(bf.slices), 1)
+        self.assertLess(false_positives, 30)
+        for fp in fps:
+            assert fp in bf
+        self.assertLess(bf.false_positive_rate, 0.01)
+        self.assertGreater(bf.fill_ratio, 0)
+
+    def test_invalid_arguments(self):
+        with self.assertRaises(ValueError):
+            ScalableBloomFilter(capacity=0)
+        with self.assertRaises(ValueError):
+            ScalableBloomFilter(error_rate=1)
+
+    def test_dump_load(self):
+        bf = ScalableBloomFilter(capacity=10, error_rate=0.01)
+        fps = [hashlib.sha1(str(i).encode()).digest() for i in range(100)]
+        for fp in fps:
+            bf.add(fp)
+        path = Path(tempfile.mkdtemp(), "bloom")
+        try:
+            bf.dump(path)
+            bf2 = ScalableBloomFilter.load(path)
+        finally:
+            shutil.rmtree(path.parent)
+        self.assertEqual(bf2.capacity, 10)
+        self.assertEqual(bf2.error_rate, 0.01)
+        self.assertEqual(len(bf2), len(bf))
+        self.assertEqual([s.bits for s in bf2.slices], [s.bits for s in bf.slices])
+        for fp in fps:
+            assert fp in bf2
+
+
+class BloomDupeFilterTest(unittest.TestCase):
+    def test_filter(self):
+        dupefilter = _get_dupefilter(
+            settings={"DUPEFILTER_CLASS": "scrapy.dupefilters.BloomDupeFilter"}
+        )
+        self.assertIsInstance(dupefilter, BloomDupeFilter)
+        r1 = Request("http://scrapytest.org/1")
+        r2 = Request("http://scrapytest.org/2")
+        r3 = Request("http://scrapytest.org/2")
+
+        assert not dupefilter.request_seen(r1)
+        assert dupefilter.request_seen(r1)
+
+        assert not dupefilter.request_seen(r2)
+        assert dupefilter.request_seen(r3)
+
+        dupefilter.close("finished")
+
+    def test_settings(self):
+        dupefilter = _get_dupefilter(
+            settings={
+                "DUPEFILTER_CLASS": "scrapy.dupefilters.BloomDupeFilter",
+                "DUPEFILTER_BLOOM_CAPACITY": 10,
+                "DUPEFILTER_BLOOM_ERROR_RATE": 0.1,
+            }
+        )
+        self.assertEqual(dupefilter.bloom.capacity, 10)
+        self.assertEqual(dupefilter.bloom.error_rate, 0.1)
+
+    def test_stats(self):
+        crawler = get_crawler(
+            settings_dict={"DUPEFILTER_CLASS": "scrapy.dupefilters.BloomDupeFilter"}
+        )
+        crawler.stats.open_spider(None)
+        dupefilter = _get_dupefilter(crawler=crawler)
+        dupefilter.request_seen(Request("http://scrapytest.org/1"))
+        dupefilter.request_seen(Request("http://scrapytest.org/2"))
+        dupefilter.close("finished")
+        self.assertEqual(crawler.stats.get_value("dupefilter/bloom/count"), 2)
+        self.assertEqual(crawler.stats.get_value("dupefilter/bloom/slices"), 1)
+        self.assertGreater(crawler.stats.get_value("dupefilter/bloom/fill_ratio"), 0)
+        self.assertLess(
+            crawler.stats.get_value("dupefilter/bloom/estimated_fp_rate"), 0.001
+        )
+
+    def test_dupefilter_path(self):
+        r1 = Request("http://scrapytest.org/1")
+        r2 = Request("http://scrapytest.org/2")
+        settings = {"DUPEFILTER_CLASS": "scrapy.dupefilters.BloomDupeFilter"}
+
+        path = tempfile.mkdtemp()
+        try:
+            df = _get_dupefilter(settings={**settings, "JOBDIR": path}, open=False)
+            try:
+                df.open()
+                assert not df.request_seen(r1)
+                assert df.request_seen(r1)
+            finally:
+                df.close("finished")
+            assert Path(path, "requests.bloom").exists()
+            assert not Path(path, "requests.seen").exists()
+
+            df2 = _get_dupefilter(settings={**settings, "JOBDIR": path}, open=False)
+            try:
+                df2.open()
+                assert df2.request_seen(r1)
+                assert not df2.request_seen(r2)
+                assert df2.request_seen(r2)
+            finally:
+                df2.close("finished")
+        finally:
+            shutil.rmtree(path)
+
+    def test_log_replayed_after_crash(self):
+        settings = {
+            "DUPEFILTER_CLASS": "scrapy.dupefilters.BloomDupeFilter",
+            "JOBDIR_FLUSH_SIZE": 0,
+        }
+        path = tempfile.mkdtemp()
+        try:
+            df = _get_dupefilter(settings={**settings, "JOBDIR": path}, open=False)
+            df.open()
+            assert not df.request_seen(Request("http://scrapytest.org/1"))
+            assert not df.request_seen(Request("http://scrapytest.org/2"))
+            # the process dies: the filter is not saved
+            df._log.file.close()
+            assert not Path(path, "requests.bloom").exists()
+            self.assertEqual(Path(path, "requests.bloom.log").stat().st_size, 32)
+
+            df2 = _get_dupefilter(settings={**settings, "JOBDIR": path}, open=False)
+            try:
+                df2.open()
+                assert df2.request_seen(Request("http://scrapytest.org/1"))
+                assert df2.request_seen(Request("http://scrapytest.org/2"))
+                assert not df2.request_seen(Request("http://scrapytest.org/3"))
+            finally:
+                df2.close("finished")
+            self.assertEqual(Path(path, "requests.bloom.log").stat().st_size, 0)
+        finally:
+            shutil.rmtree(path)
+
+    def test_checkpoint(self):
+        path = tempfile.mkdtemp()
+        try:
+            crawler = get_crawler(
+                settings_dict={
+                    "DUPEFILTER_CLASS": "scrapy.dupefilters.BloomDupeFilter",
+                    "DUPEFILTER_BLOOM_CHECKPOINT_SIZE": 2,
+                    "JOBDIR": path,
+                }
+            )
+            crawler.stats.open_spider(None)
+            df = _get_dupefilter(crawler=crawler)
+            df.request_seen(Request("http://scrapytest.org/1"))
+            assert not Path(path, "requests.bloom").exists()
+            df.request_seen(Request("http://scrapytest.org/2"))
+            assert Path(path, "requests.bloom").exists()
+            self.assertEqual(Path(path, "requests.bloom.log").stat().st_size, 0)
+            self.assertEqual(crawler.stats.get_value("dupefilter/bloom/count"), 2)
+            df.close("finished")
+        finally:
+            shutil.rmtree(path)
+
+    def test_stats_interval(self):
+        crawler = get_crawler(
+            settings_dict={"DUPEFILTER_CLASS": "scrapy.dupefilters.BloomDupeFilter"}
+        )
+        crawler.stats.open_spider(None)
+        dupefilter = _get_dupefilter(crawler=crawler)
+        dupefilter.stats_interval = 2
+        dupefilter.request_seen(Request("http://scrapytest.org/1"))
+        self.assertIsNone(crawler.stats.get_value("dupefilter/bloom/count"))
+        dupefilter.request_seen(Request("http://scrapytest.org/2"))
+        self.assertEqual(crawler.stats.get_value("dupefilter/bloom/count"), 2)
+        dupefilter.close("finished")
+
+
+class MmapFingerprintSetTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = Path(tempfile.mkdtemp())
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def _fps(self, n):
+        return [hashlib.sha1(str(i).encode()).digest() for i in range(n)]
+
+    def test_add_contains_memory(self):
+        fs = MmapFingerprintSet(tail_size=10, initial_slots=4)
+        fps = self._fps(100)
+        for fp in fps:
+            assert not fs.add(fp)
+        for fp in fps:
+            assert fp in fs
+            assert fs.add(fp)
+        assert hashlib.sha1(b"other").digest() not in fs
+        self.assertEqual(len(fs), 100)
+        self.assertGreaterEqual(fs.num_slots, 200)
+        fs.close()
+
+    def test_empty_record(self):
+        fs = MmapFingerprintSet(tail_size=1)
+        empty = bytes(20)
+        assert empty not in fs
+        assert not fs.add(empty)
+        assert empty in fs
+        assert fs.add(empty)
+        self.assertEqual(len(fs), 1)
+        fs.close()
+
+    def test_non_sha1_fingerprints(self):
+        fs = MmapFingerprintSet(tail_size=2)
+        assert not fs.add(b"short")
+        assert not fs.add(b"x" * 32)
+        assert fs.add(b"short")
+        assert b"x" * 32 in fs
+        fs.close()
+
+    def test_persistence(self):
+        path = self.tmpdir / "fps"
+        fps = self._fps(1000)
+        fs = MmapFingerprintSet(path, tail_size=100, initial_slots=16)
+        for fp in fps[:500]:
+            fs.add(fp)
+        fs.close()
+        self.assertEqual(Path(f"{path}.log").stat().st_size, 0)
+
+        fs = MmapFingerprintSet(path, tail_size=100)
+        self.assertEqual(len(fs), 500)
+        self.assertEqual(fs.tail, set())
+        for fp in fps[:500]:
+            assert fp in fs
+        for fp in fps[500:]:
+            assert fp not in fs
+        fs.close()
+
+    def test_log_replay(self):
+        path = self.tmpdir / "fps"
+        fps = self._fps(15)
+        fs = MmapFingerprintSet(path, tail_size=10)
+        for fp in fps:
+            fs.add(fp)
+        # simulate a crash: the tail was logged but never merged
+        fs._log.flush()
+        fs._close_table()
+        fs._log.close()
+
+        fs = MmapFingerprintSet(path, tail_size=10)
+        self.assertEqual(fs.count, 10)
+        self.assertEqual(len(fs.tail), 5)
+        for fp in fps:
+            assert fp in fs
+        fs.close()
+
+    def test_recount_after_interrupted_merge(self):
+        path = self.tmpdir / "fps"
+        fps = self._fps(5)
+        fs = MmapFingerprintSet(path, tail_size=100, flush_size=0)
+        for fp in fps:
+            fs.add(fp)
+        # simulate a crash during a merge: the records were written to the
+        # table, but the header was not updated and the log not truncated
+        for fp in fps:
+            pos, _ = fs._probe(
+                fs._mm, fs.num_slots, fs.record_size, fs._header.size, fp
+            )
+            fs._mm[pos : pos + fs.record_size] = fp
+        fs._close_table()
+        fs._log.file.close()
+
+        fs = MmapFingerprintSet(path, tail_size=100)
+        self.assertEqual(fs.count, 5)
+        self.assertEqual(len(fs.tail), 5)
+        fs.close()
+        fs = MmapFingerprintSet(path, tail_size=100)
+        self.assertEqual(len(fs), 5)
+        fs.close()
+
+    def test_log_commits(self):
+        path = self.tmpdir / "fps"
+        log_path = Path(f"{path}.log")
+        fps = self._fps(2)
+        fs = MmapFingerprintSet(path, tail_size=100, flush_size=40)
+        fs.add(fps[0])
+        self.assertEqual(log_path.stat().st_size, 0)
+        fs.add(fps[1])
+        self.assertEqual(log_path.read_bytes(), fps[0] + fps[1])
+        fs.close()
+        self.assertEqual(log_path.stat().st_size, 0)
+
+
+class MmapDupeFilterTest(unittest.TestCase):
+    settings = {"DUPEFILTER_CLASS": "scrapy.dupefilters.MmapDupeFilter"}
+
+    def test_filter(self):
+        dupefilter = _get_dupefilter(settings=self.settings)
+        self.assertIsInstance(dupefilter, MmapDupeFilter)
+        r1 = Request("http://scrapytest.org/1")
+        r2 = Request("http://scrapytest.org/2")
+        r3 = Request("http://scrapytest.org/2")
+
+        assert not dupefilter.request_seen(r1)
+        assert dupefilter.request_seen(r1)
+
+        assert not dupefilter.request_seen(r2)
+        assert dupefilter.request_seen(r3)
+
+        dupefilter.close("finished")
+
+    def test_dupefilter_path(self):
+        r1 = Request("http://scrapytest.org/1")
+        r2 = Request("http://scrapytest.org/2")
+
+        path = tempfile.mkdtemp()
+        try:
+            df = _get_dupefilter(settings={**self.settings, "JOBDIR": path}, open=False)
+            try:
+                df.open()
+                assert not df.request_seen(r1)
+                assert df.request_seen(r1)
+            finally:
+                df.close("finished")
+            assert Path(path, "requests.fingerprints").exists()
+
+            df2 = _get_dupefilter(
+                settings={**self.settings, "JOBDIR": path}, open=False
+            )
+            try:
+                df2.open()
+                assert df2.request_seen(r1)
+                assert not df2.request_seen(r2)
+                assert df2.request_seen(r2)
+            finally:
+                df2.close("finished")
+        finally:
+            shutil.rmtree(path)
+
+
+class RFPDupeFilterGroupCommitTest(unittest.TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def test_buffered_writes(self):
+        crawler = get_crawler(
+            settings_dict={
+                "JOBDIR": self.path,
+                "JOBDIR_FLUSH_SIZE": 41 * 3,
+                "JOBDIR_FLUSH_INTERVAL": 3600,
+            }
+        )
+        crawler.stats.open_spider(None)
+        df = _get_dupefilter(crawler=crawler)
+        seen = Path(self.path, "requests.seen")
+        df.request_seen(Request("http://scrapytest.org/1"))
+        df.request_seen(Request("http://scrapytest.org/2"))
+        self.assertEqual(seen.read_text(), "")
+        df.request_seen(Request("http://scrapytest.org/3"))
+        self.assertEqual(len(seen.read_text().splitlines()), 3)
+        df.request_seen(Request("http://scrapytest.org/4"))
+        df.close("finished")
+        self.assertEqual(len(seen.read_text().splitlines()), 4)
+        stats = crawler.stats
+        self.assertEqual(stats.get_value("jobdir/dupefilter/bytes_written"), 41 * 4)
+        self.assertEqual(stats.get_value("jobdir/dupefilter/flushes"), 2)
+        self.assertGreaterEqual(
+            stats.get_value("jobdir/dupefilter/flush_latency_max"), 0
+        )
+
+    def test_flush_interval(self):
+        df = _get_dupefilter(settings={"JOBDIR": self.path, "JOBDIR_FLUSH_INTERVAL": 0})
+        df.request_seen(Request("http://scrapytest.org/1"))
+        self.assertEqual(
+            len(Path(self.path, "requests.seen").read_text().splitlines()), 1
+        )
+        df.close("finished")
+
+    def test_flush_timer(self):
+        from twisted.internet import reactor
+
+        df = _get_dupefilter(
+            settings={"JOBDIR": self.path, "JOBDIR_FLUSH_INTERVAL": 3600}
+        )
+        seen = Path(self.path, "requests.seen")
+        with mock.patch.object(reactor, "running", True), mock.patch.object(
+            reactor, "callLater"
+        ) as call_later:
+            df.request_seen(Request("http://scrapytest.org/1"))
+            df.request_seen(Request("http://scrapytest.org/2"))
+        self.assertEqual(call_later.call_count, 1)
+        delay, flush = call_later.call_args[0]
+        self.assertGreater(delay, 3500)
+        self.assertEqual(seen.read_text(), "")
+        flush()
+        self.assertEqual(len(seen.read_text().splitlines()), 2)
+        self.assertIsNone(df.writer._flush_call)
+        df.close("finished")
+
+    def test_fsync(self):
+        for settings, calls in (({}, 0), ({"JOBDIR_FSYNC": True}, 1)):
+            with mock.patch("scrapy.utils.job.os.fsync") as fsync:
+                df = _get_dupefilter(settings={"JOBDIR": self.path, **settings})
+                df.request_seen(Request(f"http://scrapytest.org/{calls}"))
+                df.close("finished")
+            self.assertEqual(fsync.call_count, calls)
+
+    def test_torn_write(self):
+        r1 = Request("http://scrapytest.org/1")
+        fp = _get_dupefilter().request_fingerprint(r1)
+        Path(self.path, "requests.seen").write_text(fp + "\n" + fp[:10])
+        df = _get_dupefilter(settings={"JOBDIR": self.path})
+        assert df.request_seen(r1)
+        assert not df.request_seen(Request("http://scrapytest.org/2"))
+        df.close("finished")
+        df = _get_dupefilter(settings={"JOBDIR": self.path})
+        assert df.request_seen(Request("http://scrapytest.org/2"))
+        df.close("finished")
@@ -116,6 +116,10 @@ class ItemZeroDivisionErrorSpider(TestSpider):
     }
 
 
+class BatchedDispatchSpider(TestSpider):
+    custom_settings = {"SCHEDULER_DISPATCH_BATCH_SIZE": 4}
+
+
 class ChangeCloseReasonSpider(TestSpider):
     @classmethod
     def from_crawler(cls, crawler, *args, **kwargs):
@@ -251,6 +255,7 @@ class EngineTest(unittest.TestCase):
             DictItemsSpider,
             AttrsItemsSpider,
             DataClassItemsSpider,
+            BatchedDispatchSpider,
         ):
             run = CrawlerRun(spider)
             yield run.run()
@@ -502,7 +507,46 @@ def test_request_scheduled_signal(caplog):
     crawler.signals.disconnect(signal_handler, request_scheduled)
 
 
-if __name__ == "__main__":
+def test_next_requests_batches():
+    class TestScheduler(BaseScheduler):
+        def __init__(self, requests):
+            self.requests = requests
+            self.calls = []
+
+        def has_pending_requests(self) -> bool:
+            return bool(self.requests)
+
+        def enqueue_request(self, request: Request) -> bool:
+            return True
+
+        def next_request(self):
+            return self.requests.pop(0) if self.requests else None
+
+        def next_requests(self, n):
+            self.calls.append(n)
+            return super().next_requests(n)
+
+    crawler = get_crawler(
+        TestSpider,
+        {"CONCURRENT_REQUESTS": 5, "SCHEDULER_DISPATCH_BATCH_SIZE": 2},
+    )
+    engine = ExecutionEngine(crawler, lambda _: None)
+    engine.downloader._slot_gc_loop.stop()
+    engine.scraper.slot = Mock(needs_backout=Mock(return_value=False))
+    engine.spider = TestSpider()
+    engine.running = True
+
+    def download(request):
+        engine.downloader.active.add(request)
+        return defer.Deferred()
+
+    engine._download = download
+    scheduler = TestScheduler([Request(f"https://{i}.example") for i in range(8)])
+    engine.slot = Slot((), False, Mock(), scheduler)
+    engine._next_request()
+    assert scheduler.calls == [2, 2, 1]
+    assert len(engine.downloader.active) == 5
+    assert len(scheduler.requests) == 3
     if len(sys.argv) > 1 and sys.argv[1] == "runserver":
         start_test_site(debug=True)
         reactor.run()
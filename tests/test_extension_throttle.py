@@ -4,8 +4,9 @@ from unittest.mock import Mock
 import pytest
 
 from scrapy import Request, Spider
+from scrapy.core.downloader import Slot
 from scrapy.exceptions import NotConfigured
-from scrapy.extensions.throttle import AutoThrottle
+from scrapy.extensions.throttle import AdaptiveConcurrency, AutoThrottle
 from scrapy.http.response import Response
 from scrapy.settings.default_settings import (
     AUTOTHROTTLE_MAX_DELAY,
@@ -341,3 +342,131 @@ def test_debug_disabled(caplog):
         at._response_downloaded(response, request, spider)
 
     assert caplog.record_tuples == []
+
+
+def get_ac_crawler(settings=None):
+    settings = settings or {}
+    settings["ADAPTIVE_CONCURRENCY_ENABLED"] = True
+    crawler = _get_crawler(settings_dict=settings)
+    crawler.engine = Mock()
+    crawler.engine.downloader = Mock()
+    crawler.engine.downloader.slots = {"foo": Slot(4, 0, False)}
+    return crawler
+
+
+def download(ac, latency=1.0, status=200, fail=False):
+    meta = {"download_latency": latency, "download_slot": "foo"}
+    request = Request("https://example.com", meta=meta)
+    spider = TestSpider()
+    if not fail:
+        ac._response_downloaded(Response(request.url, status=status), request, spider)
+    ac._request_left_downloader(request, spider)
+
+
+def test_ac_enabled():
+    with pytest.raises(NotConfigured):
+        build_from_crawler(AdaptiveConcurrency, _get_crawler())
+    build_from_crawler(AdaptiveConcurrency, get_ac_crawler())
+
+
+@pytest.mark.parametrize(
+    "settings",
+    (
+        {"ADAPTIVE_CONCURRENCY_MIN": 0},
+        {"ADAPTIVE_CONCURRENCY_MIN": 4, "ADAPTIVE_CONCURRENCY_MAX": 2},
+        {"ADAPTIVE_CONCURRENCY_BACKOFF": 0.0},
+        {"ADAPTIVE_CONCURRENCY_BACKOFF": 1.0},
+    ),
+)
+def test_ac_invalid(settings):
+    with pytest.raises(NotConfigured):
+        build_from_crawler(AdaptiveConcurrency, get_ac_crawler(settings))
+
+
+def test_ac_additive_increase():
+    crawler = get_ac_crawler()
+    ac = build_from_crawler(AdaptiveConcurrency, crawler)
+    slot = crawler.engine.downloader.slots["foo"]
+    for _ in range(4):
+        download(ac)
+    assert slot.concurrency == 5
+    for _ in range(5):
+        download(ac)
+    assert slot.concurrency == 6
+    assert not ac._responded
+
+
+def test_ac_max():
+    crawler = get_ac_crawler({"ADAPTIVE_CONCURRENCY_MAX": 5})
+    ac = build_from_crawler(AdaptiveConcurrency, crawler)
+    slot = crawler.engine.downloader.slots["foo"]
+    for _ in range(100):
+        download(ac)
+    assert slot.concurrency == 5
+
+
+@pytest.mark.parametrize(
+    ("kwargs", "expected"),
+    (
+        ({"status": 503}, 4),
+        ({"status": 404}, 8),
+        ({"fail": True}, 4),
+        ({"latency": 2.5}, 4),
+        ({"latency": 1.5}, 8),
+    ),
+)
+def test_ac_multiplicative_decrease(kwargs, expected):
+    crawler = get_ac_crawler({"ADAPTIVE_CONCURRENCY_MAX": 64})
+    ac = build_from_crawler(AdaptiveConcurrency, crawler)
+    slot = crawler.engine.downloader.slots["foo"]
+    while slot.concurrency < 8:
+        download(ac, latency=0.0)
+    ac._get_window(slot).size = 8.0
+    ac._get_window(slot).min_latency = 1.0
+    ac._get_window(slot).latency = None
+    download(ac, **kwargs)
+    assert slot.concurrency == expected
+
+
+def test_ac_decrease_once_per_round_trip():
+    crawler = get_ac_crawler()
+    ac = build_from_crawler(AdaptiveConcurrency, crawler)
+    slot = crawler.engine.downloader.slots["foo"]
+    download(ac, latency=60.0)
+    download(ac, status=503)
+    assert slot.concurrency == 2
+    download(ac, status=503)
+    download(ac, fail=True)
+    assert slot.concurrency == 2
+    ac._get_window(slot).last_decrease -= 3600
+    download(ac, fail=True)
+    assert slot.concurrency == 1
+    ac._get_window(slot).last_decrease -= 3600
+    download(ac, fail=True)
+    assert slot.concurrency == 1
+
+
+def test_ac_skipped():
+    crawler = get_ac_crawler()
+    ac = build_from_crawler(AdaptiveConcurrency, crawler)
+    slot = crawler.engine.downloader.slots["foo"]
+    slot.throttle = False
+    for _ in range(10):
+        download(ac)
+    download(ac, fail=True)
+    assert slot.concurrency == 4
+    request = Request("https://example.com", meta={"download_latency": 1.0})
+    ac._response_downloaded(Response(request.url), request, TestSpider())
+    ac._request_left_downloader(request, TestSpider())
+    assert not ac._responded
+
+
+def test_ac_debug(caplog):
+    crawler = get_ac_crawler({"ADAPTIVE_CONCURRENCY_DEBUG": True})
+    ac = build_from_crawler(AdaptiveConcurrency, crawler)
+    caplog.clear()
+    with caplog.at_level(INFO):
+        for _ in range(4):
+            download(ac)
+    assert len(caplog.records) == 1
+    assert "slot: foo | concurrency: 4 -> 5" in caplog.records[0].getMessage()
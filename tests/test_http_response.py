@@ -1,5 +1,6 @@
 import codecs
 import unittest
+from tempfile import TemporaryFile
 from unittest import mock
 
 from packaging.version import Version as parse_version
@@ -16,6 +17,7 @@ from scrapy.http import (
     TextResponse,
     XmlResponse,
 )
+from scrapy.http.response import SpooledBody
 from scrapy.link import Link
 from scrapy.selector import Selector
 from scrapy.utils.python import to_unicode
@@ -1034,3 +1036,45 @@ class CustomResponseTest(TextResponseTest):
                 "__init__() got an unexpected keyword argument 'unknown'"
             )
         )
+
+
+class SpooledBodyTest(unittest.TestCase):
+    def _body(self, data):
+        f = TemporaryFile()
+        f.write(data)
+        return SpooledBody(f)
+
+    def test_open(self):
+        body = self._body(b"data")
+        self.assertEqual(len(body), 4)
+        with body.open() as data, body.open() as other:
+            self.assertEqual(data.read(2), b"da")
+            self.assertEqual(other.read(), b"data")
+            self.assertEqual(data[:], b"data")
+        self.assertEqual(body.getvalue(), b"data")
+        body.close()
+
+    def test_close(self):
+        body = self._body(b"data")
+        file = body._file
+        data = body.open()
+        with body:
+            self.assertFalse(body.closed)
+        self.assertTrue(body.closed)
+        self.assertTrue(file.closed)
+        # maps outlive the body
+        self.assertEqual(data[:], b"data")
+        data.close()
+        with self.assertRaises(ValueError):
+            body.open()
+        body.close()
+
+    def test_response(self):
+        body = self._body(b"data")
+        response = Response("https://example.com", spooled_body=body)
+        self.assertEqual(response.body, b"")
+        self.assertIs(response.spooled_body, body)
+        self.assertIs(response.copy().spooled_body, body)
+        self.assertIs(response.replace(status=404).spooled_body, body)
+        self.assertIsNone(response.replace(body=b"data").spooled_body)
+        body.close()
@@ -1,4 +1,5 @@
 import dataclasses
+import hashlib
 import os
 import random
 import time
@@ -6,7 +7,7 @@ from datetime import datetime
 from io import BytesIO
 from pathlib import Path
 from shutil import rmtree
-from tempfile import mkdtemp
+from tempfile import TemporaryFile, mkdtemp
 from unittest import mock
 from urllib.parse import urlparse
 
@@ -16,6 +17,7 @@ from twisted.internet import defer
 from twisted.trial import unittest
 
 from scrapy.http import Request, Response
+from scrapy.http.response import SpooledBody
 from scrapy.item import Field, Item
 from scrapy.pipelines.files import (
     FilesPipeline,
@@ -49,6 +51,33 @@ class FilesPipelineTestCase(unittest.TestCase):
     def tearDown(self):
         rmtree(self.tempdir)
 
+    def _spooled_response(self, request, data):
+        f = TemporaryFile()
+        f.write(data)
+        return Response(request.url, flags=["spooled"], spooled_body=SpooledBody(f))
+
+    def test_file_downloaded_spooled(self):
+        data = b"spooled body" * 1000
+        request = Request("https://example.com/file.bin")
+        response = self._spooled_response(request, data)
+        checksum = self.pipeline.file_downloaded(response, request, None)
+        self.assertEqual(checksum, hashlib.md5(data).hexdigest())  # noqa: S324
+        path = Path(self.tempdir, self.pipeline.file_path(request))
+        self.assertEqual(path.read_bytes(), data)
+        response.spooled_body.close()
+
+    def test_media_downloaded_spooled_closed(self):
+        request = Request("https://example.com/file.bin")
+        response = self._spooled_response(request, b"data")
+        result = {"url": request.url}
+        with mock.patch.object(
+            self.pipeline, "media_downloaded", return_value=result
+        ) as media_downloaded:
+            dfd = self.pipeline._media_downloaded(response, request, None, None)
+        media_downloaded.assert_called_once_with(response, request, None, item=None)
+        self.assertIs(self.successResultOf(dfd), result)
+        self.assertTrue(response.spooled_body.closed)
+
     def test_file_path(self):
         file_path = self.pipeline.file_path
         self.assertEqual(
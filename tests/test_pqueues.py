@@ -1,12 +1,28 @@
+import heapq
+import pickle
+import random
+import shutil
 import tempfile
 import unittest
+from pathlib import Path
 
 import queuelib
 
+from scrapy import signals
 from scrapy.http.request import Request
-from scrapy.pqueues import DownloaderAwarePriorityQueue, ScrapyPriorityQueue
+from scrapy.pqueues import (
+    DownloaderAwarePriorityQueue,
+    ScrapyPriorityQueue,
+    SqlitePriorityQueue,
+)
 from scrapy.spiders import Spider
-from scrapy.squeues import FifoMemoryQueue
+from scrapy.squeues import (
+    CompactLifoDiskQueue,
+    FifoMemoryQueue,
+    MarshalFifoDiskQueue,
+    PickleFifoDiskQueue,
+    PickleLifoDiskQueue,
+)
 from scrapy.utils.test import get_crawler
 from tests.test_scheduler import MockDownloader, MockEngine
 
@@ -93,11 +109,199 @@ class PriorityQueueTest(unittest.TestCase):
         self.assertEqual(dequeued.priority, req3.priority)
         self.assertEqual(queue.close(), [-1, -2])
 
+    def test_many_priorities(self):
+        rng = random.Random(0)
+        queue = ScrapyPriorityQueue.from_crawler(self.crawler, FifoMemoryQueue, "")
+        reference = []
+        for i in range(5000):
+            priority = rng.randrange(-1000, 1000)
+            queue.push(Request(f"https://example.org/{i}", priority=priority))
+            heapq.heappush(reference, (-priority, i))
+            if i % 3 == 0:
+                self.assertEqual(
+                    queue.pop().url,
+                    f"https://example.org/{heapq.heappop(reference)[1]}",
+                )
+            self.assertEqual(len(queue), len(reference))
+        while reference:
+            self.assertEqual(
+                queue.pop().url, f"https://example.org/{heapq.heappop(reference)[1]}"
+            )
+        self.assertIsNone(queue.pop())
+        self.assertEqual(queue.close(), [])
+
+    def test_poplast(self):
+        queue = ScrapyPriorityQueue.from_crawler(self.crawler, FifoMemoryQueue, "")
+        self.assertIsNone(queue.lastprio)
+        self.assertIsNone(queue.poplast())
+        for i, priority in enumerate([1, -3, 0, -3]):
+            queue.push(Request(f"https://example.org/{i}", priority=priority))
+        self.assertEqual(queue.lastprio, 3)
+        self.assertEqual(queue.poplast().url, "https://example.org/1")
+        self.assertEqual(queue.poplast().url, "https://example.org/3")
+        self.assertEqual(queue.lastprio, 0)
+        self.assertEqual(len(queue), 2)
+        self.assertEqual(queue.pop().url, "https://example.org/0")
+        self.assertEqual(queue.pop().url, "https://example.org/2")
+        self.assertIsNone(queue.pop())
+
+    def test_push_error(self):
+        queue = ScrapyPriorityQueue.from_crawler(
+            self.crawler, PickleFifoDiskQueue, tempfile.mkdtemp()
+        )
+        queue.push(Request("https://example.org/1", priority=1))
+        with self.assertRaises(ValueError):
+            queue.push(Request("https://example.org/2", callback=lambda r: None))
+        self.assertEqual(len(queue), 1)
+        self.assertEqual(queue.pop().url, "https://example.org/1")
+        self.assertIsNone(queue.pop())
+        self.assertEqual(queue.close(), [])
+
+    def test_resume(self):
+        temp_dir = tempfile.mkdtemp()
+        queue = ScrapyPriorityQueue.from_crawler(
+            self.crawler, PickleFifoDiskQueue, temp_dir
+        )
+        for i in range(6):
+            queue.push(Request(f"https://example.org/{i}", priority=i % 3))
+        state = queue.close()
+        self.assertEqual(sorted(state), [-2, -1, 0])
+        queue = ScrapyPriorityQueue.from_crawler(
+            self.crawler, PickleFifoDiskQueue, temp_dir, state + [-5]
+        )
+        self.assertEqual(len(queue), 6)
+        self.assertEqual(queue.curprio, -2)
+        self.assertEqual(
+            [queue.pop().url[-1] for _ in range(6)], ["2", "5", "1", "4", "0", "3"]
+        )
+        self.assertEqual(queue.close(), [])
+
+
+class SqlitePriorityQueueTest(unittest.TestCase):
+    def setUp(self):
+        self.crawler = get_crawler(Spider, {"SCHEDULER_SQLITE_BATCH_SIZE": 3})
+        self.crawler.spider = self.crawler._create_spider("foo")
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def queue(self, downstream_queue_cls=PickleFifoDiskQueue):
+        return SqlitePriorityQueue.from_crawler(
+            self.crawler, downstream_queue_cls, self.temp_dir
+        )
+
+    def test_push_pop_priorities(self):
+        queue = self.queue()
+        self.assertIsNone(queue.pop())
+        self.assertIsNone(queue.peek())
+        priorities = [3, -5, 0, 3, 1000, -5, 1]
+        for i, priority in enumerate(priorities):
+            queue.push(Request(f"https://example.org/{i}", priority=priority))
+        self.assertEqual(len(queue), len(priorities))
+        self.assertEqual(queue.peek().url, "https://example.org/4")
+        self.assertEqual(len(queue), len(priorities))
+        dequeued = [queue.pop() for _ in priorities]
+        self.assertIsNone(queue.pop())
+        self.assertEqual(len(queue), 0)
+        self.assertEqual(
+            [r.priority for r in dequeued], sorted(priorities, reverse=True)
+        )
+        self.assertEqual(
+            [r.url for r in dequeued if r.priority in (3, -5)],
+            [
+                "https://example.org/0",
+                "https://example.org/3",
+                "https://example.org/1",
+                "https://example.org/5",
+            ],
+        )
+        self.assertEqual(queue.close(), [])
+
+    def test_lifo(self):
+        queue = self.queue(PickleLifoDiskQueue)
+        for i in range(5):
+            queue.push(Request(f"https://example.org/{i}", priority=i // 2))
+        self.assertEqual(
+            [queue.pop().url[-1] for _ in range(5)], ["4", "3", "2", "1", "0"]
+        )
+        queue.close()
+
+    def test_persistence(self):
+        queue = self.queue()
+        for i in range(10):
+            queue.push(Request(f"https://example.org/{i}", priority=i % 3))
+        self.assertEqual(queue.pop().url, "https://example.org/2")
+        self.assertEqual(queue.close(), [])
+        self.assertTrue(Path(self.temp_dir, "requests.sqlite").exists())
+        queue = self.queue()
+        self.assertEqual(len(queue), 9)
+        self.assertEqual(queue.pop().url, "https://example.org/5")
+        queue.push(Request("https://example.org/10", priority=2))
+        urls = [queue.pop().url for _ in range(len(queue))]
+        self.assertEqual(urls[:2], ["https://example.org/8", "https://example.org/10"])
+        queue.close()
+
+    def test_callbacks(self):
+        queue = self.queue()
+        queue.push(Request("https://example.org", callback=self.crawler.spider.parse))
+        self.assertEqual(queue.pop().callback, self.crawler.spider.parse)
+        with self.assertRaises(ValueError):
+            queue.push(Request("https://example.org", callback=lambda r: None))
+        self.assertEqual(len(queue), 0)
+        queue.close()
+
+    def test_pop_pending(self):
+        queue = self.queue()
+        queue.push(Request("https://example.org/0", priority=0))
+        queue.push(Request("https://example.org/1", priority=1))
+        self.assertEqual(queue.peek().url, "https://example.org/1")
+        self.assertEqual(queue.pop().url, "https://example.org/1")
+        self.assertEqual(len(queue._batch), 1)
+        rows = queue._db.execute("SELECT COUNT(*) FROM requests").fetchone()[0]
+        self.assertEqual(rows, 0)
+        for i in range(2, 5):
+            queue.push(Request(f"https://example.org/{i}", priority=-i))
+        queue.push(Request("https://example.org/5", priority=0))
+        self.assertEqual(len(queue._batch), 2)
+        self.assertEqual(
+            [queue.pop().url[-1] for _ in range(len(queue))],
+            ["0", "5", "2", "3", "4"],
+        )
+        queue.close()
+
+    def test_serialization(self):
+        for downstream_queue_cls in (MarshalFifoDiskQueue, CompactLifoDiskQueue):
+            with self.subTest(downstream_queue_cls=downstream_queue_cls):
+                shutil.rmtree(self.temp_dir)
+                queue = self.queue(downstream_queue_cls)
+                for i in range(5):
+                    queue.push(Request(f"https://example.org/{i}", meta={"i": i}))
+                self.assertEqual(queue.pop().meta, {"i": 4 if queue._lifo else 0})
+                data = queue._db.execute("SELECT request FROM requests").fetchone()
+                self.assertRaises(Exception, pickle.loads, data[0])
+                queue.close()
+                queue = self.queue(downstream_queue_cls)
+                self.assertEqual(len(queue), 4)
+                self.assertEqual(queue.pop().url[-1], "3" if queue._lifo else "1")
+                queue.close()
+
+    def test_start_priorities(self):
+        with self.assertRaises(ValueError):
+            SqlitePriorityQueue.from_crawler(
+                self.crawler, PickleFifoDiskQueue, self.temp_dir, [0, 1]
+            )
+
+    def test_memory(self):
+        queue = SqlitePriorityQueue.from_crawler(self.crawler, FifoMemoryQueue, "")
+        self.assertIsInstance(queue, ScrapyPriorityQueue)
+
 
 class DownloaderAwarePriorityQueueTest(unittest.TestCase):
     def setUp(self):
         crawler = get_crawler(Spider)
         crawler.engine = MockEngine(downloader=MockDownloader())
+        self.crawler = crawler
         self.queue = DownloaderAwarePriorityQueue.from_crawler(
             crawler=crawler,
             downstream_queue_cls=FifoMemoryQueue,
@@ -155,3 +359,62 @@ class DownloaderAwarePriorityQueueTest(unittest.TestCase):
         self.assertEqual(self.queue.peek().url, req3.url)
         self.assertEqual(self.queue.pop().url, req3.url)
         self.assertIsNone(self.queue.peek())
+
+    def _send(self, signal, url):
+        self.crawler.signals.send_catch_log(
+            signal, request=Request(url), spider=self.crawler.spider
+        )
+
+    def test_active_downloads(self):
+        for url in ["http://a/1", "http://a/2", "http://b/1", "http://b/2"]:
+            self.queue.push(Request(url))
+        self.assertEqual(self.queue.pop().url, "http://a/1")
+        self._send(signals.request_reached_downloader, "http://a/1")
+        self.assertEqual(self.queue.peek().url, "http://b/1")
+        self.assertEqual(self.queue.pop().url, "http://b/1")
+        self._send(signals.request_reached_downloader, "http://b/1")
+        self._send(signals.request_reached_downloader, "http://b/0")
+        self.assertEqual(self.queue.pop().url, "http://a/2")
+        self._send(signals.request_left_downloader, "http://b/0")
+        self._send(signals.request_left_downloader, "http://b/1")
+        self.assertEqual(self.queue.pop().url, "http://b/2")
+        self.assertIsNone(self.queue.pop())
+
+    def test_poplast(self):
+        self.assertIsNone(self.queue.poplast())
+        self.queue.push(Request("http://a/1", priority=1))
+        self.queue.push(Request("http://b/1", priority=-1))
+        self.queue.push(Request("http://b/2", priority=2))
+        self.assertEqual(self.queue.lastprio, 1)
+        self.assertEqual(self.queue.poplast().url, "http://b/1")
+        self.assertEqual(self.queue.poplast().url, "http://a/1")
+        self.assertNotIn("a", self.queue)
+        self.assertEqual(self.queue.pop().url, "http://b/2")
+
+    def test_no_signals(self):
+        downloader = self.crawler.engine.downloader
+        for url in ["http://a/1", "http://a/2", "http://b/1", "http://b/2"]:
+            self.queue.push(Request(url))
+        self.assertEqual(self.queue.pop().url, "http://a/1")
+        downloader.increment("a")
+        self.assertEqual(self.queue.pop().url, "http://b/1")
+        downloader.increment("b")
+        downloader.increment("b")
+        self.assertEqual(self.queue.pop().url, "http://a/2")
+        downloader.decrement("b")
+        downloader.decrement("b")
+        self.assertEqual(self.queue.pop().url, "http://b/2")
+        self.assertIsNone(self.queue.pop())
+
+    def test_stale_entries(self):
+        for i in range(3):
+            self.queue.push(Request(f"http://{i}/"))
+        for _ in range(1000):
+            self._send(signals.request_reached_downloader, "http://1/")
+            self._send(signals.request_reached_downloader, "http://2/")
+            self._send(signals.request_left_downloader, "http://1/")
+        self.assertLess(len(self.queue._heap), 100)
+        self.assertEqual(
+            [self.queue.pop().url for _ in range(3)],
+            ["http://0/", "http://1/", "http://2/"],
+        )
@@ -4,10 +4,12 @@ import collections
 import shutil
 import tempfile
 import unittest
+from pathlib import Path
 
 from twisted.internet import defer
 from twisted.trial.unittest import TestCase
 
+from scrapy import signals
 from scrapy.core.downloader import Downloader
 from scrapy.core.scheduler import Scheduler
 from scrapy.crawler import Crawler
@@ -45,7 +47,7 @@ class MockDownloader:
 
 
 class MockCrawler(Crawler):
-    def __init__(self, priority_queue_cls, jobdir):
+    def __init__(self, priority_queue_cls, jobdir, settings=None):
         settings = {
             "SCHEDULER_DEBUG": False,
             "SCHEDULER_DISK_QUEUE": "scrapy.squeues.PickleLifoDiskQueue",
@@ -53,6 +55,7 @@ class MockCrawler(Crawler):
             "SCHEDULER_PRIORITY_QUEUE": priority_queue_cls,
             "JOBDIR": jobdir,
             "DUPEFILTER_CLASS": "scrapy.dupefilters.BaseDupeFilter",
+            **(settings or {}),
         }
         super().__init__(Spider, settings)
         self.engine = MockEngine(downloader=MockDownloader())
@@ -62,9 +65,12 @@ class MockCrawler(Crawler):
 class SchedulerHandler:
     priority_queue_cls: str | None = None
     jobdir = None
+    settings: dict | None = None
 
     def create_scheduler(self):
-        self.mock_crawler = MockCrawler(self.priority_queue_cls, self.jobdir)
+        self.mock_crawler = MockCrawler(
+            self.priority_queue_cls, self.jobdir, self.settings
+        )
         self.scheduler = Scheduler.from_crawler(self.mock_crawler)
         self.spider = Spider(name="spider")
         self.scheduler.open(self.spider)
@@ -126,6 +132,19 @@ class BaseSchedulerInMemoryTester(SchedulerHandler):
             priorities, sorted([x[1] for x in _PRIORITIES], key=lambda x: -x)
         )
 
+    def test_next_requests(self):
+        for url, priority in _PRIORITIES:
+            self.scheduler.enqueue_request(Request(url, priority=priority))
+
+        requests = self.scheduler.next_requests(3)
+        self.assertEqual([r.priority for r in requests], [2, 1, 0])
+        requests = self.scheduler.next_requests(3)
+        self.assertEqual([r.priority for r in requests], [-1, -2])
+        self.assertEqual(self.scheduler.next_requests(3), [])
+        stats = self.mock_crawler.stats
+        self.assertEqual(stats.get_value("scheduler/dequeued"), len(_PRIORITIES))
+        self.assertEqual(stats.get_value("scheduler/dequeued/memory"), len(_PRIORITIES))
+
 
 class BaseSchedulerOnDiskTester(SchedulerHandler):
     def setUp(self):
@@ -188,6 +207,106 @@ class TestSchedulerOnDisk(BaseSchedulerOnDiskTester, unittest.TestCase):
     priority_queue_cls = "scrapy.pqueues.ScrapyPriorityQueue"
 
 
+class TestSchedulerWithSqliteInMemory(BaseSchedulerInMemoryTester, unittest.TestCase):
+    priority_queue_cls = "scrapy.pqueues.SqlitePriorityQueue"
+
+
+class TestSchedulerWithSqliteOnDisk(BaseSchedulerOnDiskTester, unittest.TestCase):
+    priority_queue_cls = "scrapy.pqueues.SqlitePriorityQueue"
+
+
+class TestSchedulerSpill(SchedulerHandler, unittest.TestCase):
+    priority_queue_cls = "scrapy.pqueues.ScrapyPriorityQueue"
+    settings = {"SCHEDULER_SPILL_COUNT": 2, "SCHEDULER_SPILL_REFILL_SIZE": 2}
+
+    def _dequeue_all(self):
+        urls = []
+        while self.scheduler.has_pending_requests():
+            urls.append(self.scheduler.next_request().url)
+        return urls
+
+    def _stats(self, *names):
+        stats = self.mock_crawler.stats
+        return [stats.get_value(f"scheduler/{name}", 0) for name in names]
+
+    def test_spill(self):
+        spilldir = self.scheduler.dqdir
+        self.assertTrue(Path(spilldir).is_dir())
+        for url, priority in _PRIORITIES:
+            self.scheduler.enqueue_request(Request(url, priority=priority))
+        self.assertEqual(len(self.scheduler), len(_PRIORITIES))
+        self.assertEqual(
+            self._stats("enqueued/memory", "enqueued/disk", "spilled"), [5, 0, 3]
+        )
+        self.assertEqual(
+            self._dequeue_all(),
+            [
+                "http://foo.com/e",
+                "http://foo.com/d",
+                "http://foo.com/c",
+                "http://foo.com/b",
+                "http://foo.com/a",
+            ],
+        )
+        self.assertEqual(
+            self._stats("refilled", "dequeued/memory", "dequeued/disk", "dequeued"),
+            [3, 2, 3, 5],
+        )
+        self.close_scheduler()
+        self.assertFalse(Path(spilldir).exists())
+        self.create_scheduler()
+
+    def test_spill_low_priorities(self):
+        for url, priority in sorted(_PRIORITIES, key=lambda x: -x[1]):
+            self.scheduler.enqueue_request(Request(url, priority=priority))
+        self.assertEqual(
+            self._stats("enqueued/memory", "enqueued/disk", "spilled"), [2, 3, 0]
+        )
+        self.assertEqual(
+            [self.scheduler.next_request().url for _ in range(2)],
+            ["http://foo.com/e", "http://foo.com/d"],
+        )
+        self.assertEqual(self._stats("dequeued/memory"), [2])
+
+    def test_unserializable(self):
+        for url in _URLS:
+            self.scheduler.enqueue_request(Request(url, callback=lambda r: None))
+        self.assertEqual(self._stats("enqueued/memory", "unserializable"), [3, 1])
+        self.assertEqual(set(self._dequeue_all()), _URLS)
+
+
+class TestSchedulerSpillBytes(TestSchedulerSpill):
+    settings = {"SCHEDULER_SPILL_BYTES": 2000, "SCHEDULER_SPILL_REFILL_SIZE": 2}
+
+    def test_large_requests(self):
+        self.scheduler.enqueue_request(Request("http://foo.com/a", body=b"a" * 5000))
+        self.scheduler.enqueue_request(Request("http://foo.com/b"))
+        self.assertEqual(self._stats("enqueued/memory", "enqueued/disk"), [1, 1])
+        self.assertEqual(self._dequeue_all(), ["http://foo.com/a", "http://foo.com/b"])
+        self.assertEqual(self.scheduler._mqbytes, 0)
+
+
+class TestSchedulerSpillOnDisk(TestSchedulerSpill):
+    def setUp(self):
+        self.jobdir = tempfile.mkdtemp()
+        self.create_scheduler()
+
+    def tearDown(self):
+        self.close_scheduler()
+        shutil.rmtree(self.jobdir)
+        self.jobdir = None
+
+    def test_spill(self):
+        self.assertEqual(self.scheduler.dqdir, str(Path(self.jobdir, "requests.queue")))
+        for url in _URLS:
+            self.scheduler.enqueue_request(Request(url))
+        self.assertEqual(self._stats("enqueued/memory", "enqueued/disk"), [2, 1])
+        self.close_scheduler()
+        self.create_scheduler()
+        self.assertEqual(len(self.scheduler), len(_URLS))
+        self.assertEqual(set(self._dequeue_all()), _URLS)
+
+
 _URLS_WITH_SLOTS = [
     ("http://foo.com/a", "a"),
     ("http://foo.com/b", "a"),
@@ -205,7 +324,9 @@ class TestMigration(unittest.TestCase):
     def tearDown(self):
         shutil.rmtree(self.tmpdir)
 
-    def _migration(self, tmp_dir):
+    def _migration(
+        self, tmp_dir, next_queue_cls="scrapy.pqueues.DownloaderAwarePriorityQueue"
+    ):
         prev_scheduler_handler = SchedulerHandler()
         prev_scheduler_handler.priority_queue_cls = "scrapy.pqueues.ScrapyPriorityQueue"
         prev_scheduler_handler.jobdir = tmp_dir
@@ -216,9 +337,7 @@ class TestMigration(unittest.TestCase):
         prev_scheduler_handler.close_scheduler()
 
         next_scheduler_handler = SchedulerHandler()
-        next_scheduler_handler.priority_queue_cls = (
-            "scrapy.pqueues.DownloaderAwarePriorityQueue"
-        )
+        next_scheduler_handler.priority_queue_cls = next_queue_cls
         next_scheduler_handler.jobdir = tmp_dir
 
         next_scheduler_handler.create_scheduler()
@@ -227,6 +346,10 @@ class TestMigration(unittest.TestCase):
         with self.assertRaises(ValueError):
             self._migration(self.tmpdir)
 
+    def test_migration_to_sqlite(self):
+        with self.assertRaises(ValueError):
+            self._migration(self.tmpdir, "scrapy.pqueues.SqlitePriorityQueue")
+
 
 def _is_scheduling_fair(enqueued_slots, dequeued_slots):
     """
@@ -276,11 +399,17 @@ class DownloaderAwareSchedulerTestMixin:
             slot = downloader.get_slot_key(request)
             dequeued_slots.append(slot)
             downloader.increment(slot)
+            self.mock_crawler.signals.send_catch_log(
+                signals.request_reached_downloader, request=request, spider=self.spider
+            )
             requests.append(request)
 
         for request in requests:
             # pylint: disable=protected-access
             slot = downloader.get_slot_key(request)
+            self.mock_crawler.signals.send_catch_log(
+                signals.request_left_downloader, request=request, spider=self.spider
+            )
             downloader.decrement(slot)
 
         self.assertTrue(
@@ -1,18 +1,29 @@
 import pickle
+import shutil
 import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
 
 from queuelib.tests import test_queue as t
 
-from scrapy.http import Request
+from scrapy.http import FormRequest, JsonRequest, Request
 from scrapy.item import Field, Item
 from scrapy.loader import ItemLoader
 from scrapy.selector import Selector
+from scrapy.spiders import Spider
 from scrapy.squeues import (
+    CompactFifoDiskQueue,
+    CompactLifoDiskQueue,
+    _CompactRequestCodec,
     _MarshalFifoSerializationDiskQueue,
     _MarshalLifoSerializationDiskQueue,
     _PickleFifoSerializationDiskQueue,
     _PickleLifoSerializationDiskQueue,
 )
+from scrapy.utils.request import request_from_dict
+from scrapy.utils.test import get_crawler
 
 
 class TestItem(Item):
@@ -185,3 +196,229 @@ class PickleLifoDiskQueueTest(t.LifoDiskQueueTest, LifoDiskQueueTestMixin):
         assert isinstance(r2, Request)
         self.assertEqual(r.url, r2.url)
         assert r2.meta["request"] is r2
+
+
+class BufferedPickleFifoDiskQueueTest(PickleFifoDiskQueueTest):
+    chunksize = 3
+
+    def queue(self):
+        return _PickleFifoSerializationDiskQueue(
+            self.qpath, chunksize=self.chunksize, flush_size=64
+        )
+
+    def test_not_szhdr(self):
+        q = self.queue()
+        q.push(b"something")
+        q.flush()
+        with (
+            self.tempfilename().open("w+") as empty_file,
+            mock.patch.object(q, "tailf", empty_file),
+        ):
+            assert q.peek() is None
+            assert q.pop() is None
+        q.close()
+
+    def test_buffered_order(self):
+        q = self.queue()
+        values = [str(i) * 10 for i in range(20)]
+        for value in values[:10]:
+            q.push(value)
+        assert list(self.qpath.glob("q*"))
+        self.assertLess(len(q._buffer), 10)
+        self.assertEqual(len(q), 10)
+        self.assertEqual(q.pop(), values[0])
+        for value in values[10:]:
+            q.push(value)
+        self.assertEqual([q.pop() for _ in values[1:]], values[1:])
+        assert q.pop() is None
+        q.close()
+
+    def test_buffered_close(self):
+        q = self.queue()
+        q.push("a")
+        self.assertEqual(len(q._buffer), 1)
+        q.close()
+        q = self.queue()
+        self.assertEqual(len(q), 1)
+        self.assertEqual(q.pop(), "a")
+        q.close()
+
+
+class BufferedPickleLifoDiskQueueTest(PickleLifoDiskQueueTest):
+    def queue(self):
+        return _PickleLifoSerializationDiskQueue(self.qpath, flush_size=64)
+
+    def test_buffered_order(self):
+        q = self.queue()
+        values = [str(i) * 10 for i in range(20)]
+        for value in values[:10]:
+            q.push(value)
+        self.assertLess(len(q._buffer), 10)
+        self.assertEqual(len(q), 10)
+        self.assertEqual(q.pop(), values[9])
+        for value in values[10:]:
+            q.push(value)
+        expected = values[10:][::-1] + values[:9][::-1]
+        self.assertEqual([q.pop() for _ in expected], expected)
+        assert q.pop() is None
+        q.close()
+
+    def test_buffered_close(self):
+        q = self.queue()
+        q.push("a")
+        self.assertEqual(len(q._buffer), 1)
+        q.close()
+        q = self.queue()
+        self.assertEqual(len(q), 1)
+        self.assertEqual(q.pop(), "a")
+        q.close()
+
+
+class CompactDiskQueueSpider(Spider):
+    name = "compact"
+
+    def parse_item(self, response):
+        pass
+
+    def handle_error(self, failure):
+        pass
+
+
+class CompactFifoDiskQueueTest(unittest.TestCase):
+    queue_class = CompactFifoDiskQueue
+    settings: dict = {}
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.key = str(Path(self.tmpdir, "queue"))
+        self.crawler = get_crawler(CompactDiskQueueSpider, self.settings)
+        self.crawler.spider = self.crawler._create_spider()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def queue(self):
+        return self.queue_class.from_crawler(self.crawler, self.key)
+
+    def requests(self):
+        spider = self.crawler.spider
+        return [
+            Request("http://www.example.com"),
+            Request(
+                url="http://www.example.com/£",
+                callback=spider.parse_item,
+                errback=spider.handle_error,
+                method="POST",
+                body=b"some body",
+                headers={"X-Multi": ["a", "b"], "Accept": "text/html"},
+                cookies={"currency": "руб"},
+                encoding="latin-1",
+                priority=-20,
+                meta={"a": "b"},
+                cb_kwargs={"k": "v"},
+                flags=["testFlag"],
+                dont_filter=True,
+            ),
+            FormRequest("http://www.example.com", formdata={"a": "b"}, priority=300),
+            JsonRequest("http://www.example.com", data={"a": 1}, dumps_kwargs={}),
+            Request("http://www.example.com", body=b"x" * 5000),
+        ]
+
+    def assertRequestsEqual(self, r1, r2):
+        spider = self.crawler.spider
+        self.assertIs(type(r1), type(r2))
+        self.assertEqual(r1.to_dict(spider=spider), r2.to_dict(spider=spider))
+
+    def expected(self, requests):
+        return requests
+
+    def test_roundtrip(self):
+        q = self.queue()
+        requests = self.requests()
+        for request in requests:
+            q.push(request)
+        self.assertEqual(len(q), len(requests))
+        for expected in self.expected(requests):
+            self.assertRequestsEqual(q.pop(), expected)
+        self.assertIsNone(q.pop())
+        q.close()
+        self.assertFalse(Path(f"{self.key}.strings").exists())
+
+    def test_persistence(self):
+        q = self.queue()
+        requests = self.requests()
+        for request in requests:
+            q.push(request)
+        q.close()
+        self.assertTrue(Path(f"{self.key}.strings").exists())
+        q = self.queue()
+        self.assertEqual(len(q), len(requests))
+        for expected in self.expected(requests):
+            self.assertRequestsEqual(q.pop(), expected)
+        q.close()
+
+    def test_smaller_than_pickle(self):
+        requests = [
+            Request(f"http://www.example.com/{i}", headers={"Referer": "x"})
+            for i in range(100)
+        ]
+        compact = _CompactRequestCodec()
+        compact_size = sum(len(compact.encode(r.to_dict())) for r in requests)
+        pickle_size = sum(len(pickle.dumps(r.to_dict(), protocol=4)) for r in requests)
+        self.assertLess(compact_size, pickle_size / 3)
+
+    def test_nonserializable(self):
+        q = self.queue()
+        self.assertRaises(
+            ValueError, q.push, Request("http://a", meta={"f": lambda: None})
+        )
+        self.assertRaises(ValueError, q.push, Request("http://a", callback=len))
+        q.close()
+
+
+class CompactLifoDiskQueueTest(CompactFifoDiskQueueTest):
+    queue_class = CompactLifoDiskQueue
+
+    def expected(self, requests):
+        return requests[::-1]
+
+
+class ZlibCompactFifoDiskQueueTest(CompactFifoDiskQueueTest):
+    settings = {"SCHEDULER_DISK_QUEUE_COMPRESSION": "zlib"}
+
+    def test_compression(self):
+        q = self.queue()
+        q.push(Request("http://www.example.com", body=b"x" * 5000))
+        q.close()
+        size = sum(f.stat().st_size for f in Path(self.key).glob("q*"))
+        self.assertLess(size, 1000)
+
+
+class CompactRequestCodecTest(unittest.TestCase):
+    def test_priorities(self):
+        codec = _CompactRequestCodec()
+        for priority in (0, 1, -1, 63, -64, 64, 2**40, -(2**40)):
+            d = Request("http://a", priority=priority).to_dict()
+            decoded = request_from_dict(codec.decode(codec.encode(d)))
+            self.assertEqual(decoded.to_dict(), d)
+
+    def test_falsy_subclass_attributes(self):
+        codec = _CompactRequestCodec()
+        d = _FalsyAttributesRequest("http://a", count=0, flag=False, text="").to_dict()
+        decoded = request_from_dict(codec.decode(codec.encode(d)))
+        self.assertEqual(decoded.to_dict(), d)
+        self.assertEqual((decoded.count, decoded.flag, decoded.text), (0, False, ""))
+
+    def test_unsupported_compression(self):
+        with self.assertRaises(ValueError):
+            _CompactRequestCodec(compression="foo")
+
+
+class _FalsyAttributesRequest(Request):
+    attributes = (*Request.attributes, "count", "flag", "text")
+
+    def __init__(self, *args, count=1, flag=True, text="a", **kwargs):
+        super().__init__(*args, **kwargs)
+        self.count = count
+        self.flag = flag
+        self.text = text
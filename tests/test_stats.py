@@ -48,6 +48,18 @@ class CoreStatsExtensionTest(unittest.TestCase):
         ext.spider_closed(self.spider, "finished")
         self.assertEqual(ext.stats._stats, {})
 
+    def test_core_stats_url_cache(self):
+        self.crawler.stats = StatsCollector(self.crawler)
+        ext = CoreStats.from_crawler(self.crawler)
+        cache = self.crawler.canonicalize_url_cache
+        cache("http://example.com/before")
+        ext.spider_opened(self.spider)
+        cache("http://example.com/during")
+        cache("http://example.com/during")
+        ext.spider_closed(self.spider, "finished")
+        self.assertEqual(ext.stats.get_value("canonicalize_url_cache/hits"), 1)
+        self.assertEqual(ext.stats.get_value("canonicalize_url_cache/misses"), 1)
+
 
 class StatsCollectorTest(unittest.TestCase):
     def setUp(self):
@@ -0,0 +1,140 @@
+import unittest
+
+from twisted.internet import error
+from twisted.internet.task import Clock
+
+from scrapy.utils.reactor import TimerWheel
+
+
+class TimerWheelTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = Clock()
+        self.calls = []
+
+    def wheel(self, **kwargs):
+        return TimerWheel(0.1, clock=self.clock, **kwargs)
+
+    def record(self, name):
+        self.calls.append((name, round(self.clock.seconds(), 6)))
+
+    def test_call_later(self):
+        wheel = self.wheel()
+        call = wheel.call_later(0.25, self.record, "a")
+        wheel.call_later(0.05, self.record, name="b")
+        self.assertTrue(call.active())
+        self.assertEqual(len(wheel), 2)
+        self.assertEqual(len(self.clock.getDelayedCalls()), 1)
+        self.clock.pump([0.1] * 5)
+        self.assertEqual(self.calls, [("b", 0.1), ("a", 0.3)])
+        self.assertFalse(call.active())
+        self.assertEqual(len(wheel), 0)
+        self.assertEqual(self.clock.getDelayedCalls(), [])
+        with self.assertRaises(error.AlreadyCalled):
+            call.cancel()
+
+    def test_cancel(self):
+        wheel = self.wheel()
+        call = wheel.call_later(0.2, self.record, "a")
+        wheel.call_later(0.3, self.record, "b")
+        call.cancel()
+        self.assertFalse(call.active())
+        self.assertEqual(len(wheel), 1)
+        with self.assertRaises(error.AlreadyCancelled):
+            call.cancel()
+        self.clock.pump([0.1] * 4)
+        self.assertEqual(self.calls, [("b", 0.3)])
+
+    def test_many_calls_one_delayed_call(self):
+        wheel = self.wheel()
+        for i in range(1000):
+            wheel.call_later(i % 50 / 10, self.record, i)
+        self.assertEqual(len(self.clock.getDelayedCalls()), 1)
+        self.clock.pump([0.1] * 60)
+        self.assertEqual(len(self.calls), 1000)
+        for i, at in self.calls:
+            self.assertEqual(at, max(i % 50, 1) / 10)
+
+    def test_wakeups(self):
+        wheel = self.wheel(wheel_size=8)
+        wheel.call_later(0.5, self.record, "a")
+        wheel.call_later(2.0, self.record, "b")
+        wakeups = []
+        while self.clock.getDelayedCalls():
+            wakeups.append(round(self.clock.getDelayedCalls()[0].getTime(), 6))
+            self.clock.advance(wakeups[-1] - self.clock.seconds())
+        # the ticks of the calls and the starts of the turns of the first wheel
+        self.assertEqual(wakeups, [0.5, 0.8, 1.6, 2.0])
+        self.assertEqual(self.calls, [("a", 0.5), ("b", 2.0)])
+
+    def test_earlier_call(self):
+        wheel = self.wheel()
+        wheel.call_later(2, self.record, "a")
+        wheel.call_later(0.1, self.record, "b")
+        self.assertEqual(len(self.clock.getDelayedCalls()), 1)
+        self.clock.advance(0.1)
+        self.assertEqual(self.calls, [("b", 0.1)])
+        self.clock.advance(1.9)
+        self.assertEqual(self.calls[-1], ("a", 2))
+
+    def test_hierarchy(self):
+        wheel = self.wheel(wheel_size=4, levels=2)
+        delays = [0.1, 0.35, 0.4, 1.0, 1.55, 1.6, 2.5, 7.0, 12.3]
+        for delay in delays:
+            wheel.call_later(delay, self.record, delay)
+        self.clock.pump([0.1] * 130)
+        self.assertEqual(
+            self.calls,
+            [
+                (0.1, 0.1),
+                (0.35, 0.4),
+                (0.4, 0.4),
+                (1.0, 1.0),
+                (1.55, 1.6),
+                (1.6, 1.6),
+                (2.5, 2.5),
+                (7.0, 7.0),
+                (12.3, 12.3),
+            ],
+        )
+
+    def test_late_tick(self):
+        wheel = self.wheel()
+        wheel.call_later(0.1, self.record, "a")
+        wheel.call_later(0.5, self.record, "b")
+        wheel.call_later(2, self.record, "c")
+        self.clock.advance(1)
+        self.assertEqual(self.calls, [("a", 1), ("b", 1)])
+        self.clock.advance(1)
+        self.assertEqual(self.calls[-1], ("c", 2))
+
+    def test_call_later_from_call(self):
+        wheel = self.wheel()
+
+        def reschedule(n):
+            self.record(n)
+            if n:
+                wheel.call_later(0.2, reschedule, n - 1)
+
+        wheel.call_later(0.2, reschedule, 2)
+        self.clock.pump([0.1] * 10)
+        self.assertEqual(self.calls, [(2, 0.2), (1, 0.4), (0, 0.6)])
+
+    def test_error(self):
+        wheel = self.wheel()
+        wheel.call_later(0.1, lambda: 1 / 0)
+        wheel.call_later(0.1, self.record, "a")
+        with self.assertLogs("scrapy.utils.reactor", level="ERROR"):
+            self.clock.advance(0.1)
+        self.assertEqual(self.calls, [("a", 0.1)])
+
+    def test_stop(self):
+        wheel = self.wheel()
+        wheel.call_later(0.1, self.record, "a")
+        wheel.stop()
+        self.assertEqual(self.clock.getDelayedCalls(), [])
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            TimerWheel(0, clock=self.clock)
+        with self.assertRaises(ValueError):
+            TimerWheel(0.1, wheel_size=100, clock=self.clock)
@@ -9,6 +9,7 @@ from weakref import WeakKeyDictionary
 from scrapy.http import Request
 from scrapy.utils.python import to_bytes
 from scrapy.utils.request import (
+    FastRequestFingerprinter,
     _fingerprint_cache,
     fingerprint,
     request_authenticate,
@@ -279,6 +280,67 @@ class RequestFingerprinterTestCase(unittest.TestCase):
         self.assertTrue(logged_warnings)
 
 
+class FastRequestFingerprinterTestCase(unittest.TestCase):
+    requests = (
+        Request("http://example.org"),
+        Request("https://example.org?a=b&a=c#frag"),
+        Request("https://example.org", method="POST", body=b"a"),
+        Request('https://example.org/\u00fc"\\', body=b"\x00\xff"),
+        Request("https://\u4f8b\u3048.jp/\u30d1\u30b9?q=\u5024"),
+    )
+
+    def test_compatible_fingerprints(self):
+        fingerprinter = FastRequestFingerprinter()
+        for request in self.requests:
+            self.assertEqual(fingerprinter.fingerprint(request), fingerprint(request))
+        for request, expected, kwargs in FingerprintTest.known_hashes:
+            if not kwargs:
+                self.assertEqual(fingerprinter.fingerprint(request), expected)
+
+    def test_from_crawler(self):
+        settings = {
+            "REQUEST_FINGERPRINTER_CLASS": FastRequestFingerprinter,
+        }
+        crawler = get_crawler(settings_dict=settings)
+        request = Request("https://example.com")
+        self.assertEqual(
+            crawler.request_fingerprinter.fingerprint(request),
+            fingerprint(request),
+        )
+
+    def test_algorithm(self):
+        settings = {
+            "REQUEST_FINGERPRINTER_CLASS": FastRequestFingerprinter,
+            "REQUEST_FINGERPRINTER_HASH": "sha256",
+        }
+        crawler = get_crawler(settings_dict=settings)
+        fingerprinter = crawler.request_fingerprinter
+        fingerprints = {fingerprinter.fingerprint(r) for r in self.requests}
+        self.assertEqual(len(fingerprints), len(self.requests))
+        for fp in fingerprints:
+            self.assertEqual(len(fp), 32)
+        r1 = Request("https://example.org?b=1&a=2")
+        r2 = Request("https://example.org?a=2&b=1")
+        self.assertEqual(fingerprinter.fingerprint(r1), fingerprinter.fingerprint(r2))
+        self.assertNotEqual(fingerprinter.fingerprint(r1), fingerprint(r1))
+        self.assertEqual(len(FastRequestFingerprinter("md5").fingerprint(r1)), 16)
+
+    def test_unknown_algorithm(self):
+        with self.assertRaises(ValueError):
+            FastRequestFingerprinter("foo")
+
+    def test_variable_length_algorithm(self):
+        with self.assertRaises(ValueError):
+            FastRequestFingerprinter("shake_128")
+
+    def test_caching(self):
+        fingerprinter = FastRequestFingerprinter()
+        request = Request("https://example.org")
+        fp = fingerprinter.fingerprint(request)
+        self.assertIs(fingerprinter._cache[request], fp)
+        self.assertIs(fingerprinter.fingerprint(request), fp)
+
+
 class CustomRequestFingerprinterTestCase(unittest.TestCase):
     def test_include_headers(self):
         class RequestFingerprinter:
@@ -7,7 +7,8 @@ from twisted.internet import defer, reactor
 from twisted.python.failure import Failure
 from twisted.trial import unittest
 
-from scrapy.utils.signal import send_catch_log, send_catch_log_deferred
+from scrapy.signalmanager import SignalManager
+from scrapy.utils.signal import has_receivers, send_catch_log, send_catch_log_deferred
 from scrapy.utils.test import get_from_asyncio_queue
 
 
@@ -97,3 +98,44 @@ class SendCatchLogTest2(unittest.TestCase):
         self.assertEqual(len(log.records), 1)
         self.assertIn("Cannot return deferreds from signal handler", str(log))
         dispatcher.disconnect(test_handler, test_signal)
+
+
+class HasReceiversTest(unittest.TestCase):
+    def handler(self, **kwargs):
+        return "OK"
+
+    def test_has_receivers(self):
+        test_signal, other_signal, sender = object(), object(), object()
+        self.assertFalse(has_receivers(test_signal))
+        dispatcher.connect(self.handler, test_signal, sender=sender)
+        self.assertTrue(has_receivers(test_signal, sender))
+        self.assertFalse(has_receivers(test_signal))
+        self.assertFalse(has_receivers(other_signal, sender))
+        dispatcher.disconnect(self.handler, test_signal, sender=sender)
+        self.assertFalse(has_receivers(test_signal, sender))
+
+    def test_any(self):
+        test_signal, sender = object(), object()
+        dispatcher.connect(self.handler, test_signal)
+        self.assertTrue(has_receivers(test_signal, sender))
+        dispatcher.disconnect(self.handler, test_signal)
+        dispatcher.connect(self.handler, sender=sender)
+        self.assertTrue(has_receivers(test_signal, sender))
+        dispatcher.disconnect(self.handler, sender=sender)
+        self.assertFalse(has_receivers(test_signal, sender))
+
+    @defer.inlineCallbacks
+    def test_signal_manager(self):
+        test_signal = object()
+        manager = SignalManager(object())
+        self.assertFalse(manager.has_receivers(test_signal))
+        self.assertEqual(manager.send_catch_log(test_signal), [])
+        result = yield manager.send_catch_log_deferred(test_signal)
+        self.assertEqual(result, [])
+        manager.connect(self.handler, test_signal)
+        self.assertTrue(manager.has_receivers(test_signal))
+        self.assertEqual(manager.send_catch_log(test_signal), [(self.handler, "OK")])
+        result = yield manager.send_catch_log_deferred(test_signal)
+        self.assertEqual(result, [(self.handler, "OK")])
+        manager.disconnect(self.handler, test_signal)
+        self.assertFalse(manager.has_receivers(test_signal))
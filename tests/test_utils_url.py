@@ -1,11 +1,16 @@
 import unittest
 
-from scrapy.linkextractors import IGNORED_EXTENSIONS
+from scrapy.http import HtmlResponse, Request
+from scrapy.linkextractors import IGNORED_EXTENSIONS, LinkExtractor
 from scrapy.spiders import Spider
 from scrapy.utils.misc import arg_to_iter
+from scrapy.utils.test import get_crawler
 from scrapy.utils.url import (
+    CanonicalizeUrlCache,
     _is_filesystem_path,
     add_http_if_no_scheme,
+    canonicalize_url,
+    canonicalize_url_cache,
     guess_scheme,
     strip_url,
     url_has_any_extension,
@@ -609,5 +614,72 @@ class IsPathTestCase(unittest.TestCase):
             )
 
 
+class CanonicalizeUrlCacheTest(unittest.TestCase):
+    def test_results(self):
+        cache = CanonicalizeUrlCache()
+        for url in (
+            "http://www.example.com/do?c=3&b=5&b=2&a=50",
+            "http://www.example.com/a%a3do#frag",
+            "http://www.example.com/r\u00e9sum\u00e9",
+        ):
+            for keep_fragments in (False, True):
+                expected = canonicalize_url(url, keep_fragments=keep_fragments)
+                self.assertEqual(cache(url, keep_fragments), expected)
+                self.assertEqual(cache(url, keep_fragments=keep_fragments), expected)
+        self.assertEqual(cache.misses, 6)
+        self.assertEqual(cache.hits, 6)
+        self.assertEqual(len(cache), 6)
+
+    def test_lru(self):
+        cache = CanonicalizeUrlCache(limit=2)
+        cache("http://example.com/a")
+        cache("http://example.com/b")
+        cache("http://example.com/a")
+        cache("http://example.com/c")
+        self.assertEqual(len(cache), 2)
+        cache("http://example.com/a")
+        self.assertEqual(cache.hits, 2)
+        cache("http://example.com/b")
+        self.assertEqual(cache.misses, 4)
+
+    def test_disabled(self):
+        cache = CanonicalizeUrlCache(limit=0)
+        cache("http://example.com/a")
+        cache("http://example.com/a")
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.misses, 2)
+
+    def test_disabled_after_use(self):
+        cache = CanonicalizeUrlCache(limit=2)
+        cache("http://example.com/a")
+        cache.limit = 0
+        cache("http://example.com/a")
+        self.assertEqual(cache.hits, 0)
+        self.assertEqual(cache.misses, 2)
+
+    def test_crawler_setting(self):
+        limit = canonicalize_url_cache.limit
+        self.addCleanup(setattr, canonicalize_url_cache, "limit", limit)
+        crawler = get_crawler(settings_dict={"URL_CANONICALIZATION_CACHE_SIZE": 5})
+        self.assertIs(crawler.canonicalize_url_cache, canonicalize_url_cache)
+        self.assertEqual(canonicalize_url_cache.limit, 5)
+
+    def test_crawler_fingerprinter_and_link_extractor(self):
+        crawler = get_crawler()
+        cache = crawler.canonicalize_url_cache
+        cache.clear()
+        hits, misses = cache.hits, cache.misses
+        request = Request("http://example.com/a?b=1&a=2")
+        crawler.request_fingerprinter.fingerprint(request)
+        self.assertEqual((cache.hits - hits, cache.misses - misses), (0, 1))
+        response = HtmlResponse(
+            "http://example.com",
+            body=b'<a href="/a?b=1&amp;a=2">a</a>',
+        )
+        LinkExtractor(canonicalize=True).extract_links(response)
+        # the canonical URL computed for the fingerprint is reused
+        self.assertGreater(cache.hits, hits)
+
+
 if __name__ == "__main__":
     unittest.main()